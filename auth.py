@@ -3,10 +3,11 @@ Authentication module for JWT token handling and password management.
 """
 
 import os
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -21,6 +22,10 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 hours
 REFRESH_TOKEN_EXPIRE_DAYS = 7  # 7 days for refresh token
 
+# Internal token for operational endpoints that span all restaurants (/metrics);
+# those endpoints are disabled when it is not set
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -143,3 +148,16 @@ def get_current_owner(current_restaurant: models.Restaurant = Depends(get_curren
         )
     return current_restaurant
 
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    """Allow cross-restaurant operational endpoints only with the internal METRICS_TOKEN."""
+    if not METRICS_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Not Found"
+        )
+    if not x_metrics_token or not secrets.compare_digest(x_metrics_token, METRICS_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token"
+        )
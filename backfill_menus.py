@@ -0,0 +1,95 @@
+"""
+Backfill Script for Normalized Menu Storage
+Rewrites Restaurant.data["menu"] of existing rows into the canonical item
+shape (see services/menu_normalizer.py), so the chat read path no longer
+has to fix up menus stored before normalization happened on write.
+
+Usage:
+    python backfill_menus.py [--batch-size 100] [--dry-run]
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+# Load environment variables before database.py reads DATABASE_URL
+load_dotenv()
+
+from database import SessionLocal  # noqa: E402
+import models  # noqa: E402
+from services.menu_normalizer import MENU_SCHEMA_VERSION, apply_menu_fallbacks, is_normalized  # noqa: E402
+
+
+def backfill_menus(batch_size: int = 100, dry_run: bool = False) -> dict:
+    """Normalize every restaurant menu not yet in the canonical shape, one batch per commit."""
+    counts = {"scanned": 0, "normalized": 0, "already_normalized": 0, "failed": 0}
+    db = SessionLocal()
+    last_id = None
+    try:
+        while True:
+            query = db.query(models.Restaurant).order_by(models.Restaurant.restaurant_id)
+            if last_id is not None:
+                query = query.filter(models.Restaurant.restaurant_id > last_id)
+            batch = query.limit(batch_size).all()
+            if not batch:
+                break
+
+            for restaurant in batch:
+                counts["scanned"] += 1
+                data = restaurant.data or {}
+                if is_normalized(data):
+                    counts["already_normalized"] += 1
+                    continue
+                try:
+                    # Assign a new dict so SQLAlchemy notices the JSON change
+                    restaurant.data = {
+                        **data,
+                        "menu": apply_menu_fallbacks(data.get("menu") or []),
+                        "menu_schema": MENU_SCHEMA_VERSION,
+                    }
+                    counts["normalized"] += 1
+                except Exception as e:
+                    print(f"❌ Failed to normalize menu of {restaurant.restaurant_id}: {e}")
+                    counts["failed"] += 1
+
+            last_id = batch[-1].restaurant_id
+            if dry_run:
+                db.rollback()
+            else:
+                db.commit()
+            print(f"📦 Batch up to {last_id}: {counts}")
+            # Release the batch's objects before loading the next one
+            db.expunge_all()
+    finally:
+        db.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+
+    print(f"🔧 Normalizing stored menus (schema v{MENU_SCHEMA_VERSION}){' [dry run]' if args.dry_run else ''}...")
+    counts = backfill_menus(args.batch_size, args.dry_run)
+
+    print(f"\n📊 Backfill Summary:")
+    print(f"   Restaurants scanned: {counts['scanned']}")
+    print(f"   Menus normalized: {counts['normalized']}")
+    print(f"   Already normalized: {counts['already_normalized']}")
+    print(f"   Failed: {counts['failed']}")
+    return counts["failed"] == 0
+
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n⚠️ Backfill interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Unexpected error during backfill: {e}")
+        sys.exit(1)
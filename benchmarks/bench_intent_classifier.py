@@ -0,0 +1,78 @@
+"""
+Benchmark: small-talk intent classifier speed and deflection rate.
+
+Classifies a synthetic WhatsApp traffic mix (greetings, thanks, "ok", emoji,
+media placeholders and real questions) and reports the time per message and
+the fraction of messages that would skip the OpenAI call.
+
+Usage:
+    python benchmarks/bench_intent_classifier.py [--messages 100000] [--small-talk-share 0.35]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.intent_classifier import classify  # noqa: E402
+
+SMALL_TALK = [
+    "hi", "Hello!", "hey there", "Good morning", "bonjour", "hola 👋",
+    "thanks", "Thank you so much!", "thx", "merci beaucoup", "ok thanks",
+    "ok", "Okay", "perfect", "got it", "sure",
+    "👍", "🙏🙏", ":)", "😂",
+    "Media message or unsupported message type",
+]
+QUESTIONS = [
+    "Do you have anything vegan?",
+    "Is the mushroom risotto gluten free?",
+    "hi, can I book a table for 4 tonight?",
+    "What time do you close on Sunday",
+    "thanks, and do you deliver to the city centre?",
+    "How much is the carbonara?",
+    "ok so which dishes have peanuts",
+    "I'd like to order two pizzas for pickup",
+]
+
+
+def make_traffic(size: int, small_talk_share: float):
+    rng = random.Random(7)
+    return [
+        rng.choice(SMALL_TALK) if rng.random() < small_talk_share else rng.choice(QUESTIONS)
+        for _ in range(size)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100000)
+    parser.add_argument("--small-talk-share", type=float, default=0.35)
+    args = parser.parse_args()
+
+    traffic = make_traffic(args.messages, args.small_talk_share)
+    start = time.perf_counter()
+    intents = [classify(message) for message in traffic]
+    elapsed = time.perf_counter() - start
+
+    counts = Counter(intent or "llm" for intent in intents)
+    deflected = args.messages - counts["llm"]
+    print(f"📊 {args.messages} messages in {elapsed * 1000:.1f} ms "
+          f"({elapsed / args.messages * 1e6:.2f} µs/message)")
+    print(f"   deflected {deflected} ({deflected / args.messages:.1%}) without an OpenAI call")
+    for intent, count in counts.most_common():
+        print(f"   {intent:<10} {count:7d}")
+
+    missed = sorted({m for m, i in zip(traffic, intents) if i is None and m in SMALL_TALK})
+    wrong = sorted({m for m, i in zip(traffic, intents) if i is not None and m in QUESTIONS})
+    if missed:
+        print(f"   ⚠️ small talk sent to the LLM: {missed}")
+    if wrong:
+        print(f"   ⚠️ questions deflected: {wrong}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: prompt size with the full menu vs. relevance-filtered retrieval.
+
+Builds a large synthetic menu, compiles the prompt context the way
+chat_service does, and compares the menu section sent for a set of typical
+customer questions. Token counts use services.token_budget.estimate_tokens
+(tiktoken when installed, otherwise a 4-characters-per-token estimate).
+
+Usage:
+    python benchmarks/bench_prompt_size.py [--items 300]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.chat_service import build_prompt_context  # noqa: E402
+from services.token_budget import estimate_tokens as count_tokens  # noqa: E402
+
+QUESTIONS = [
+    "Do you have anything vegan?",
+    "Is the mushroom risotto gluten free?",
+    "Which dishes contain peanuts?",
+    "What burgers do you have?",
+    "How spicy is the chicken curry?",
+    "What do you recommend?",
+]
+
+BASES = ["risotto", "burger", "curry", "salad", "pizza", "pasta", "soup", "tacos", "bowl", "wrap"]
+STYLES = ["mushroom", "chicken", "beef", "vegan", "spicy", "garden", "truffle", "smoky", "lemon", "peanut"]
+INGREDIENTS = ["rice", "tomato", "cheese", "tofu", "chicken", "beef", "mushroom", "peanut", "wheat flour",
+               "egg", "milk", "basil", "chili", "garlic", "onion", "soy sauce", "sesame", "lettuce"]
+
+
+def make_menu(size: int):
+    rng = random.Random(42)
+    return [
+        {
+            "dish": f"{rng.choice(STYLES).title()} {rng.choice(BASES).title()} No. {i}",
+            "price": f"${rng.randint(8, 30)}.{rng.choice(['00', '50', '95'])}",
+            "ingredients": rng.sample(INGREDIENTS, 4),
+            "description": "House favourite prepared fresh every day with seasonal produce.",
+        }
+        for i in range(size)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=300)
+    args = parser.parse_args()
+
+    data = {"name": "Benchmark Bistro", "opening_hours": "9-22", "menu": make_menu(args.items)}
+    context = build_prompt_context("bench", data, "v1")
+
+    full_tokens = count_tokens(context.menu_text)
+    print(f"📊 {args.items}-item menu: full menu section = {full_tokens} tokens")
+    for question in QUESTIONS:
+        start = time.perf_counter()
+        rendered, _ = context.render_menu(question)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        tokens = count_tokens(rendered)
+        print(f"   {question:<40} {tokens:6d} tokens ({tokens / full_tokens:6.1%})  retrieval {elapsed_us:7.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: cold-start time of `import main`, eager vs. lazy clients.
+
+Imports the app in fresh interpreters (the same work a new uvicorn worker
+does before it can accept requests) in two modes:
+
+- eager: the OpenAI client and vector store are created on the import path,
+  as pinecone_utils did at module level before clients were made lazy
+  (reproduced by calling warm_up_clients() right after `import main`)
+- lazy: `import main` only; warm_up_clients() runs in a background thread
+  during lifespan startup, off the path to the first accepted request
+
+The lazy run also checks that no client was created at import. The gap is
+the client setup (for Pinecone, the index handshake over the network); with
+VECTOR_STORE_BACKEND=local it is close to zero.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+LAZY_SNIPPET = """
+import time
+start = time.perf_counter()
+import main
+import pinecone_utils
+elapsed = time.perf_counter() - start
+print(elapsed, pinecone_utils._openai_client is None and pinecone_utils._vector_index is None)
+"""
+
+EAGER_SNIPPET = """
+import time
+start = time.perf_counter()
+import main
+import pinecone_utils
+pinecone_utils.warm_up_clients()
+elapsed = time.perf_counter() - start
+print(elapsed, pinecone_utils._vector_index is not None)
+"""
+
+
+def run(snippet: str):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        sys.exit(f"❌ Subprocess failed:\n{result.stderr.strip()}")
+    measured, flag = result.stdout.strip().splitlines()[-1].split()
+    return wall, float(measured), flag == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    modes = (("eager", EAGER_SNIPPET), ("lazy", LAZY_SNIPPET))
+    # Interleave the modes so machine noise hits both alike
+    samples = {mode: [] for mode, _ in modes}
+    for _ in range(args.runs):
+        for mode, snippet in modes:
+            samples[mode].append(run(snippet))
+
+    results = {}
+    backend = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+    print(f"📊 Worker startup, {args.runs} fresh interpreters per mode (medians, {backend} vector store)")
+    for mode, _ in modes:
+        runs = samples[mode]
+        results[mode] = statistics.median(r[1] for r in runs)
+        check = "clients ready" if mode == "eager" else "clients untouched"
+        print(f"   {mode:<5}  process {statistics.median(r[0] for r in runs) * 1000:8.1f} ms"
+              f"   until ready {results[mode] * 1000:8.1f} ms   {check}={all(r[2] for r in runs)}")
+
+    saved = results["eager"] - results["lazy"]
+    print(f"   lazy saves {saved * 1000:.1f} ms ({saved / results['eager'] * 100:.0f}%) on the import path")
+
+
+if __name__ == "__main__":
+    main()
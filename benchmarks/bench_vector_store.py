@@ -0,0 +1,132 @@
+"""
+Benchmark: local vector store query latency vs. the remote Pinecone round trip.
+
+Fills a LocalVectorStore with synthetic, topic-clustered ada-sized (1536-d)
+chunks spread over several restaurants plus one large tenant, then times the
+chat retrieval query (restaurant_id OR client_id filter) against a small
+partition (brute force) and the large one (IVF), and reports IVF recall@k
+against exact search. The write-then-query case upserts one vector into the
+large partition before each query, as live ingestion does, to show that
+writes do not stall queries on an index rebuild. With --remote, the same
+queries are also sent to the configured Pinecone index (PINECONE_API_KEY /
+PINECONE_INDEX) to measure its round trip.
+
+Usage:
+    python benchmarks/bench_vector_store.py [--restaurants 50] [--chunks 200]
+        [--large 20000] [--queries 200] [--remote]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import vector_store  # noqa: E402
+from vector_store import LocalVectorStore  # noqa: E402
+
+DIM = 1536
+TOP_K = 5
+TOPICS = 300
+
+
+def chat_filter(restaurant_id: str):
+    return {"$or": [{"restaurant_id": {"$eq": restaurant_id}}, {"client_id": {"$eq": "bench-client"}}]}
+
+
+def embeddings(rng, topics, n):
+    # Real chunk embeddings cluster by topic (dish type, cuisine, FAQ kind)
+    return topics[rng.integers(0, len(topics), n)] + 0.6 * rng.standard_normal((n, DIM), dtype=np.float32)
+
+
+def fill(store: LocalVectorStore, restaurants: int, chunks: int, large: int, rng):
+    topics = rng.standard_normal((TOPICS, DIM), dtype=np.float32)
+    for r in range(restaurants):
+        vectors = embeddings(rng, topics, chunks)
+        store.upsert([(f"r{r}_{i}", vectors[i], {"restaurant_id": f"r{r}"}) for i in range(chunks)])
+    vectors = embeddings(rng, topics, large)
+    store.upsert([(f"big_{i}", vectors[i], {"restaurant_id": "big"}) for i in range(large)])
+    return vectors
+
+
+def timed(query, queries):
+    latencies = []
+    results = []
+    for q in queries:
+        start = time.perf_counter()
+        results.append(query(q))
+        latencies.append(time.perf_counter() - start)
+    return latencies, results
+
+
+def report(label, latencies):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95) - 1] if len(ordered) > 1 else ordered[0]
+    print(f"   {label:<28} p50 {statistics.median(latencies) * 1000:8.3f} ms   p95 {p95 * 1000:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restaurants", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--large", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--remote", action="store_true", help="also time the configured Pinecone index")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    store = LocalVectorStore(path=None)
+    start = time.perf_counter()
+    large_vectors = fill(store, args.restaurants, args.chunks, args.large, rng)
+    print(f"📊 {store.stats()['vectors']} vectors of dim {DIM} indexed in {time.perf_counter() - start:.1f}s")
+
+    # Queries near stored vectors, like real questions near menu chunks
+    picks = rng.integers(0, args.large, args.queries)
+    queries = (large_vectors[picks] + 0.3 * rng.standard_normal((args.queries, DIM), dtype=np.float32)).tolist()
+
+    small, _ = timed(lambda q: store.query(vector=q, top_k=TOP_K, filter=chat_filter("r0")), queries)
+    store.build_indexes()
+    approx, approx_results = timed(lambda q: store.query(vector=q, top_k=TOP_K, filter=chat_filter("big")), queries)
+
+    threshold = vector_store.LOCAL_VECTOR_IVF_THRESHOLD
+    vector_store.LOCAL_VECTOR_IVF_THRESHOLD = args.large + 1
+    exact, exact_results = timed(lambda q: store.query(vector=q, top_k=TOP_K, filter=chat_filter("big")), queries)
+    vector_store.LOCAL_VECTOR_IVF_THRESHOLD = threshold
+
+    recall = statistics.mean(
+        len({m["id"] for m in a["matches"]} & {m["id"] for m in e["matches"]}) / TOP_K
+        for a, e in zip(approx_results, exact_results)
+    )
+
+    writes = iter(embeddings(rng, large_vectors[:TOPICS], args.queries))
+
+    def write_then_query(q):
+        store.upsert([(f"live_{id(q)}", next(writes), {"restaurant_id": "big"})])
+        return store.query(vector=q, top_k=TOP_K, filter=chat_filter("big"))
+
+    after_write, _ = timed(write_then_query, queries)
+
+    print(f"   top_k={TOP_K}, {args.queries} queries")
+    report(f"local {args.chunks} chunks (exact)", small)
+    report(f"local {args.large} chunks (exact)", exact)
+    report(f"local {args.large} chunks (IVF)", approx)
+    report("IVF, 1-vector upsert + query", after_write)
+    print(f"   IVF k-means builds             {store.stats()['ivf_builds']:8d}")
+    print(f"   IVF recall@{TOP_K} vs exact      {recall:8.3f}")
+
+    if args.remote:
+        from pinecone_utils import _pinecone_index
+        index = _pinecone_index()
+        remote, _ = timed(lambda q: index.query(vector=q, top_k=TOP_K, include_metadata=True,
+                                                filter=chat_filter("r0")), queries[:20])
+        report("pinecone round trip", remote)
+    else:
+        print("   (pass --remote to time the configured Pinecone index)")
+
+
+if __name__ == "__main__":
+    main()
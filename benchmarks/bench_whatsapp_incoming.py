@@ -0,0 +1,163 @@
+"""
+Benchmark: concurrent /whatsapp/incoming throughput on a single worker.
+
+Compares the old webhook behaviour (synchronous chat_service called straight
+from the async route) with the async pipeline (chat_service_async + DB work
+offloaded to the threadpool). OpenAI is replaced by a fixed simulated latency
+so the numbers only reflect how the event loop is used.
+
+Both paths must do the same work per webhook: debouncing is switched off
+(otherwise the async route only enqueues), every customer asks a distinct
+question and the answer/prompt caches are cleared before each run (so
+neither single-flight nor the answer cache skips OpenAI calls), and the LLM
+scheduler admits every request at once.
+
+Usage:
+    python benchmarks/bench_whatsapp_incoming.py [--requests 50] [--latency 0.5]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_whatsapp.db")
+# Answer each webhook inline instead of after a quiet window
+os.environ["WHATSAPP_DEBOUNCE_SECONDS"] = "0"
+
+import openai  # noqa: E402
+
+import database  # noqa: E402
+import models  # noqa: E402
+from routes import whatsapp as whatsapp_routes  # noqa: E402
+from schemas.chat import ChatRequest  # noqa: E402
+from schemas.whatsapp import WhatsAppIncomingMessage  # noqa: E402
+from services import chat_service as chat_module  # noqa: E402
+from services.answer_cache import answer_cache  # noqa: E402
+from services.llm_scheduler import llm_scheduler  # noqa: E402
+from services.prompt_cache import prompt_cache  # noqa: E402
+from services.whatsapp_service import whatsapp_service  # noqa: E402
+
+SESSION_ID = "restaurant_bench"
+
+
+def _fake_completion():
+    message = types.SimpleNamespace(content="Simulated answer")
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=message)])
+
+
+def install_fake_openai(latency: float):
+    """Replace the sync and async OpenAI calls with a fixed simulated latency."""
+
+    def create(**kwargs):
+        time.sleep(latency)
+        return _fake_completion()
+
+    async def acreate(**kwargs):
+        await asyncio.sleep(latency)
+        return _fake_completion()
+
+    openai.chat.completions.create = create
+    async_client = types.SimpleNamespace(
+        chat=types.SimpleNamespace(completions=types.SimpleNamespace(create=acreate))
+    )
+    chat_module._async_openai_client = async_client
+
+
+def seed_database():
+    models.Base.metadata.create_all(bind=database.engine)
+    db = database.SessionLocal()
+    try:
+        if not db.query(models.Restaurant).filter_by(restaurant_id="bench").first():
+            db.add(models.Restaurant(
+                restaurant_id="bench",
+                password="x",
+                data={"name": "Bench Bistro", "menu": [
+                    {"dish": f"Dish {i}", "price": "$10", "ingredients": ["tomato"], "description": "Tasty"}
+                    for i in range(50)
+                ]},
+                whatsapp_session_id=SESSION_ID,
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def legacy_handler(message: WhatsAppIncomingMessage):
+    """The pre-async webhook: blocking DB and OpenAI calls on the event loop."""
+    db = database.SessionLocal()
+    try:
+        restaurant_id = whatsapp_routes.store_incoming_message(message, db)
+        client_id = whatsapp_service.generate_client_id_from_phone(message.from_number)
+        chat_module.chat_service(ChatRequest(
+            restaurant_id=restaurant_id, client_id=client_id, message=message.message
+        ), db)
+    finally:
+        db.close()
+
+
+async def async_handler(message: WhatsAppIncomingMessage):
+    db = database.SessionLocal()
+    try:
+        await whatsapp_routes.receive_whatsapp_message(message, _NoopBackgroundTasks(), db)
+    finally:
+        db.close()
+
+
+class _NoopBackgroundTasks:
+    def add_task(self, *args, **kwargs):
+        pass
+
+
+async def run(handler, requests: int):
+    """Fire `requests` webhooks concurrently and measure throughput and loop lag."""
+    max_lag = 0.0
+    stop = False
+
+    async def heartbeat():
+        nonlocal max_lag
+        while not stop:
+            tick = time.perf_counter()
+            await asyncio.sleep(0.01)
+            max_lag = max(max_lag, time.perf_counter() - tick - 0.01)
+
+    answer_cache.invalidate("bench")
+    prompt_cache.invalidate("bench")
+    monitor = asyncio.create_task(heartbeat())
+    messages = [
+        WhatsAppIncomingMessage(from_number=f"+1555000{i:04d}", message=f"Do you have vegan dishes for table {i}?",
+                                session_id=SESSION_ID)
+        for i in range(requests)
+    ]
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(m) for m in messages))
+    elapsed = time.perf_counter() - start
+    stop = True
+    await monitor
+    return elapsed, max_lag
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.5, help="Simulated OpenAI latency in seconds")
+    args = parser.parse_args()
+
+    install_fake_openai(args.latency)
+    seed_database()
+    # Measure the event loop, not the per-restaurant concurrency cap
+    llm_scheduler.max_concurrency = max(llm_scheduler.max_concurrency, args.requests)
+    llm_scheduler.max_per_restaurant = max(llm_scheduler.max_per_restaurant, args.requests)
+    llm_scheduler.max_queue_depth = max(llm_scheduler.max_queue_depth, args.requests)
+
+    print(f"📊 {args.requests} concurrent webhooks, simulated OpenAI latency {args.latency}s")
+    for label, handler in (("before (sync chat_service)", legacy_handler), ("after (chat_service_async)", async_handler)):
+        elapsed, max_lag = asyncio.run(run(handler, args.requests))
+        print(f"   {label:<28} {elapsed:7.2f}s total  {args.requests / elapsed:7.1f} req/s  max loop lag {max_lag * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# embedding_cache.py
+
+"""
+Content-hash cache for OpenAI embeddings.
+Embeddings are keyed by (model, sha256 of the text), kept in an in-memory LRU
+and persisted in a local SQLite file, so byte-identical text is never sent
+to the embeddings API twice, even across restarts.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "10000"))
+# Empty string disables the on-disk tier
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+def _to_blob(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _from_blob(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: LRU in memory, then SQLite on disk.
+    Vectors are stored as float32, which halves their size and is far below
+    the precision that cosine similarity search needs.
+    """
+
+    def __init__(self, path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path or None
+        self.max_entries = max_entries
+        self._memory: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        # Caller holds self._lock
+        if self.path and self._db is None:
+            try:
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " model TEXT NOT NULL, text_hash TEXT NOT NULL, vector BLOB NOT NULL,"
+                    " created_at REAL NOT NULL, PRIMARY KEY (model, text_hash))"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Embedding disk cache disabled ({self.path}): {e}")
+                self.path = None
+                self._db = None
+        return self._db
+
+    def _remember(self, key: Tuple[str, str], blob: bytes) -> None:
+        # Caller holds self._lock
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = blob
+        self._memory_bytes += len(blob)
+        while len(self._memory) > self.max_entries:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = (model, text_hash(text))
+        with self._lock:
+            blob = self._memory.get(key)
+            if blob is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return _from_blob(blob)
+
+            db = self._connection()
+            if db is not None:
+                row = db.execute(
+                    "SELECT vector FROM embeddings WHERE model = ? AND text_hash = ?", key
+                ).fetchone()
+                if row is not None:
+                    self._remember(key, row[0])
+                    self.disk_hits += 1
+                    return _from_blob(row[0])
+
+            self.misses += 1
+            return None
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        key = (model, text_hash(text))
+        blob = _to_blob(vector)
+        with self._lock:
+            self._remember(key, blob)
+            db = self._connection()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, created_at) VALUES (?, ?, ?, ?)",
+                        (model, key[1], blob, time.time())
+                    )
+                    db.commit()
+                except sqlite3.Error as e:
+                    print(f"⚠️ Failed to persist embedding: {e}")
+
+    def get_or_create(self, model: str, text: str, create: Callable[[str], List[float]]) -> List[float]:
+        """Cached embedding of text, calling create(text) only on a miss."""
+        vector = self.get(model, text)
+        if vector is None:
+            vector = create(text)
+            self.put(model, text, vector)
+        return vector
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM embeddings")
+                db.commit()
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_bytes = os.path.getsize(self.path) if self.path and os.path.exists(self.path) else 0
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_path": self.path,
+                "disk_bytes": disk_bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Global instance used by pinecone_utils
+embedding_cache = EmbeddingCache()
@@ -17,7 +17,10 @@ from contextlib import asynccontextmanager
 
 from database import engine
 import models
-from routes import auth, restaurant, chat, clients, chats, whatsapp
+from routes import auth, restaurant, chat, clients, chats, whatsapp, metrics
+from pinecone_utils import flush_vector_store, warm_up_clients
+from services.debouncer import whatsapp_debouncer
+from services.ingestion_queue import ingestion_worker
 
 # Load environment variables
 load_dotenv()
@@ -160,6 +163,11 @@ async def lifespan(app: FastAPI):
     # Startup
     print("🔄 FastAPI starting up...")
     
+    # Connect to the vector store in the background: the worker serves
+    # requests right away and the first vector call waits only if needed
+    threading.Thread(target=warm_up_clients, daemon=True).start()
+    ingestion_worker.start()
+    
     # Start WhatsApp service
     start_whatsapp_service()
     
@@ -175,6 +183,9 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     print("🔄 FastAPI shutting down...")
+    await whatsapp_debouncer.flush_all()
+    ingestion_worker.stop()
+    flush_vector_store()
     stop_whatsapp_service()
     print("✅ FastAPI shutdown complete")
 
@@ -205,6 +216,7 @@ app.include_router(chat.router)  # No prefix - handles /chat, /client/create-or-
 app.include_router(clients.router)  # New client management router
 app.include_router(chats.router, prefix="/chat")  # Prefix for chat management - handles /chat/logs/*, /chat/
 app.include_router(whatsapp.router)  # WhatsApp integration routes
+app.include_router(metrics.router)  # Chat pipeline metrics - handles /metrics/*
 
 # Health check endpoints
 @app.get("/")
@@ -0,0 +1,169 @@
+"""
+Migration Script for Per-Restaurant Vector Namespaces
+Moves vectors written to the shared default namespace into the namespaces
+pinecone_utils now reads from: restaurant chunks into "restaurant-<id>"
+(ids, values and metadata kept, so restaurant_index_state stays valid), and
+client preference vectors into "client-preferences". Client vectors are
+rebuilt from Client.preferences rather than copied, since older ones carry
+no "text" metadata for rag_retrieval to read. Legacy whole-restaurant
+vectors (from before chunking) are deleted, and owners that were never
+chunk-indexed are queued for a full reindex by the ingestion worker.
+
+Usage:
+    python migrate_vector_namespaces.py [--batch-size 100] [--dry-run]
+"""
+
+import argparse
+import sys
+import uuid
+from collections import defaultdict
+
+from dotenv import load_dotenv
+
+# Load environment variables before database.py / pinecone_utils read them
+load_dotenv()
+
+from database import SessionLocal  # noqa: E402
+import models  # noqa: E402
+from pinecone_utils import (  # noqa: E402
+    CLIENT_PREFERENCES_NAMESPACE,
+    _field,
+    client_preferences_text,
+    delete_vectors,
+    get_index,
+    insert_many_client_preferences,
+    restaurant_namespace,
+    upsert_vectors,
+)
+from services.ingestion_queue import RESTAURANT, ingestion_worker  # noqa: E402
+
+
+def target_namespace(vector_id: str, metadata: dict):
+    """Namespace a default-namespace vector belongs in, or None for legacy vectors."""
+    if vector_id.startswith("client_"):
+        return CLIENT_PREFERENCES_NAMESPACE
+    if metadata.get("restaurant_id"):
+        return restaurant_namespace(metadata["restaurant_id"])
+    return None
+
+
+def client_preferences(client_ids: list) -> dict:
+    """Current preferences of the given clients that still exist and have preference text."""
+    # Keyed by the id as written in the vector id, whatever its spelling
+    ids = {}
+    for client_id in client_ids:
+        try:
+            ids[uuid.UUID(client_id)] = client_id
+        except ValueError:
+            continue
+    if not ids:
+        return {}
+    db = SessionLocal()
+    try:
+        clients = db.query(models.Client).filter(models.Client.id.in_(list(ids))).all()
+        return {
+            ids[client.id]: client.preferences for client in clients
+            if client_preferences_text(client.preferences)
+        }
+    finally:
+        db.close()
+
+
+def migrate_vectors(batch_size: int = 100, dry_run: bool = False) -> dict:
+    """Move default-namespace vectors into their namespaces, one fetch/upsert/delete per batch."""
+    counts = {"restaurant_vectors": 0, "client_vectors": 0, "legacy_deleted": 0, "failed": 0}
+    index = get_index()
+
+    # Snapshot the ids first so deleting moved vectors cannot disturb paging
+    ids = [vector_id for prefix in ("restaurant_", "client_")
+           for page in index.list(prefix=prefix, namespace="") for vector_id in page]
+    print(f"🔍 Found {len(ids)} vectors in the default namespace")
+
+    for start in range(0, len(ids), batch_size):
+        batch = ids[start:start + batch_size]
+        try:
+            fetched = _field(index.fetch(ids=batch, namespace=""), "vectors") or {}
+            moves = defaultdict(list)
+            client_ids = []
+            legacy = []
+            for vector_id, vector in fetched.items():
+                metadata = dict(_field(vector, "metadata") or {})
+                namespace = target_namespace(vector_id, metadata)
+                if namespace is None:
+                    legacy.append(vector_id)
+                elif namespace == CLIENT_PREFERENCES_NAMESPACE:
+                    client_ids.append(vector_id[len("client_"):])
+                else:
+                    counts["restaurant_vectors"] += 1
+                    moves[namespace].append({"id": vector_id, "values": list(_field(vector, "values")), "metadata": metadata})
+
+            # Re-embed client preferences so the new vectors carry their text;
+            # vectors of deleted clients (or without preferences) are just dropped
+            preferences = client_preferences(client_ids)
+            counts["client_vectors"] += len(preferences)
+            legacy += [f"client_{client_id}" for client_id in client_ids if client_id not in preferences]
+            counts["legacy_deleted"] += len(legacy)
+
+            if not dry_run:
+                for namespace, vectors in moves.items():
+                    upsert_vectors(vectors, namespace=namespace)
+                if preferences:
+                    insert_many_client_preferences(preferences)
+                # Only delete once every copy is written
+                delete_vectors([v["id"] for vectors in moves.values() for v in vectors]
+                               + [f"client_{client_id}" for client_id in preferences] + legacy)
+        except Exception as e:
+            print(f"❌ Failed to migrate batch starting at {batch[0]}: {e}")
+            counts["failed"] += len(batch)
+        print(f"📦 Batch {start // batch_size + 1}: {counts}")
+    return counts
+
+
+def queue_unindexed_restaurants(dry_run: bool = False) -> int:
+    """Queue a full reindex for owners without chunk index state (their old vectors were legacy)."""
+    db = SessionLocal()
+    try:
+        restaurant_ids = [
+            restaurant_id for (restaurant_id,) in db.query(models.Restaurant.restaurant_id)
+            .outerjoin(models.RestaurantIndexState,
+                       models.RestaurantIndexState.restaurant_id == models.Restaurant.restaurant_id)
+            .filter(models.Restaurant.role == "owner", models.RestaurantIndexState.restaurant_id.is_(None))
+        ]
+        if not dry_run:
+            for restaurant_id in restaurant_ids:
+                ingestion_worker.enqueue(db, RESTAURANT, restaurant_id)
+            db.commit()
+        return len(restaurant_ids)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="report what would move without writing")
+    args = parser.parse_args()
+
+    print(f"🔧 Moving vectors into per-restaurant namespaces{' [dry run]' if args.dry_run else ''}...")
+    counts = migrate_vectors(args.batch_size, args.dry_run)
+    queued = queue_unindexed_restaurants(args.dry_run)
+
+    print(f"\n📊 Migration Summary:")
+    print(f"   Restaurant vectors moved: {counts['restaurant_vectors']}")
+    print(f"   Client vectors rebuilt: {counts['client_vectors']}")
+    print(f"   Legacy vectors deleted: {counts['legacy_deleted']}")
+    print(f"   Restaurants queued for reindex: {queued}")
+    print(f"   Failed: {counts['failed']}")
+    return counts["failed"] == 0
+
+
+if __name__ == "__main__":
+    try:
+        success = main()
+        sys.exit(0 if success else 1)
+    except KeyboardInterrupt:
+        print("\n⚠️ Migration interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Unexpected error during migration: {e}")
+        sys.exit(1)
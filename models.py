@@ -1,6 +1,6 @@
 # models.py
 
-from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text, Boolean
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON, Text, Boolean, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -58,3 +58,25 @@ class ClientPhoneMapping(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+# Vector Ingestion Job Table (pending vector store upserts, see services/ingestion_queue.py)
+class VectorIngestionJob(Base):
+    __tablename__ = "vector_ingestion_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    entity_type = Column(String, nullable=False)  # 'restaurant' or 'client'
+    entity_id = Column(String, nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending", index=True)  # 'pending', 'processing', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)  # lease start/heartbeat while 'processing'
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Restaurant Index State Table (chunk ids currently in the vector store, see services/vector_indexer.py)
+class RestaurantIndexState(Base):
+    __tablename__ = "restaurant_index_state"
+
+    restaurant_id = Column(String, primary_key=True)
+    chunk_ids = Column(JSON, nullable=False)  # list of vector ids
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,10 +1,16 @@
 # pinecone_utils.py
 
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 from openai import OpenAI
-from pinecone import Pinecone
+
+from embedding_cache import embedding_cache
+from vector_store import create_vector_store
 
 # Load environment variables
 load_dotenv()
@@ -14,68 +20,270 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 PINECONE_INDEX = os.getenv("PINECONE_INDEX")
 
-# Initialize OpenAI client (NEW SYNTAX)
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Clients are created on first use (or by warm_up_clients at startup), so
+# importing this module never touches the network
+_openai_client = None
+_vector_index = None
+_clients_lock = threading.Lock()
+# Side lookups (client preferences) overlapped with the main vector query
+_lookup_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="vector-lookup")
+
+def _pinecone_index():
+    from pinecone import Pinecone
+    return Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX)
+
+def get_openai_client():
+    """Return the shared OpenAI client, creating it on first use."""
+    global _openai_client
+    if _openai_client is None:
+        with _clients_lock:
+            if _openai_client is None:
+                _openai_client = OpenAI(api_key=OPENAI_API_KEY)
+    return _openai_client
+
+def get_index():
+    """Return the shared vector store (VECTOR_STORE_BACKEND=pinecone|local), creating it on first use."""
+    global _vector_index
+    if _vector_index is None:
+        with _clients_lock:
+            if _vector_index is None:
+                _vector_index = create_vector_store(_pinecone_index)
+    return _vector_index
+
+def warm_up_clients():
+    """Create the clients ahead of the first request; failures are retried on first use."""
+    start = time.perf_counter()
+    try:
+        get_openai_client()
+        get_index()
+        print(f"✅ Vector store and OpenAI clients ready in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Vector store warmup failed, will retry on first use: {e}")
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(PINECONE_INDEX)
+def flush_vector_store():
+    """Persist buffered local vector store writes (on shutdown)."""
+    if _vector_index is not None:
+        _vector_index.flush()
+
+def vector_store_stats():
+    if _vector_index is None:
+        return {"initialized": False}
+    return {"initialized": True, **_vector_index.stats()}
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+# Inputs per embeddings request and vectors per Pinecone upsert request
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+PINECONE_UPSERT_BATCH_SIZE = int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", "100"))
+METADATA_TEXT_CHARS = 1000  # chunk text kept in metadata for retrieval
+
+# Each restaurant's chunks live in their own namespace, so a query only
+# searches that restaurant's vectors; client preferences share one namespace
+CLIENT_PREFERENCES_NAMESPACE = "client-preferences"
+
+def restaurant_namespace(restaurant_id):
+    return f"restaurant-{restaurant_id}"
 
 # Create embedding with new OpenAI v1.x SDK
-def create_embedding(text):
-    response = client.embeddings.create(
-        model="text-embedding-ada-002",
+def _request_embedding(text):
+    response = get_openai_client().embeddings.create(
+        model=EMBEDDING_MODEL,
         input=text
     )
     return response.data[0].embedding
 
+# Identical text (same model) is embedded once and then served from the cache
+def create_embedding(text):
+    return embedding_cache.get_or_create(EMBEDDING_MODEL, text, _request_embedding)
+
+# Embed many texts with as few API calls as possible; cached texts are skipped
+def create_embeddings(texts):
+    embeddings = [embedding_cache.get(EMBEDDING_MODEL, text) for text in texts]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+    for start in range(0, len(missing), EMBEDDING_BATCH_SIZE):
+        batch = missing[start:start + EMBEDDING_BATCH_SIZE]
+        response = get_openai_client().embeddings.create(
+            model=EMBEDDING_MODEL,
+            input=[texts[i] for i in batch]
+        )
+        # Results come back in input order (each carries its index)
+        for data in sorted(response.data, key=lambda d: d.index):
+            i = batch[data.index]
+            embeddings[i] = data.embedding
+            embedding_cache.put(EMBEDDING_MODEL, texts[i], data.embedding)
+
+    return embeddings
+
+def _chunk_id(restaurant_id, kind, text):
+    # Content-hash ids: unchanged chunks keep their id across re-indexing
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    return f"restaurant_{restaurant_id}_{kind}_{digest}"
+
+# Split restaurant data into one chunk per menu item and per FAQ entry, plus a profile chunk
+def restaurant_chunks(restaurant_id, content_dict):
+    chunks = []
+
+    profile_text = "\n".join(part for part in [
+        content_dict.get("name", ""),
+        content_dict.get("story", "") or content_dict.get("restaurant_story", ""),
+        content_dict.get("opening_hours", "") or "",
+        content_dict.get("contact_info", "") or "",
+    ] if part)
+    if profile_text:
+        chunks.append((_chunk_id(restaurant_id, "profile", profile_text), profile_text, {
+            "restaurant_id": restaurant_id,
+            "type": "profile",
+        }))
+
+    for item in content_dict.get("menu", []) or []:
+        name = item.get("name") or item.get("dish", "")
+        text = "\n".join(part for part in [
+            name,
+            item.get("description", ""),
+            "Ingredients: " + ", ".join(item.get("ingredients") or []),
+            "Allergens: " + ", ".join(item.get("allergens") or []),
+            f"Price: {item.get('price', '')}",
+        ] if part)
+        chunks.append((_chunk_id(restaurant_id, "menu", text), text, {
+            "restaurant_id": restaurant_id,
+            "type": "menu",
+            "name": name,
+        }))
+
+    for faq in content_dict.get("faq", []) or []:
+        text = faq.get("question", "") + "\n" + faq.get("answer", "")
+        chunks.append((_chunk_id(restaurant_id, "faq", text), text, {
+            "restaurant_id": restaurant_id,
+            "type": "faq",
+            "question": faq.get("question", ""),
+        }))
+
+    return chunks
+
+def upsert_vectors(vectors, namespace=""):
+    for start in range(0, len(vectors), PINECONE_UPSERT_BATCH_SIZE):
+        get_index().upsert(vectors=vectors[start:start + PINECONE_UPSERT_BATCH_SIZE], namespace=namespace)
+
+# Embed and upsert (id, text, metadata) chunks
+def upsert_chunks(chunks, namespace=""):
+    embeddings = create_embeddings([text for _, text, _ in chunks])
+    upsert_vectors([
+        {
+            "id": chunk_id,
+            "values": embedding,
+            "metadata": {**metadata, "text": text[:METADATA_TEXT_CHARS]},
+        }
+        for (chunk_id, text, metadata), embedding in zip(chunks, embeddings)
+    ], namespace=namespace)
+
+def delete_vectors(ids, namespace=""):
+    ids = list(ids)
+    for start in range(0, len(ids), PINECONE_UPSERT_BATCH_SIZE):
+        get_index().delete(ids=ids[start:start + PINECONE_UPSERT_BATCH_SIZE], namespace=namespace)
+
+# Drop every vector of a restaurant: its namespace plus anything it still has
+# in the shared default namespace from before namespaces were used
+def delete_restaurant_vectors(restaurant_id):
+    try:
+        get_index().delete(delete_all=True, namespace=restaurant_namespace(restaurant_id))
+    except Exception as e:
+        # Pinecone answers 404 for a namespace that was never written; anything
+        # else must fail the caller so the deletion is retried
+        if getattr(e, "status", None) != 404:
+            raise
+    _delete_legacy_restaurant_vectors(restaurant_id)
+
+# Vectors a restaurant still has in the shared default namespace from before
+# namespaces were used (including the old single whole-restaurant vector)
+def _delete_legacy_restaurant_vectors(restaurant_id):
+    try:
+        get_index().delete(filter={"restaurant_id": restaurant_id})
+    except Exception as e:
+        # Serverless indexes do not support deleting by metadata filter
+        print(f"⚠️ Could not delete legacy vectors by filter of restaurant {restaurant_id}: {e}")
+    delete_vectors([f"restaurant_{restaurant_id}"])
+
 # Insert restaurant data into Pinecone
 def insert_restaurant_data(restaurant_id, content_dict):
-    content_text = "\n".join([
-        content_dict.get("name", ""),
-        content_dict.get("story", ""),
-        "\n".join([
-            item.get("dish", "") + " " + item.get("description", "")
-            for item in content_dict.get("menu", [])
-        ]),
-        "\n".join([
-            faq.get("question", "") + " " + faq.get("answer", "")
-            for faq in content_dict.get("faq", [])
-        ])
-    ])
-
-    embedding = create_embedding(content_text)
-
-    index.upsert([
-        (f"restaurant_{restaurant_id}", embedding)
-    ])
+    chunks = restaurant_chunks(restaurant_id, content_dict)
+    namespace = restaurant_namespace(restaurant_id)
+
+    # Upsert first and only then drop vectors that are no longer current, so
+    # retrieval never sees an empty namespace while the restaurant is rebuilt
+    if chunks:
+        upsert_chunks(chunks, namespace=namespace)
+    current = {chunk_id for chunk_id, _, _ in chunks}
+    try:
+        stale = [vector_id for page in get_index().list(prefix="", namespace=namespace)
+                 for vector_id in page if vector_id not in current]
+    except Exception as e:
+        print(f"⚠️ Could not list vectors of restaurant {restaurant_id}, stale chunks are kept: {e}")
+        stale = []
+    if stale:
+        delete_vectors(stale, namespace=namespace)
+    _delete_legacy_restaurant_vectors(restaurant_id)
+
+    print(f"✅ Indexed {len(chunks)} chunks for restaurant {restaurant_id} ({len(stale)} stale removed)")
+    return len(chunks)
 
 # Insert client preferences into Pinecone
 def insert_client_preferences(client_id, preferences_dict):
-    preferences_text = "\n".join([
-        f"{key}: {value}" for key, value in preferences_dict.items()
-    ])
-
-    embedding = create_embedding(preferences_text)
+    insert_many_client_preferences({client_id: preferences_dict})
 
-    index.upsert([
-        (f"client_{client_id}", embedding)
-    ])
+# Client.preferences also carries conversation settings that say nothing
+# about the customer's tastes and must not end up in prompts
+NON_PREFERENCE_KEYS = {"ai_enabled"}
 
-# Query Pinecone for combined search
-def query_pinecone(restaurant_id, client_id, user_message):
-    query_embedding = create_embedding(user_message)
+# Text embedded (and shown to the model) for a client's preferences
+def client_preferences_text(preferences):
+    return "\n".join(
+        f"{key}: {value}" for key, value in (preferences or {}).items()
+        if key not in NON_PREFERENCE_KEYS
+    )
 
-    namespace_ids = [
-        f"restaurant_{restaurant_id}",
-        f"client_{client_id}"
+# Insert several clients' preferences with one embeddings request and batched upserts
+def insert_many_client_preferences(preferences_by_client):
+    texts = {
+        client_id: client_preferences_text(preferences)
+        for client_id, preferences in preferences_by_client.items()
+    }
+    # Clients left without any preference text lose their stale vector
+    cleared = [f"client_{client_id}" for client_id, text in texts.items() if not text]
+    if cleared:
+        delete_vectors(cleared, namespace=CLIENT_PREFERENCES_NAMESPACE)
+    chunks = [
+        (f"client_{client_id}", text, {"client_id": str(client_id), "type": "client_preferences"})
+        for client_id, text in texts.items() if text
     ]
+    if chunks:
+        upsert_chunks(chunks, namespace=CLIENT_PREFERENCES_NAMESPACE)
 
+def _field(obj, name):
+    # Pinecone SDK responses are objects, the local store returns dicts
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+# Query the restaurant's namespace for its most relevant chunks; the client's
+# preferences vector is fetched by id while the message is being embedded
+def query_pinecone(restaurant_id, client_id, user_message, top_k=5):
+    index = get_index()
+    client_vector_id = f"client_{client_id}"
+    preferences = _lookup_executor.submit(index.fetch, ids=[client_vector_id], namespace=CLIENT_PREFERENCES_NAMESPACE)
+
+    query_embedding = create_embedding(user_message)
     results = index.query(
         vector=query_embedding,
-        top_k=3,
-        include_metadata=False,
-        filter={"id": {"$in": namespace_ids}}
+        top_k=top_k,
+        include_metadata=True,
+        namespace=restaurant_namespace(restaurant_id)
     )
+    matches = list(_field(results, "matches") or [])
+
+    try:
+        fetched = (_field(preferences.result(), "vectors") or {}).get(client_vector_id)
+    except Exception as e:
+        print(f"⚠️ Could not fetch client preferences: {e}")
+        fetched = None
+    if fetched is not None:
+        matches.append({"id": client_vector_id, "score": None, "metadata": _field(fetched, "metadata") or {}})
 
-    return results
+    return {"matches": matches, "namespace": restaurant_namespace(restaurant_id)}
@@ -7,7 +7,9 @@ import uuid
 from database import get_db
 import models
 from schemas.chat import ChatMessageCreate, ChatMessageResponse
-from services.client_service import get_or_create_client
+from services.conversation_context import ensure_client, load_conversation_context
+from services.rag_retrieval import rag_retriever
+from services.staff_echo import staff_echo
 
 router = APIRouter(tags=["chat-management"])
 
@@ -26,10 +28,15 @@ def create_chat_message(
     print(f"🏪 Restaurant ID: {message_data.restaurant_id}")
     print(f"👤 Client ID: {message_data.client_id}")
     
-    # Verify restaurant exists
-    restaurant = db.query(models.Restaurant).filter(
-        models.Restaurant.restaurant_id == message_data.restaurant_id
-    ).first()
+    # In RAG mode, vector retrieval for the AI answer runs while the context loads
+    retrieval = None
+    if message_data.sender_type == "client":
+        retrieval = rag_retriever.start(message_data.restaurant_id, message_data.client_id, message_data.message)
+
+    # Load restaurant, client and recent staff messages in one round trip;
+    # the same context is handed to chat_service below instead of re-querying
+    conversation = load_conversation_context(db, message_data.restaurant_id, message_data.client_id)
+    restaurant = conversation.restaurant
 
     if not restaurant:
         print(f"❌ Restaurant not found: {message_data.restaurant_id}")
@@ -38,12 +45,12 @@ def create_chat_message(
     print(f"✅ Restaurant found: {restaurant.restaurant_id}")
 
     # Check if client exists
-    client = get_or_create_client(db, message_data.client_id, message_data.restaurant_id)
-    print(f"✅ Ensured client exists: {client.id}")
+    ensure_client(db, conversation)
+    print(f"✅ Ensured client exists: {conversation.client_id}")
 
     # Verify client belongs to the restaurant
-    if client.restaurant_id != message_data.restaurant_id:
-        print(f"❌ Client {client.id} does not belong to restaurant {message_data.restaurant_id}")
+    if conversation.client_restaurant_id != message_data.restaurant_id:
+        print(f"❌ Client {conversation.client_id} does not belong to restaurant {message_data.restaurant_id}")
         raise HTTPException(status_code=403, detail="Client does not belong to this restaurant")
 
     # Create new chat message
@@ -58,6 +65,8 @@ def create_chat_message(
     db.add(new_message)
     db.commit()
     db.refresh(new_message)
+    if message_data.sender_type == "restaurant":
+        staff_echo.record(message_data.restaurant_id, message_data.client_id, message_data.message)
     
     print(f"✅ STORED MESSAGE IN DATABASE:")
     print(f"   - ID: {new_message.id}")
@@ -114,7 +123,7 @@ def create_chat_message(
             
             # Import and call chat_service for AI response
             from services.chat_service import chat_service
-            ai_result = chat_service(chat_request, db)
+            ai_result = chat_service(chat_request, db, conversation, retrieval)
             ai_response = ai_result.answer
             
             if ai_response:
@@ -4,6 +4,7 @@ Chat management routes and endpoints.
 
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import uuid
 from sqlalchemy.sql import func, desc
@@ -11,8 +12,11 @@ from database import get_db
 import models
 from schemas.chat import ChatMessageCreate, ChatMessageResponse
 from auth import get_current_restaurant
-from schemas.chat import ToggleAIRequest
-from services.chat_service import get_or_create_client
+from schemas.chat import ChatRequest, ToggleAIRequest
+from services.chat_service import chat_service_stream, format_sse, get_or_create_client
+from services.conversation_context import ensure_client, load_conversation_context
+from services.rag_retrieval import rag_retriever
+from services.staff_echo import staff_echo
 
 
 router = APIRouter(tags=["chat-management"])
@@ -32,10 +36,15 @@ def create_chat_message(
     print(f"🏪 Restaurant ID: {message_data.restaurant_id}")
     print(f"👤 Client ID: {message_data.client_id}")
     
-    # Verify restaurant exists
-    restaurant = db.query(models.Restaurant).filter(
-        models.Restaurant.restaurant_id == message_data.restaurant_id
-    ).first()
+    # In RAG mode, vector retrieval for the AI answer runs while the context loads
+    retrieval = None
+    if message_data.sender_type == "client":
+        retrieval = rag_retriever.start(message_data.restaurant_id, message_data.client_id, message_data.message)
+
+    # Load restaurant, client and recent staff messages in one round trip;
+    # the same context is handed to chat_service below instead of re-querying
+    conversation = load_conversation_context(db, message_data.restaurant_id, message_data.client_id)
+    restaurant = conversation.restaurant
 
     if not restaurant:
         print(f"❌ Restaurant not found: {message_data.restaurant_id}")
@@ -44,13 +53,13 @@ def create_chat_message(
     print(f"✅ Restaurant found: {restaurant.restaurant_id}")
 
     # Check if client exists
-    client = get_or_create_client(db, message_data.client_id, message_data.restaurant_id)
-    print(f"✅ Ensured client exists: {client.id}")
+    ensure_client(db, conversation)
+    print(f"✅ Ensured client exists: {conversation.client_id}")
 
 
     # Verify client belongs to the restaurant
-    if client.restaurant_id != message_data.restaurant_id:
-        print(f"❌ Client {client.id} does not belong to restaurant {message_data.restaurant_id}")
+    if conversation.client_restaurant_id != message_data.restaurant_id:
+        print(f"❌ Client {conversation.client_id} does not belong to restaurant {message_data.restaurant_id}")
         raise HTTPException(status_code=403, detail="Client does not belong to this restaurant")
 
     # Create new chat message
@@ -65,6 +74,8 @@ def create_chat_message(
     db.add(new_message)
     db.commit()
     db.refresh(new_message)
+    if message_data.sender_type == "restaurant":
+        staff_echo.record(message_data.restaurant_id, message_data.client_id, message_data.message)
     
     print(f"✅ STORED MESSAGE IN DATABASE:")
     print(f"   - ID: {new_message.id}")
@@ -88,7 +99,7 @@ def create_chat_message(
         
         # Import and call chat_service for AI response
         from services.chat_service import chat_service
-        ai_result = chat_service(chat_request, db)
+        ai_result = chat_service(chat_request, db, conversation, retrieval)
         ai_response = ai_result.answer
         
         if ai_response:
@@ -111,6 +122,63 @@ def create_chat_message(
     return response
 
 
+@router.post("/stream")
+def stream_chat_message(
+    message_data: ChatMessageCreate,
+    db: Session = Depends(get_db)
+):
+    """
+    Store a new chat message and stream the AI answer as Server-Sent Events.
+    Same checks as POST /chat/; the AI answer is persisted once the stream ends.
+    """
+    print(f"\n🔍 ===== /chat/stream ENDPOINT CALLED =====")
+    print(f"🏷️ Sender Type: {message_data.sender_type}")
+    print(f"💬 Message: '{message_data.message}'")
+
+    # In RAG mode, vector retrieval for the AI answer runs while the context loads
+    retrieval = None
+    if message_data.sender_type == "client":
+        retrieval = rag_retriever.start(message_data.restaurant_id, message_data.client_id, message_data.message)
+
+    conversation = load_conversation_context(db, message_data.restaurant_id, message_data.client_id)
+
+    if not conversation.restaurant:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+
+    ensure_client(db, conversation)
+
+    if conversation.client_restaurant_id != message_data.restaurant_id:
+        raise HTTPException(status_code=403, detail="Client does not belong to this restaurant")
+
+    new_message = models.ChatMessage(
+        restaurant_id=message_data.restaurant_id,
+        client_id=message_data.client_id,
+        sender_type=message_data.sender_type,
+        message=message_data.message
+    )
+    db.add(new_message)
+    db.commit()
+    if message_data.sender_type == "restaurant":
+        staff_echo.record(message_data.restaurant_id, message_data.client_id, message_data.message)
+    print(f"✅ Stored {message_data.sender_type} message, starting stream")
+
+    if message_data.sender_type == "client":
+        events = chat_service_stream(ChatRequest(
+            restaurant_id=message_data.restaurant_id,
+            client_id=message_data.client_id,
+            message=message_data.message,
+            sender_type=message_data.sender_type
+        ), conversation, retrieval)
+    else:
+        events = iter([format_sse("done", {"answer": ""})])
+
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/", response_model=List[ChatMessageResponse])
 def get_chat_messages(
     restaurant_id: str,
@@ -11,6 +11,7 @@ from database import get_db
 import models
 from schemas.client import ClientCreateRequest, ClientResponse
 from services.chat_service import get_or_create_client  # Add this import
+from services.ingestion_queue import CLIENT, ingestion_worker
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
@@ -39,9 +40,11 @@ def create_client(
         client.email = client_data.email
     if client_data.preferences:
         client.preferences = client_data.preferences
+        ingestion_worker.enqueue(db, CLIENT, client.id)
     
     db.commit()
     db.refresh(client)
+    ingestion_worker.wake()
 
     return ClientResponse(
         id=client.id,
@@ -0,0 +1,52 @@
+"""
+Operational metrics for the chat pipeline (caches, token usage, model latency).
+They span every restaurant, so they are only served with the internal
+METRICS_TOKEN (X-Metrics-Token header), never to restaurant accounts.
+"""
+
+from fastapi import APIRouter, Depends
+
+from auth import require_metrics_token
+
+from embedding_cache import embedding_cache
+from pinecone_utils import vector_store_stats
+from services.answer_cache import answer_cache
+from services.debouncer import whatsapp_debouncer
+from services.fact_engine import fact_engine_stats
+from services.ingestion_queue import ingestion_worker
+from services.intent_classifier import intent_stats
+from services.llm_scheduler import llm_scheduler
+from services.menu_search import menu_search
+from services.model_router import model_router
+from services.prompt_cache import prompt_cache
+from services.rag_retrieval import rag_retriever
+from services.single_flight import llm_flights
+from services.staff_echo import staff_echo
+from services.token_budget import token_usage, tokenizer_name
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("/chat")
+def chat_metrics():
+    """Cache effectiveness and per-restaurant token usage of the chat pipeline."""
+    return {
+        "prompt_cache": prompt_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "fact_engine": fact_engine_stats(),
+        "menu_search": menu_search.stats(),
+        "vector_store": vector_store_stats(),
+        "vector_ingestion": ingestion_worker.stats(),
+        "rag_retrieval": rag_retriever.stats(),
+        "small_talk": intent_stats(),
+        "single_flight": llm_flights.stats(),
+        "model_router": model_router.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "whatsapp_debounce": whatsapp_debouncer.stats(),
+        "staff_echo": staff_echo.stats(),
+        "tokens": {
+            "tokenizer": tokenizer_name() or "chars/4 estimate",
+            "per_restaurant": token_usage.stats(),
+        },
+    }
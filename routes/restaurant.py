@@ -3,15 +3,21 @@ Restaurant-related routes and endpoints.
 """
 
 from datetime import timedelta
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from auth import get_current_restaurant, get_current_owner, ACCESS_TOKEN_EXPIRE_MINUTES
 from database import get_db
 import models
 from schemas.restaurant import RestaurantCreateRequest, RestaurantData, RestaurantUpdateRequest
+from services.chat_service import get_prompt_context, invalidate_restaurant_cache
+from services.ingestion_queue import RESTAURANT, ingestion_worker
+from services.menu_search import MENU_SEARCH_REVALIDATE_SECONDS, menu_search
+from services.prompt_cache import prompt_cache
+from services.restaurant_service import prepare_restaurant_data
+from services.vector_indexer import plan_reindex
 
 
 router = APIRouter(prefix="/restaurant", tags=["restaurant"])
@@ -36,6 +42,40 @@ def get_restaurant_info(restaurant_id: str, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/{restaurant_id}/menu/search")
+def search_menu(
+    restaurant_id: str,
+    q: Optional[str] = Query(None, description="Words to match in dish name or description"),
+    ingredient: Optional[str] = Query(None, description="Ingredient the dish must contain"),
+    exclude_allergens: List[str] = Query([], description="Allergens to exclude (repeat or comma-separate)"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """Search a restaurant's menu (public endpoint) without fetching the whole menu."""
+    # The index is part of the cached prompt context; only re-read the row
+    # (and re-hash its data) once the cached version is due for a check
+    context = prompt_cache.peek(restaurant_id, MENU_SEARCH_REVALIDATE_SECONDS)
+    if context is None:
+        restaurant = db.query(models.Restaurant).filter(
+            models.Restaurant.restaurant_id == restaurant_id
+        ).first()
+
+        if not restaurant:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        context = get_prompt_context(restaurant_id, restaurant.data or {})
+
+    allergens = [a for value in exclude_allergens for a in value.split(",")]
+    index = context.search_index
+    total, items = index.search(q, ingredient, allergens, min_price, max_price, limit)
+    return {
+        "restaurant_id": restaurant_id,
+        "total": total,
+        "items": items
+    }
+
+
 @router.get("/list")
 def list_restaurants(db: Session = Depends(get_db)):
     """List all restaurants (public endpoint)."""
@@ -61,15 +101,23 @@ def update_restaurant(
     existing_data = current_owner.data or {}
 
     # Merge old + new (shallow merge)
-    updated_data = {**existing_data, **restaurant_data.data.dict(exclude_unset=True)}
+    new_data = prepare_restaurant_data(restaurant_data.data.dict(exclude_unset=True))
+    updated_data = {**existing_data, **new_data}
     current_owner.data = updated_data
 
+    # Only changed menu/FAQ chunks are re-embedded, in the background
+    reindex = plan_reindex(db, current_owner.restaurant_id, updated_data)
+    if reindex.changed:
+        ingestion_worker.enqueue(db, RESTAURANT, current_owner.restaurant_id)
     db.commit()
     db.refresh(current_owner)
+    ingestion_worker.wake()
+    invalidate_restaurant_cache(current_owner.restaurant_id)
     
     return {
         "message": "Restaurant updated successfully",
-        "restaurant_id": current_owner.restaurant_id
+        "restaurant_id": current_owner.restaurant_id,
+        "vector_index": reindex.counts()
     }
 
 
@@ -96,14 +144,20 @@ def update_restaurant_profile(
 ):
     """Update current restaurant's profile (protected endpoint - owner only)."""
     # Update the restaurant data with new values
-    current_owner.data = restaurant_data.dict()
+    current_owner.data = prepare_restaurant_data(restaurant_data.dict())
+    reindex = plan_reindex(db, current_owner.restaurant_id, current_owner.data)
+    if reindex.changed:
+        ingestion_worker.enqueue(db, RESTAURANT, current_owner.restaurant_id)
     db.commit()
     db.refresh(current_owner)
+    ingestion_worker.wake()
+    invalidate_restaurant_cache(current_owner.restaurant_id)
     
     return {
         "message": "Restaurant profile updated successfully",
         "restaurant_id": current_owner.restaurant_id,
-        "data": current_owner.data
+        "data": current_owner.data,
+        "vector_index": reindex.counts()
     }
 
 
@@ -117,7 +171,12 @@ def delete_restaurant(
     
     # Delete the restaurant from the database
     db.delete(current_owner)
+    # Drops its vectors in the background
+    ingestion_worker.enqueue(db, RESTAURANT, restaurant_id)
     db.commit()
+    ingestion_worker.wake()
+    invalidate_restaurant_cache(restaurant_id)
+    menu_search.invalidate(restaurant_id)
     
     return {
         "message": f"Restaurant {restaurant_id} deleted successfully"
@@ -4,12 +4,15 @@ Handles incoming messages, outgoing messages, and session management.
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from typing import List, Optional
 import uuid
 import httpx
 
 from auth import get_current_restaurant
-from database import get_db
+from database import SessionLocal, get_db
 import models
 from schemas.whatsapp import (
     WhatsAppIncomingMessage,
@@ -21,11 +24,79 @@ from schemas.whatsapp import (
 )
 from schemas.chat import ChatRequest, ChatResponse
 from services.whatsapp_service import whatsapp_service
-from services.chat_service import chat_service
+from services.chat_service import chat_service_async
+from services.debouncer import whatsapp_debouncer
+from services.staff_echo import staff_echo
 
 router = APIRouter(prefix="/whatsapp", tags=["whatsapp"])
 
 
+def store_incoming_message(message: WhatsAppIncomingMessage, db: Session) -> Optional[str]:
+    """
+    Persist an incoming WhatsApp message and its phone mapping.
+    Synchronous on purpose: async callers run it via run_in_threadpool.
+    Returns the restaurant_id, or None if no restaurant owns the session.
+    """
+    # Find restaurant by session ID
+    restaurant = whatsapp_service.find_restaurant_by_session(message.session_id, db)
+    if not restaurant:
+        print(f"❌ No restaurant found for session: {message.session_id}")
+        return None
+    
+    print(f"✅ Restaurant found: {restaurant.restaurant_id}")
+    
+    # Generate consistent client ID from phone number
+    client_id = whatsapp_service.generate_client_id_from_phone(message.from_number)
+    print(f"👤 Generated client ID: {client_id}")
+    
+    # ✅ SAVE CUSTOMER MESSAGE TO DATABASE FIRST
+    print(f"💾 Saving customer WhatsApp message to database...")
+    customer_message = models.ChatMessage(
+        restaurant_id=restaurant.restaurant_id,
+        client_id=uuid.UUID(client_id),
+        sender_type="client",
+        message=message.message
+    )
+    db.add(customer_message)
+    db.commit()
+    db.refresh(customer_message)
+    print(f"✅ Customer message saved to ChatMessage table with ID: {customer_message.id}")
+    
+    # ✅ STORE PHONE NUMBER MAPPING FOR FUTURE STAFF REPLIES
+    print(f"📞 Storing phone number mapping for client...")
+    try:
+        # Check if mapping already exists
+        existing_mapping = db.query(models.ClientPhoneMapping).filter(
+            models.ClientPhoneMapping.client_id == uuid.UUID(client_id),
+            models.ClientPhoneMapping.restaurant_id == restaurant.restaurant_id
+        ).first()
+        
+        if existing_mapping:
+            # Update existing mapping
+            existing_mapping.phone_number = message.from_number
+            existing_mapping.updated_at = func.now()
+            print(f"✅ Updated existing phone mapping for client {client_id}")
+        else:
+            # Create new mapping
+            phone_mapping = models.ClientPhoneMapping(
+                client_id=uuid.UUID(client_id),
+                phone_number=message.from_number,
+                restaurant_id=restaurant.restaurant_id
+            )
+            db.add(phone_mapping)
+            print(f"✅ Created new phone mapping for client {client_id}")
+        
+        db.commit()
+        print(f"📞 Phone mapping stored: {client_id} -> {message.from_number}")
+        
+    except Exception as e:
+        print(f"❌ Error storing phone mapping: {str(e)}")
+        # Don't fail the whole process if phone mapping fails
+        db.rollback()
+    
+    return restaurant.restaurant_id
+
+
 @router.post("/incoming", response_model=WhatsAppWebhookResponse)
 async def receive_whatsapp_message(
     message: WhatsAppIncomingMessage,
@@ -42,69 +113,38 @@ async def receive_whatsapp_message(
         print(f"💬 Message: '{message.message}'")
         print(f"🔗 Session ID: {message.session_id}")
         
-        # Find restaurant by session ID
-        restaurant = whatsapp_service.find_restaurant_by_session(message.session_id, db)
-        if not restaurant:
-            print(f"❌ No restaurant found for session: {message.session_id}")
+        # Blocking DB work runs in the threadpool so the event loop stays free
+        restaurant_id = await run_in_threadpool(store_incoming_message, message, db)
+        if not restaurant_id:
             return WhatsAppWebhookResponse(
                 success=False,
                 error="Restaurant not found for this session"
             )
-        
-        print(f"✅ Restaurant found: {restaurant.restaurant_id}")
-        
-        # Generate consistent client ID from phone number
         client_id = whatsapp_service.generate_client_id_from_phone(message.from_number)
-        print(f"👤 Generated client ID: {client_id}")
-        
-        # ✅ SAVE CUSTOMER MESSAGE TO DATABASE FIRST
-        print(f"💾 Saving customer WhatsApp message to database...")
-        customer_message = models.ChatMessage(
-            restaurant_id=restaurant.restaurant_id,
-            client_id=uuid.UUID(client_id),
-            sender_type="client",
-            message=message.message
-        )
-        db.add(customer_message)
-        db.commit()
-        db.refresh(customer_message)
-        print(f"✅ Customer message saved to ChatMessage table with ID: {customer_message.id}")
-        
-        # ✅ STORE PHONE NUMBER MAPPING FOR FUTURE STAFF REPLIES
-        print(f"📞 Storing phone number mapping for client...")
-        try:
-            # Check if mapping already exists
-            existing_mapping = db.query(models.ClientPhoneMapping).filter(
-                models.ClientPhoneMapping.client_id == uuid.UUID(client_id),
-                models.ClientPhoneMapping.restaurant_id == restaurant.restaurant_id
-            ).first()
-            
-            if existing_mapping:
-                # Update existing mapping
-                existing_mapping.phone_number = message.from_number
-                existing_mapping.updated_at = func.now()
-                print(f"✅ Updated existing phone mapping for client {client_id}")
+
+        if whatsapp_debouncer.enabled:
+            # The message is already persisted; the AI answers the whole burst
+            # once the customer stops typing (see answer_whatsapp_burst)
+            if staff_echo.matches(restaurant_id, client_id, message.message):
+                print(f"🚫 Message matches recent staff message - not queued for AI")
             else:
-                # Create new mapping
-                phone_mapping = models.ClientPhoneMapping(
-                    client_id=uuid.UUID(client_id),
-                    phone_number=message.from_number,
-                    restaurant_id=restaurant.restaurant_id
+                whatsapp_debouncer.submit(
+                    (restaurant_id, client_id),
+                    message.message,
+                    lambda messages: answer_whatsapp_burst(
+                        restaurant_id, client_id, message.from_number, message.session_id, messages
+                    )
                 )
-                db.add(phone_mapping)
-                print(f"✅ Created new phone mapping for client {client_id}")
-            
-            db.commit()
-            print(f"📞 Phone mapping stored: {client_id} -> {message.from_number}")
-            
-        except Exception as e:
-            print(f"❌ Error storing phone mapping: {str(e)}")
-            # Don't fail the whole process if phone mapping fails
-            db.rollback()
-        
+                print(f"⏳ Queued for AI answer after {whatsapp_debouncer.window_seconds}s of quiet")
+            print(f"===== END WHATSAPP INCOMING =====\n")
+            return WhatsAppWebhookResponse(
+                success=True,
+                message="Message received"
+            )
+
         # Create chat request (table_id=None for WhatsApp as specified)
         chat_request = ChatRequest(
-            restaurant_id=restaurant.restaurant_id,
+            restaurant_id=restaurant_id,
             client_id=uuid.UUID(client_id),
             message=message.message,
             sender_type='client'  # WhatsApp messages are always from clients
@@ -112,7 +152,7 @@ async def receive_whatsapp_message(
         
         # Process message through existing chat service
         print(f"🤖 Processing through chat service...")
-        chat_response = chat_service(chat_request, db)
+        chat_response = await chat_service_async(chat_request, db)
         
         # If AI responded, send reply back to WhatsApp
         if chat_response.answer and chat_response.answer.strip():
@@ -327,6 +367,32 @@ async def connect_restaurant_whatsapp(
         )
 
 
+async def answer_whatsapp_burst(restaurant_id: str, client_id: str, from_number: str,
+                                session_id: str, messages: List[str]):
+    """
+    Answer a debounced burst of WhatsApp messages with one chat_service call.
+    Each message was already saved by the webhook; only the AI answer is new.
+    Runs after the webhook returned, so it uses its own DB session.
+    """
+    merged = "\n".join(messages)
+    print(f"🤖 Answering {len(messages)} WhatsApp message(s) from client {client_id}")
+    db = SessionLocal()
+    try:
+        chat_response = await chat_service_async(ChatRequest(
+            restaurant_id=restaurant_id,
+            client_id=uuid.UUID(client_id),
+            message=merged,
+            sender_type='client'
+        ), db)
+    finally:
+        await run_in_threadpool(db.close)
+
+    if chat_response.answer and chat_response.answer.strip():
+        await send_whatsapp_reply(from_number, chat_response.answer, session_id)
+    else:
+        print(f"🔇 No AI response to send (empty or disabled)")
+
+
 async def send_whatsapp_reply(to_number: str, message: str, session_id: str):
     """
     Background task to send WhatsApp reply.
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class MenuItem(BaseModel):
     dish: str
@@ -21,6 +21,7 @@ class RestaurantData(BaseModel):
     opening_hours: Optional[str] = None
     contact_info: Optional[str] = None
     restaurant_story: Optional[str] = None  # Alternative field name
+    auto_replies: Optional[Dict[str, str]] = None  # Small-talk templates by intent ("" = no reply)
 
 class RestaurantCreateRequest(BaseModel):
     restaurant_id: str
@@ -46,6 +47,7 @@ class RestaurantDataPartial(BaseModel):
     opening_hours: Optional[str] = None
     contact_info: Optional[str] = None
     restaurant_story: Optional[str] = None
+    auto_replies: Optional[Dict[str, str]] = None
     whatsapp_number: Optional[str] = None  # ✅ Must be here
     
 class RestaurantUpdateRequest(BaseModel):
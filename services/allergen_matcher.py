@@ -0,0 +1,45 @@
+"""
+Allergen inference from menu ingredients.
+All known allergens are compiled into a single regex, so an item's
+ingredient list is scanned once instead of once per allergen per ingredient.
+Allergen stems match anywhere in a word, like the substring scan this
+replaced ("buttermilk" is milk, "soybean oil" is soy, "peanuts" is a peanut),
+except inside the words listed in NOT_ALLERGENS.
+"""
+
+import re
+from typing import Iterable, List
+
+KNOWN_ALLERGENS = {"milk", "peanuts", "egg", "wheat", "soy", "fish", "shellfish", "tree nuts", "sesame", "mustard"}
+
+# Words that contain an allergen stem without containing the allergen
+NOT_ALLERGENS = {"buckwheat", "eggplant", "veggie", "reggiano"}
+
+
+def _stem(allergen: str) -> str:
+    # "peanuts" also matches "peanut", "tree nuts" also matches "tree nut"
+    return allergen[:-1] if allergen.endswith("s") else allergen
+
+
+_STEM_ALLERGENS = {_stem(allergen): allergen for allergen in KNOWN_ALLERGENS}
+# Alternation is tried in order at each position: false positives first so
+# "buckwheat" is consumed before "wheat" can match inside it, then longest
+# stems first so "shellfish" wins over "fish"
+_ALLERGEN_PATTERN = re.compile(
+    "|".join(re.escape(term) for term in [
+        *sorted(NOT_ALLERGENS, key=len, reverse=True),
+        *sorted(_STEM_ALLERGENS, key=len, reverse=True),
+    ])
+)
+
+
+def infer_allergens(ingredients: Iterable[str]) -> List[str]:
+    """Allergens named in a list of ingredients, in alphabetical order."""
+    if not ingredients:
+        return []
+    # One line per ingredient with single spaces, so "tree  nuts" matches but
+    # the end of one ingredient never joins the start of the next
+    text = "\n".join(" ".join(str(ingredient).lower().split()) for ingredient in ingredients)
+    return sorted({
+        _STEM_ALLERGENS[term] for term in _ALLERGEN_PATTERN.findall(text) if term in _STEM_ALLERGENS
+    })
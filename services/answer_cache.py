@@ -0,0 +1,177 @@
+"""
+Per-restaurant answer cache in front of the OpenAI call.
+Serves a previous AI answer when a customer asks the same thing again,
+matched on normalized text and, optionally, on embedding similarity.
+"""
+
+import math
+import operator
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from pinecone_utils import create_embedding
+
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))  # per restaurant
+ANSWER_CACHE_SEMANTIC = os.getenv("ANSWER_CACHE_SEMANTIC", "false").lower() == "true"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_message(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = _NON_WORD.sub(" ", (text or "").lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _unit(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class _CachedAnswer:
+    def __init__(self, answer: str, latency: float, embedding: Optional[List[float]]):
+        self.answer = answer
+        self.latency = latency
+        self.embedding = embedding
+        self.created_at = time.monotonic()
+
+
+class _RestaurantAnswers:
+    def __init__(self, version: str):
+        self.version = version
+        self.entries: "OrderedDict[str, _CachedAnswer]" = OrderedDict()
+
+
+class AnswerCache:
+    """
+    Thread-safe, TTL- and size-bounded answer cache partitioned by restaurant.
+    A partition is wiped as soon as it is accessed with a different data
+    version, so answers never outlive the menu/FAQ they were generated from.
+    """
+
+    def __init__(self, ttl_seconds: int = ANSWER_CACHE_TTL_SECONDS,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 semantic: bool = ANSWER_CACHE_SEMANTIC,
+                 similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+                 embed_fn: Optional[Callable[[str], List[float]]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embed_fn = embed_fn
+        self._partitions: Dict[str, _RestaurantAnswers] = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.saved_latency = 0.0
+
+    def _partition(self, restaurant_id: str, version: str) -> _RestaurantAnswers:
+        partition = self._partitions.get(restaurant_id)
+        if partition is None or partition.version != version:
+            partition = _RestaurantAnswers(version)
+            self._partitions[restaurant_id] = partition
+        return partition
+
+    def _expired(self, entry: _CachedAnswer, now: float) -> bool:
+        return now - entry.created_at > self.ttl_seconds
+
+    def lookup(self, restaurant_id: str, version: str, message: str) -> Optional[str]:
+        """Return a cached answer for this message, or None on a miss."""
+        key = normalize_message(message)
+        if not key:
+            return None
+        now = time.monotonic()
+
+        with self._lock:
+            partition = self._partition(restaurant_id, version)
+            entry = partition.entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del partition.entries[key]
+                entry = None
+            if entry is not None:
+                partition.entries.move_to_end(key)
+                self.exact_hits += 1
+                self.saved_latency += entry.latency
+                return entry.answer
+            if not (self.semantic and self.embed_fn):
+                self.misses += 1
+                return None
+            candidates = [
+                (k, e) for k, e in partition.entries.items()
+                if e.embedding is not None and not self._expired(e, now)
+            ]
+
+        # Semantic lookup: the embedding call is a network round trip, keep it outside the lock
+        best_key, best_entry, best_score = None, None, 0.0
+        if candidates:
+            try:
+                query = _unit(self.embed_fn(key))
+            except Exception as e:
+                print(f"⚠️ Answer cache embedding failed: {e}")
+                query = None
+            if query is not None:
+                for candidate_key, candidate in candidates:
+                    score = sum(map(operator.mul, query, candidate.embedding))
+                    if score > best_score:
+                        best_key, best_entry, best_score = candidate_key, candidate, score
+
+        with self._lock:
+            if best_entry is not None and best_score >= self.similarity_threshold:
+                self.semantic_hits += 1
+                self.saved_latency += best_entry.latency
+                print(f"🎯 Semantic answer cache hit ({best_score:.3f}): '{key}' ~ '{best_key}'")
+                return best_entry.answer
+            self.misses += 1
+            return None
+
+    def store(self, restaurant_id: str, version: str, message: str, answer: str, latency: float) -> None:
+        """Remember an answer together with how long OpenAI took to produce it."""
+        key = normalize_message(message)
+        if not key or not answer:
+            return
+
+        embedding = None
+        if self.semantic and self.embed_fn:
+            try:
+                embedding = _unit(self.embed_fn(key))
+            except Exception as e:
+                print(f"⚠️ Answer cache embedding failed: {e}")
+
+        with self._lock:
+            partition = self._partition(restaurant_id, version)
+            partition.entries[key] = _CachedAnswer(answer, latency, embedding)
+            partition.entries.move_to_end(key)
+            while len(partition.entries) > self.max_entries:
+                partition.entries.popitem(last=False)
+
+    def invalidate(self, restaurant_id: str) -> None:
+        with self._lock:
+            self._partitions.pop(restaurant_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "restaurants": len(self._partitions),
+                "entries": sum(len(p.entries) for p in self._partitions.values()),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "saved_latency_seconds": round(self.saved_latency, 3),
+                "semantic_enabled": self.semantic,
+                "similarity_threshold": self.similarity_threshold,
+            }
+
+
+# Global instance
+answer_cache = AnswerCache(embed_fn=create_embedding)
@@ -1,13 +1,40 @@
 import openai
+import hashlib
+import json
+import time
+from typing import AsyncIterator, Optional
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import models
-from pinecone_utils import query_pinecone
+from database import SessionLocal
 from schemas.chat import ChatRequest, ChatResponse
 from schemas.restaurant import RestaurantData # Corrected import
 from fastapi import HTTPException
 from sqlalchemy.exc import IntegrityError
 # Import the fallback function from restaurant service
-from services.restaurant_service import apply_menu_fallbacks
+from services.menu_normalizer import apply_menu_fallbacks, is_normalized
+from services.prompt_cache import PromptContext, prompt_cache
+from services.conversation_context import ConversationContext, ensure_client, load_conversation_context
+from services.answer_cache import answer_cache, normalize_message
+from services.fact_engine import FactIndex, answer_from_facts
+from services.intent_classifier import classify_message
+from services.llm_scheduler import BUSY_MESSAGE, LoadShed, llm_scheduler
+from services.menu_retrieval import MenuRetriever
+from services.menu_search import menu_search
+from services.model_router import model_router
+from services.rag_retrieval import PendingRetrieval, rag_retriever
+from services.single_flight import llm_flights
+from services.staff_echo import staff_echo
+from services.token_budget import (
+    CHAT_MAX_MESSAGE_TOKENS,
+    CHAT_MAX_STORY_TOKENS,
+    CHAT_MIN_MENU_TOKENS,
+    estimate_messages_tokens,
+    estimate_tokens,
+    get_prompt_budget,
+    token_usage,
+    truncate_to_tokens,
+)
 
 system_prompt = """
 You are a helpful, friendly, and professional restaurant staff member. You assist customers via chat with questions about food, ingredients, dietary needs, reservations, opening hours, and anything related to the restaurant.
@@ -23,6 +50,12 @@ You must:
 You sound like a real person working at the restaurant, not a robot. Keep answers short, clear, and polite.
 """
 
+PROMPT_FRAME_TOKENS = 40  # template text and per-message overhead around the dynamic sections
+TECHNICAL_DIFFICULTIES_MESSAGE = "I'm experiencing technical difficulties. Please try again later."
+
+# Created lazily by get_async_openai_client()
+_async_openai_client = None
+
 def get_or_create_client(db: Session, client_id: str, restaurant_id: str):
     client = db.query(models.Client).filter_by(id=client_id).first()
     if not client:
@@ -50,37 +83,116 @@ def validate_menu_item(item):
     
     return True
 
+def format_menu_item(item):
+    """Format a single menu item as one prompt line, with defensive checks."""
+    try:
+        # Ensure all required fields exist with fallbacks
+        name = item.get('name') or item.get('dish', 'Unknown Dish')
+        description = item.get('description', 'No description available')
+        ingredients = item.get('ingredients', [])
+        allergens = item.get('allergens', [])
+        price = item.get('price', 'Price not available')
+        
+        # Format ingredients and allergens safely
+        ingredients_str = ', '.join(ingredients) if ingredients else 'Not specified'
+        allergens_str = ', '.join(allergens) if allergens else 'None listed'
+        
+        return f"{name}: {description} | Ingredients: {ingredients_str} | Allergens: {allergens_str} | Price: {price}"
+        
+    except Exception as e:
+        print(f"Warning: Error formatting menu item {item}: {e}")
+        # Add a fallback item to prevent complete failure
+        return f"Menu item (details unavailable): {str(item)[:100]}"
+
 def format_menu(menu_items):
     """Format menu items for OpenAI prompt with defensive checks."""
     if not menu_items:
         return "No menu items available."
     
-    formatted_items = []
-    for item in menu_items:
+    return "\n\n".join(format_menu_item(item) for item in menu_items)
+
+def build_prompt_context(restaurant_id: str, data: dict, version: str) -> PromptContext:
+    """Compile the restaurant info and menu sections of the prompt for one data version."""
+    menu_items = data.get("menu") or []
+    if not is_normalized(data):
+        # Stored before menus were normalized on write and not backfilled yet
+        # (see backfill_menus.py): normalize in memory for this version
         try:
-            # Ensure all required fields exist with fallbacks
-            name = item.get('name') or item.get('dish', 'Unknown Dish')
-            description = item.get('description', 'No description available')
-            ingredients = item.get('ingredients', [])
-            allergens = item.get('allergens', [])
-            price = item.get('price', 'Price not available')
-            
-            # Format ingredients and allergens safely
-            ingredients_str = ', '.join(ingredients) if ingredients else 'Not specified'
-            allergens_str = ', '.join(allergens) if allergens else 'None listed'
-            
-            formatted_item = f"{name}: {description} | Ingredients: {ingredients_str} | Allergens: {allergens_str} | Price: {price}"
-            formatted_items.append(formatted_item)
-            
+            menu_items = apply_menu_fallbacks(menu_items)
+            print(f"Applied fallbacks to {len(menu_items)} legacy menu items")
         except Exception as e:
-            print(f"Warning: Error formatting menu item {item}: {e}")
-            # Add a fallback item to prevent complete failure
-            formatted_items.append(f"Menu item (details unavailable): {str(item)[:100]}")
-    
-    return "\n\n".join(formatted_items)
+            print(f"Warning: Error applying menu fallbacks: {e}")
+    # Canonical items are used as they are; no per-item copies
+    validated_menu = [item for item in menu_items if isinstance(item, dict)]
 
-def chat_service(req: ChatRequest, db: Session) -> ChatResponse:
-    """Handle chat requests with proper error handling and data validation."""
+    restaurant_info = f"""Restaurant Info:
+- Name: {data.get("name", "Restaurant name not available")}
+- Story: {truncate_to_tokens(data.get("restaurant_story") or "No story available", CHAT_MAX_STORY_TOKENS)}
+- Opening Hours: {data.get("opening_hours", "Hours not available")}
+- Contact Info: {data.get("contact_info", "Contact info not available")}"""
+
+    formatted_items = [format_menu_item(item) for item in validated_menu]
+
+    return PromptContext(
+        restaurant_id=restaurant_id,
+        version=version,
+        menu_items=validated_menu,
+        restaurant_info=restaurant_info,
+        menu_text="\n\n".join(formatted_items) if formatted_items else "No menu items available.",
+        fact_index=FactIndex(data, validated_menu),
+        retriever=MenuRetriever(validated_menu, formatted_items),
+        search_index=menu_search.get(restaurant_id, validated_menu, version)
+    )
+
+def get_prompt_context(restaurant_id: str, data: dict) -> PromptContext:
+    """Return the compiled prompt context for a restaurant, using the versioned cache."""
+    return prompt_cache.get_or_build(restaurant_id, data, build_prompt_context)
+
+def invalidate_restaurant_cache(restaurant_id: str) -> None:
+    """Drop every cached, derived view of a restaurant after its data changed."""
+    prompt_cache.invalidate(restaurant_id)
+    answer_cache.invalidate(restaurant_id)
+
+class PreparedChat:
+    """
+    Outcome of the pre-flight phase of the chat pipeline.
+    Either carries an early response (blocked, AI disabled, error), a local
+    answer that is saved without calling OpenAI (small talk), or the OpenAI
+    messages that still need to be sent.
+    """
+
+    def __init__(self, req: ChatRequest, early_response: Optional[ChatResponse] = None,
+                 context: Optional[PromptContext] = None, messages: Optional[list] = None,
+                 truncated_message: bool = False, truncated_menu: bool = False,
+                 local_answer: Optional[str] = None, personalization: Optional[str] = None):
+        self.req = req
+        self.early_response = early_response
+        self.local_answer = local_answer
+        self.context = context
+        self.messages = messages or []
+        self.estimated_prompt_tokens = estimate_messages_tokens(self.messages)
+        self.truncated_message = truncated_message
+        self.truncated_menu = truncated_menu
+        # Hash of the client preferences rendered into the prompt (RAG mode);
+        # such answers are for this client only
+        self.personalization = personalization
+
+
+def start_retrieval(req: ChatRequest) -> Optional[PendingRetrieval]:
+    """Start vector retrieval for a customer message in RAG mode (None otherwise)."""
+    if req.sender_type == "restaurant":
+        return None
+    return rag_retriever.start(req.restaurant_id, req.client_id, req.message)
+
+
+def prepare_chat(req: ChatRequest, db: Session,
+                 conversation: Optional[ConversationContext] = None,
+                 retrieval: Optional[PendingRetrieval] = None) -> PreparedChat:
+    """
+    Run every blocking check and build the prompt; no OpenAI call happens here.
+    Callers that already loaded the conversation pass it in to avoid re-querying;
+    callers that started retrieval (see start_retrieval) before loading it pass that too.
+    """
     
     print(f"\n🔍 ===== CHAT_SERVICE CALLED =====")
     print(f"🏪 Restaurant ID: {req.restaurant_id}")
@@ -88,18 +200,21 @@ def chat_service(req: ChatRequest, db: Session) -> ChatResponse:
     print(f"💬 Message: '{req.message}'")
     print(f"🏷️ Sender Type: {req.sender_type}")
 
-    restaurant = db.query(models.Restaurant).filter(
-        models.Restaurant.restaurant_id == req.restaurant_id
-    ).first()
-    if not restaurant:
+    if retrieval is None:
+        # In RAG mode, embed + query the vector store while the database is queried
+        retrieval = start_retrieval(req)
+
+    if conversation is None:
+        # Restaurant and client (plus staff messages while staff_echo warms up) in one round trip
+        conversation = load_conversation_context(db, req.restaurant_id, req.client_id)
+
+    if conversation.restaurant is None:
         print(f"❌ Restaurant not found: {req.restaurant_id}")
-        return ChatResponse(answer="I'm sorry, I cannot find information about this restaurant.")
+        return PreparedChat(req, ChatResponse(answer="I'm sorry, I cannot find information about this restaurant."))
 
-    print(f"✅ Restaurant found: {restaurant.restaurant_id}")
+    print(f"✅ Restaurant found: {conversation.restaurant_id}")
 
     # ✅ VERIFIED: AI response blocking logic with comprehensive logging
-    from datetime import datetime, timedelta
-    
     print(f"🔍 CHECKING IF AI SHOULD RESPOND...")
     print(f"📋 Direct sender_type check: '{req.sender_type}'")
     
@@ -107,44 +222,40 @@ def chat_service(req: ChatRequest, db: Session) -> ChatResponse:
     if req.sender_type == 'restaurant':
         print(f"🚫 BLOCKING AI: sender_type is 'restaurant' (staff message)")
         print(f"===== END CHAT_SERVICE (BLOCKED) =====\n")
-        return ChatResponse(answer="")
-    
-    # Second check: Look for recent staff messages (within last 10 seconds) to avoid race conditions
-    recent_cutoff = datetime.utcnow() - timedelta(seconds=10)
-    print(f"🕐 Checking for recent staff messages since: {recent_cutoff}")
-    
-    recent_staff_messages = db.query(models.ChatMessage).filter(
-        models.ChatMessage.client_id == req.client_id,
-        models.ChatMessage.restaurant_id == req.restaurant_id,
-        models.ChatMessage.sender_type == 'restaurant',
-        models.ChatMessage.timestamp >= recent_cutoff
-    ).order_by(models.ChatMessage.timestamp.desc()).all()
-    
-    print(f"📋 Found {len(recent_staff_messages)} recent staff messages")
-    for i, staff_msg in enumerate(recent_staff_messages):
-        print(f"   Staff message {i+1}: '{staff_msg.message[:50]}...' at {staff_msg.timestamp}")
-    
-    # Check if this message matches any recent staff message
-    is_staff_message = any(
-        staff_msg.message.strip() == req.message.strip() 
-        for staff_msg in recent_staff_messages
-    )
+        return PreparedChat(req, ChatResponse(answer=""))
     
+    # Second check: Is this an echo of a staff message written in the last 10 seconds
+    # (race condition)? Answered from the in-memory buffer; the database is
+    # only consulted right after a restart, before the buffer covers the window.
+    is_staff_message = staff_echo.matches(req.restaurant_id, req.client_id, req.message)
+
+    if is_staff_message is None:
+        recent_staff_messages = conversation.recent_staff_messages
+        if recent_staff_messages is None:
+            recent_staff_messages = load_conversation_context(
+                db, req.restaurant_id, req.client_id, include_staff_messages=True
+            ).recent_staff_messages
+
+        print(f"📋 Found {len(recent_staff_messages)} recent staff messages in database")
+        for i, staff_msg in enumerate(recent_staff_messages):
+            print(f"   Staff message {i+1}: '{staff_msg[:50]}...'")
+
+        is_staff_message = any(
+            staff_msg.strip() == req.message.strip()
+            for staff_msg in recent_staff_messages
+        )
+
     if is_staff_message:
         print(f"🚫 BLOCKING AI: Message matches recent staff message")
         print(f"===== END CHAT_SERVICE (BLOCKED) =====\n")
-        return ChatResponse(answer="")
+        return PreparedChat(req, ChatResponse(answer=""))
     
     print(f"✅ AI RESPONSE ALLOWED: sender_type='{req.sender_type}', no recent staff match")
 
     # ✅ Check AI state BEFORE processing - get ai_enabled from Client.preferences
     print(f"🔍 Checking AI enabled state...")
-    client = get_or_create_client(db, req.client_id, req.restaurant_id)
-    
-    # Get ai_enabled from client preferences, default to True if not set
-    ai_enabled_state = True  # Default
-    if client.preferences:
-        ai_enabled_state = client.preferences.get("ai_enabled", True)
+    ensure_client(db, conversation)
+    ai_enabled_state = conversation.ai_enabled
     
     print(f"🔍 AI state for client {req.client_id}: ai_enabled = {ai_enabled_state}")
     
@@ -152,68 +263,85 @@ def chat_service(req: ChatRequest, db: Session) -> ChatResponse:
     if not ai_enabled_state:
         print("🚫 AI is disabled for this conversation - skipping AI processing")
         print(f"===== END CHAT_SERVICE (AI DISABLED) =====\n")
-        return ChatResponse(answer="")  # ✅ Return empty response
+        return PreparedChat(req, ChatResponse(answer=""))  # ✅ Return empty response
+
+    data = conversation.restaurant_data
 
-    data = restaurant.data or {}
+    # Greetings, thanks, "ok", emoji and media placeholders get a templated reply (or none)
+    small_talk_reply = classify_message(req.message, data)
+    if small_talk_reply is not None:
+        if not small_talk_reply:
+            print("💤 Small talk that needs no reply - skipping AI processing")
+            print(f"===== END CHAT_SERVICE (NO REPLY) =====\n")
+            return PreparedChat(req, ChatResponse(answer=""))
+        print("⚡ Small talk - using templated reply")
+        return PreparedChat(req, local_answer=small_talk_reply)
 
     try:
-        # Prepare menu
-        menu_items = data.get("menu", [])
-        if menu_items:
-            try:
-                menu_items = apply_menu_fallbacks(menu_items)
-                print(f"Applied fallbacks to {len(menu_items)} menu items")
-            except Exception as e:
-                print(f"Warning: Error applying menu fallbacks: {e}")
-
-        validated_menu = []
-        for item in menu_items:
-            if isinstance(item, dict):
-                validated_item = {
-                    'name': item.get('name') or item.get('dish', 'Unknown Dish'),
-                    'description': item.get('description', 'No description available'),
-                    'ingredients': item.get('ingredients', []),
-                    'allergens': item.get('allergens', []),
-                    'price': item.get('price', 'Price not available')
-                }
-                validated_menu.append(validated_item)
-
-        for item in validated_menu:
-            if 'allergens' not in item:
-                item['allergens'] = []
+        # Restaurant info + menu are compiled once per data version and cached;
+        # only the menu items relevant to this message go into the prompt
+        context = get_prompt_context(req.restaurant_id, data)
+
+        # Keep the prompt inside this restaurant's token budget: cap the
+        # customer message first, then give the menu whatever is left
+        customer_message = truncate_to_tokens(req.message, CHAT_MAX_MESSAGE_TOKENS)
+        fixed_tokens = (
+            estimate_tokens(system_prompt)
+            + estimate_tokens(customer_message)
+            + PROMPT_FRAME_TOKENS
+        )
+        available = max(get_prompt_budget(req.restaurant_id) - fixed_tokens, 0)
+        # Restaurant info may not crowd out the menu: keep CHAT_MIN_MENU_TOKENS for it
+        restaurant_info = context.restaurant_info
+        info_budget = max(available - CHAT_MIN_MENU_TOKENS, 0)
+        truncated_info = estimate_tokens(restaurant_info) > info_budget
+        if truncated_info:
+            restaurant_info = truncate_to_tokens(restaurant_info, info_budget)
+        section_budget = max(available - estimate_tokens(restaurant_info), 0)
+        retrieved = retrieval.result() if retrieval is not None else None
+        personalization = None
+        if retrieved is not None and retrieved.restaurant_chunks:
+            # RAG mode: the top-k chunks for this message plus the client's preferences
+            section_title = "Relevant restaurant information"
+            menu_section, truncated_menu = retrieved.render(section_budget)
+            if retrieved.client_preferences:
+                personalization = hashlib.sha256(
+                    "\n".join(retrieved.client_preferences).encode("utf-8")
+                ).hexdigest()[:16]
+        else:
+            section_title = "Menu"
+            menu_section, truncated_menu = context.render_menu(customer_message, section_budget)
 
         user_prompt = f"""
-Customer message: "{req.message}"
+Customer message: "{customer_message}"
 
-Restaurant Info:
-- Name: {data.get("name", "Restaurant name not available")}
-- Story: {data.get("restaurant_story", "No story available")}
-- Opening Hours: {data.get("opening_hours", "Hours not available")}
-- Contact Info: {data.get("contact_info", "Contact info not available")}
+{restaurant_info}
 
-Menu:
-{format_menu(validated_menu)}
+{section_title}:
+{menu_section}
 """
-
-        response = openai.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            temperature=0.5,
-            max_tokens=300
-        )
-
-        answer = response.choices[0].message.content.strip()
-
     except Exception as e:
-        print("OpenAI API ERROR:", str(e))
-        error_msg = "I'm experiencing technical difficulties. Please try again later."
-        return ChatResponse(answer=error_msg)
+        print("Prompt build ERROR:", str(e))
+        return PreparedChat(req, ChatResponse(answer=TECHNICAL_DIFFICULTIES_MESSAGE))
+
+    prepared = PreparedChat(
+        req,
+        context=context,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        truncated_message=customer_message != req.message,
+        # Counted with the menu: both are the restaurant section of the prompt
+        truncated_menu=truncated_menu or truncated_info,
+        personalization=personalization
+    )
+    print(f"🧮 Estimated prompt tokens: {prepared.estimated_prompt_tokens} (budget {get_prompt_budget(req.restaurant_id)})")
+    return prepared
 
 
-    # ✅ Log AI message to ChatMessage table (this is what the frontend reads)
+def save_ai_message(db: Session, req: ChatRequest, answer: str) -> models.ChatMessage:
+    """Log an AI answer to the ChatMessage table (this is what the frontend reads)."""
     new_message = models.ChatMessage(
         restaurant_id=req.restaurant_id,
         client_id=req.client_id,
@@ -228,5 +356,255 @@ Menu:
     # ✅ REMOVED: No longer logging to ChatLog table - using ChatMessage only
     print("✅ AI response processing complete")
     print(f"===== END CHAT_SERVICE =====\n")
+    return new_message
+
+
+def get_async_openai_client() -> openai.AsyncOpenAI:
+    """Return the shared AsyncOpenAI client, creating it on first use."""
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = openai.AsyncOpenAI()
+    return _async_openai_client
+
 
+def answer_without_llm(prepared: PreparedChat) -> Optional[str]:
+    """
+    Try to answer locally before paying for an OpenAI call: small-talk
+    templates, then the restaurant's FAQ/menu facts, then the answer cache.
+    """
+    if prepared.local_answer is not None:
+        return prepared.local_answer
+
+    fact_answer = answer_from_facts(prepared.context.fact_index, prepared.req.message)
+    if fact_answer is not None:
+        print(f"⚡ Answered from restaurant facts for {prepared.req.restaurant_id}")
+        return fact_answer
+
+    if prepared.personalization is not None:
+        # Answers shaped by one client's preferences are never shared
+        return None
+
+    cached = answer_cache.lookup(prepared.req.restaurant_id, prepared.context.version, prepared.req.message)
+    if cached is not None:
+        print(f"⚡ Answer cache hit for restaurant {prepared.req.restaurant_id}")
+    return cached
+
+
+def record_token_usage(prepared: PreparedChat, usage=None) -> None:
+    """Record prompt/completion tokens for this call (usage comes from the OpenAI response)."""
+    token_usage.record(
+        prepared.req.restaurant_id,
+        prepared.estimated_prompt_tokens,
+        usage,
+        truncated_message=prepared.truncated_message,
+        truncated_menu=prepared.truncated_menu
+    )
+
+
+def remember_answer(prepared: PreparedChat, answer: str, started_at: float) -> None:
+    """Store a fresh OpenAI answer in the answer cache with its latency."""
+    if prepared.personalization is not None:
+        return
+    latency = time.perf_counter() - started_at
+    answer_cache.store(prepared.req.restaurant_id, prepared.context.version, prepared.req.message, answer, latency)
+
+
+def flight_key(prepared: PreparedChat) -> tuple:
+    """Requests with the same key would send OpenAI an equivalent prompt."""
+    return (
+        prepared.req.restaurant_id,
+        prepared.context.version,
+        normalize_message(prepared.req.message),
+        prepared.personalization,
+    )
+
+
+def generate_answer(prepared: PreparedChat) -> str:
+    """
+    Call OpenAI for a prepared chat and record usage; raises on API errors,
+    when no model answers before the deadline (see model_router), or with
+    LoadShed when no LLM slot frees up in time (see llm_scheduler).
+    """
+    started_at = time.perf_counter()
+    with llm_scheduler.slot(prepared.req.restaurant_id):
+        response, model = model_router.complete(
+            prepared.req.message,
+            lambda model, timeout: openai.chat.completions.create(
+                model=model,
+                messages=prepared.messages,
+                temperature=0.5,
+                max_tokens=300,
+                timeout=timeout
+            )
+        )
+    print(f"🧠 Answered by {model}")
+
+    answer = response.choices[0].message.content.strip()
+    record_token_usage(prepared, getattr(response, "usage", None))
+    remember_answer(prepared, answer, started_at)
+    return answer
+
+
+async def generate_answer_async(prepared: PreparedChat) -> str:
+    """Async counterpart of generate_answer using AsyncOpenAI."""
+    started_at = time.perf_counter()
+    async with llm_scheduler.slot_async(prepared.req.restaurant_id):
+        response, model = await model_router.complete_async(
+            prepared.req.message,
+            lambda model, timeout: get_async_openai_client().chat.completions.create(
+                model=model,
+                messages=prepared.messages,
+                temperature=0.5,
+                max_tokens=300,
+                timeout=timeout
+            )
+        )
+    print(f"🧠 Answered by {model}")
+
+    answer = response.choices[0].message.content.strip()
+    record_token_usage(prepared, getattr(response, "usage", None))
+    await run_in_threadpool(remember_answer, prepared, answer, started_at)
+    return answer
+
+
+def chat_service(req: ChatRequest, db: Session,
+                 conversation: Optional[ConversationContext] = None,
+                 retrieval: Optional[PendingRetrieval] = None) -> ChatResponse:
+    """Handle chat requests with proper error handling and data validation."""
+    prepared = prepare_chat(req, db, conversation, retrieval)
+    if prepared.early_response is not None:
+        return prepared.early_response
+
+    answer = answer_without_llm(prepared)
+    if answer is None:
+        try:
+            # Identical concurrent questions share one OpenAI call
+            answer, shared = llm_flights.do(flight_key(prepared), lambda: generate_answer(prepared))
+            if shared:
+                print(f"🔗 Shared an in-flight OpenAI answer for restaurant {req.restaurant_id}")
+
+        except LoadShed as e:
+            # Overloaded: tell the customer quickly instead of queueing forever
+            print(f"🚦 Load shed for restaurant {req.restaurant_id}: {e}")
+            answer = BUSY_MESSAGE
+
+        except Exception as e:
+            print("OpenAI API ERROR:", str(e))
+            return ChatResponse(answer=TECHNICAL_DIFFICULTIES_MESSAGE)
+
+    # Every caller still gets its own ChatMessage row
+    save_ai_message(db, req, answer)
+    return ChatResponse(answer=answer)
+
+
+async def chat_service_async(req: ChatRequest, db: Session,
+                             conversation: Optional[ConversationContext] = None,
+                             retrieval: Optional[PendingRetrieval] = None) -> ChatResponse:
+    """
+    Async variant of chat_service for async routes (e.g. the WhatsApp webhook).
+    Blocking SQLAlchemy work is offloaded to the threadpool and the OpenAI
+    call goes through AsyncOpenAI, so the event loop is never frozen.
+    """
+    prepared = await run_in_threadpool(prepare_chat, req, db, conversation, retrieval)
+    if prepared.early_response is not None:
+        return prepared.early_response
+
+    # Semantic cache lookups embed the message, so keep them off the event loop
+    answer = await run_in_threadpool(answer_without_llm, prepared)
+    if answer is None:
+        try:
+            answer, shared = await llm_flights.do_async(flight_key(prepared), lambda: generate_answer_async(prepared))
+            if shared:
+                print(f"🔗 Shared an in-flight OpenAI answer for restaurant {req.restaurant_id}")
+
+        except LoadShed as e:
+            # Overloaded: tell the customer quickly instead of queueing forever
+            print(f"🚦 Load shed for restaurant {req.restaurant_id}: {e}")
+            answer = BUSY_MESSAGE
+
+        except Exception as e:
+            print("OpenAI API ERROR:", str(e))
+            return ChatResponse(answer=TECHNICAL_DIFFICULTIES_MESSAGE)
+
+    await run_in_threadpool(save_ai_message, db, req, answer)
     return ChatResponse(answer=answer)
+
+
+def format_sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def chat_service_stream(req: ChatRequest,
+                              conversation: Optional[ConversationContext] = None,
+                              retrieval: Optional[PendingRetrieval] = None) -> AsyncIterator[str]:
+    """
+    Streaming variant of chat_service that yields SSE frames.
+    Emits a `token` event per OpenAI delta, then a single `done` event with the
+    full answer once it has been saved as a ChatMessage. Blocked or disabled
+    conversations get an immediate `done` with an empty answer.
+    Uses its own DB session because it outlives the request's dependencies.
+    """
+    db = SessionLocal()
+    try:
+        prepared = await run_in_threadpool(prepare_chat, req, db, conversation, retrieval)
+        if prepared.early_response is not None:
+            yield format_sse("done", {"answer": prepared.early_response.answer})
+            return
+
+        cached = await run_in_threadpool(answer_without_llm, prepared)
+        if cached is not None:
+            await run_in_threadpool(save_ai_message, db, req, cached)
+            yield format_sse("token", {"token": cached})
+            yield format_sse("done", {"answer": cached})
+            return
+
+        chunks = []
+        try:
+            started_at = time.perf_counter()
+            # Tokens are already flowing to the client, so streams are routed but not hedged
+            tier, model = model_router.route(req.message)
+            async with llm_scheduler.slot_async(req.restaurant_id):
+                call_started = time.perf_counter()
+                try:
+                    stream = await get_async_openai_client().chat.completions.create(
+                        model=model,
+                        messages=prepared.messages,
+                        temperature=0.5,
+                        max_tokens=300,
+                        timeout=model_router.deadline_seconds,
+                        stream=True,
+                        stream_options={"include_usage": True}
+                    )
+                    usage = None
+                    async for chunk in stream:
+                        # With include_usage the final chunk carries usage and no choices
+                        usage = getattr(chunk, "usage", None) or usage
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            chunks.append(delta)
+                            yield format_sse("token", {"token": delta})
+                except Exception:
+                    model_router.record_stream(tier, call_started, ok=False)
+                    raise
+                model_router.record_stream(tier, call_started, ok=True)
+
+        except LoadShed as e:
+            print(f"🚦 Load shed for restaurant {req.restaurant_id}: {e}")
+            await run_in_threadpool(save_ai_message, db, req, BUSY_MESSAGE)
+            yield format_sse("token", {"token": BUSY_MESSAGE})
+            yield format_sse("done", {"answer": BUSY_MESSAGE})
+            return
+
+        except Exception as e:
+            print("OpenAI API ERROR (stream):", str(e))
+            yield format_sse("error", {"answer": TECHNICAL_DIFFICULTIES_MESSAGE})
+            return
+
+        answer = "".join(chunks).strip()
+        record_token_usage(prepared, usage)
+        await run_in_threadpool(remember_answer, prepared, answer, started_at)
+        await run_in_threadpool(save_ai_message, db, req, answer)
+        yield format_sse("done", {"answer": answer})
+    finally:
+        db.close()
@@ -2,8 +2,8 @@
 
 from sqlalchemy.orm import Session
 import models
-from pinecone_utils import insert_client_preferences
 from schemas.client import ClientCreateRequest
+from services.ingestion_queue import CLIENT, ingestion_worker
 
 def create_or_update_client_service(req: ClientCreateRequest, db: Session):
     client = db.query(models.Client).filter_by(id=req.client_id).first()
@@ -18,9 +18,9 @@ def create_or_update_client_service(req: ClientCreateRequest, db: Session):
         )
         db.add(client)
 
+    # Inject client preferences into Pinecone in the background
+    ingestion_worker.enqueue(db, CLIENT, req.client_id)
     db.commit()
-
-    # Inject client preferences into Pinecone
-    insert_client_preferences(req.client_id, req.preferences)
+    ingestion_worker.wake()
 
     return {"status": "client_updated"}
@@ -0,0 +1,115 @@
+"""
+Conversation context loader for the chat pipeline.
+Fetches the restaurant, the client (with its ai_enabled preference) and, while
+the in-memory staff echo buffer is still warming up, the recent staff messages
+of a conversation in a single database round trip, so routes can load it once
+and pass it down instead of re-querying.
+"""
+
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Union
+
+from sqlalchemy import and_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import models
+from services.staff_echo import STAFF_ECHO_WINDOW_SECONDS, staff_echo
+
+
+class ConversationContext:
+    """
+    Everything chat_service needs to know about a conversation before calling OpenAI.
+    Values are snapshotted at load time, so the context stays valid after the
+    caller commits (which expires ORM objects) or closes its session.
+    """
+
+    def __init__(self, restaurant_id: str, client_id: uuid.UUID, restaurant: Optional[models.Restaurant],
+                 client: Optional[models.Client], recent_staff_messages: Optional[List[str]]):
+        self.restaurant_id = restaurant_id
+        self.client_id = client_id
+        self.restaurant = restaurant
+        self.restaurant_data = (restaurant.data or {}) if restaurant is not None else {}
+        # None when not loaded from the database (staff_echo answers the check)
+        self.recent_staff_messages = recent_staff_messages
+        self.set_client(client)
+
+    def set_client(self, client: Optional[models.Client]) -> None:
+        self.client = client
+        self.client_restaurant_id = client.restaurant_id if client is not None else None
+        self.client_preferences = (client.preferences or {}) if client is not None else {}
+
+    @property
+    def ai_enabled(self) -> bool:
+        # Get ai_enabled from client preferences, default to True if not set
+        return self.client_preferences.get("ai_enabled", True)
+
+
+def load_conversation_context(db: Session, restaurant_id: str, client_id: Union[str, uuid.UUID],
+                              include_staff_messages: Optional[bool] = None) -> ConversationContext:
+    """
+    Load restaurant, client and (optionally) recent staff messages with one query.
+    Client and staff messages are LEFT OUTER JOINed onto the restaurant row,
+    so the result has one row per recent staff message (or a single row with
+    NULLs when there is no client yet or no recent staff message).
+    Staff messages are only joined while staff_echo cannot answer the echo
+    check on its own, i.e. right after a restart; pass include_staff_messages
+    to override.
+    """
+    client_uuid = client_id if isinstance(client_id, uuid.UUID) else uuid.UUID(str(client_id))
+    if include_staff_messages is None:
+        include_staff_messages = staff_echo.needs_db_fallback()
+
+    if not include_staff_messages:
+        row = db.query(models.Restaurant, models.Client).select_from(
+            models.Restaurant
+        ).outerjoin(
+            models.Client,
+            models.Client.id == client_uuid
+        ).filter(
+            models.Restaurant.restaurant_id == restaurant_id
+        ).first()
+        restaurant, client = row if row else (None, None)
+        return ConversationContext(restaurant_id, client_uuid, restaurant, client, None)
+
+    recent_cutoff = datetime.utcnow() - timedelta(seconds=STAFF_ECHO_WINDOW_SECONDS)
+
+    rows = db.query(models.Restaurant, models.Client, models.ChatMessage).select_from(
+        models.Restaurant
+    ).outerjoin(
+        models.Client,
+        models.Client.id == client_uuid
+    ).outerjoin(
+        models.ChatMessage,
+        and_(
+            models.ChatMessage.restaurant_id == models.Restaurant.restaurant_id,
+            models.ChatMessage.client_id == client_uuid,
+            models.ChatMessage.sender_type == 'restaurant',
+            models.ChatMessage.timestamp >= recent_cutoff
+        )
+    ).filter(
+        models.Restaurant.restaurant_id == restaurant_id
+    ).order_by(models.ChatMessage.timestamp.desc()).all()
+
+    if not rows:
+        return ConversationContext(restaurant_id, client_uuid, None, None, [])
+
+    restaurant, client, _ = rows[0]
+    staff_messages = [staff_msg.message for _, _, staff_msg in rows if staff_msg is not None]
+    return ConversationContext(restaurant_id, client_uuid, restaurant, client, staff_messages)
+
+
+def ensure_client(db: Session, context: ConversationContext) -> models.Client:
+    """Create the conversation's client on first contact; no query if it was already loaded."""
+    if context.client is None:
+        try:
+            client = models.Client(id=context.client_id, restaurant_id=context.restaurant_id)
+            db.add(client)
+            db.commit()
+            db.refresh(client)
+        except IntegrityError:
+            db.rollback()
+            client = db.query(models.Client).filter_by(id=context.client_id).first()
+        context.set_client(client)
+    return context.client
@@ -0,0 +1,121 @@
+"""
+Per-conversation debouncing of inbound messages.
+WhatsApp customers often send a question as a burst of short messages
+("hi" / "do you have" / "gluten free pasta?"). The debouncer buffers a burst
+until the conversation has been quiet for a short window and then hands
+the whole burst to a single flush call, so the burst gets one AI answer.
+"""
+
+import asyncio
+import os
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List
+
+# Quiet period that ends a burst; 0 disables debouncing
+WHATSAPP_DEBOUNCE_SECONDS = float(os.getenv("WHATSAPP_DEBOUNCE_SECONDS", "2"))
+# Upper bound on how long the first message of a burst can wait
+WHATSAPP_DEBOUNCE_MAX_SECONDS = float(os.getenv("WHATSAPP_DEBOUNCE_MAX_SECONDS", "6"))
+
+FlushFn = Callable[[List[str]], Awaitable[None]]
+
+
+class _Burst:
+    def __init__(self, flush: FlushFn):
+        self.flush = flush
+        self.messages: List[str] = []
+        self.first_at = time.monotonic()
+        self.last_at = self.first_at
+        self.wake = asyncio.Event()
+
+
+class MessageDebouncer:
+    """
+    Event-loop-only buffer of message bursts keyed by conversation.
+    Flushes for one conversation run strictly one after another, so replies
+    cannot overtake each other; messages that arrive while a flush is running
+    start the next burst.
+    """
+
+    def __init__(self, window_seconds: float = WHATSAPP_DEBOUNCE_SECONDS,
+                 max_wait_seconds: float = WHATSAPP_DEBOUNCE_MAX_SECONDS):
+        self.window_seconds = window_seconds
+        self.max_wait_seconds = max(max_wait_seconds, window_seconds)
+        self._bursts: Dict[Hashable, _Burst] = {}
+        self._tasks: Dict[Hashable, "asyncio.Task"] = {}
+        self._flushing: Dict[Hashable, "asyncio.Task"] = {}
+        self.messages = 0
+        self.flushes = 0
+        self.flushed_messages = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_seconds > 0
+
+    def submit(self, key: Hashable, message: str, flush: FlushFn) -> None:
+        """
+        Add a message to the conversation's current burst.
+        `flush(messages)` is awaited once the burst is complete; the flush
+        of the latest message of a burst wins if they differ.
+        """
+        self.messages += 1
+        burst = self._bursts.get(key)
+        if burst is None:
+            burst = _Burst(flush)
+            self._bursts[key] = burst
+            self._tasks[key] = asyncio.ensure_future(self._run(key, burst))
+        burst.flush = flush
+        burst.messages.append(message)
+        burst.last_at = time.monotonic()
+
+    async def _run(self, key: Hashable, burst: _Burst) -> None:
+        while True:
+            flush_at = min(burst.last_at + self.window_seconds, burst.first_at + self.max_wait_seconds)
+            delay = flush_at - time.monotonic()
+            if delay <= 0 or burst.wake.is_set():
+                break
+            try:
+                await asyncio.wait_for(burst.wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+        # Keep replies in order: wait for the previous burst's answer first
+        previous = self._flushing.get(key)
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        # From here on new messages start a new burst
+        del self._bursts[key]
+        del self._tasks[key]
+        current = asyncio.current_task()
+        self._flushing[key] = current
+        try:
+            self.flushes += 1
+            self.flushed_messages += len(burst.messages)
+            await burst.flush(burst.messages)
+        except Exception as e:
+            print(f"❌ Error flushing debounced messages for {key}: {str(e)}")
+        finally:
+            if self._flushing.get(key) is current:
+                del self._flushing[key]
+
+    async def flush_all(self) -> None:
+        """Flush every pending burst now (used on shutdown)."""
+        for burst in list(self._bursts.values()):
+            burst.first_at = burst.last_at = time.monotonic() - self.max_wait_seconds
+            burst.wake.set()
+        pending = list(self._tasks.values()) + list(self._flushing.values())
+        if pending:
+            await asyncio.wait(pending)
+
+    def stats(self) -> dict:
+        return {
+            "window_seconds": self.window_seconds,
+            "pending_conversations": len(self._bursts),
+            "messages": self.messages,
+            "flushes": self.flushes,
+            "merged_messages": self.flushed_messages - self.flushes,
+        }
+
+
+# Global instance for the WhatsApp webhook
+whatsapp_debouncer = MessageDebouncer()
@@ -0,0 +1,166 @@
+"""
+Local FAQ and menu fact engine.
+Answers high-confidence lookups ("how much is the carbonara", a direct FAQ
+hit) straight from Restaurant.data so they never reach OpenAI.
+Allergy questions are always left to the LLM: stored allergen lists are
+mostly inferred from ingredient keywords and cannot be stated as complete.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from services.answer_cache import normalize_message
+
+FAQ_MATCH_THRESHOLD = 0.8  # token overlap needed for a direct FAQ answer
+MAX_FACT_QUESTION_TOKENS = 14  # longer messages are left to the LLM
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "do", "does", "you", "your", "we", "i", "me", "my",
+    "of", "to", "for", "in", "on", "at", "it", "this", "that", "there", "what", "whats",
+    "can", "could", "please", "have", "has", "be", "s", "much", "any", "and", "or", "with",
+}
+
+PRICE_TERMS = {"price", "prices", "cost", "costs", "how much"}
+ALLERGEN_TERMS = {"allergen", "allergens", "allergy", "allergies"}
+INGREDIENT_TERMS = {"ingredient", "ingredients", "made with", "made of", "what s in", "whats in"}
+
+PLACEHOLDER_VALUES = {"price not available", "not specified", "not available", "unknown"}
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(int)
+
+
+def _tokens(text: str) -> List[str]:
+    return [t for t in normalize_message(text).split() if t not in STOPWORDS]
+
+
+def _has_term(normalized: str, terms: Set[str]) -> bool:
+    padded = f" {normalized} "
+    return any(f" {term} " in padded for term in terms)
+
+
+def _is_placeholder(value: Any) -> bool:
+    if isinstance(value, list):
+        return not value or all(_is_placeholder(v) for v in value)
+    return not value or str(value).strip().lower() in PLACEHOLDER_VALUES
+
+
+def _record(outcome: str) -> None:
+    with _stats_lock:
+        _stats[outcome] += 1
+
+
+class FactIndex:
+    """Inverted index over one version of a restaurant's FAQ and dish names."""
+
+    def __init__(self, data: Dict[str, Any], menu_items: List[Dict[str, Any]]):
+        self.faqs = [faq for faq in (data.get("faq") or []) if isinstance(faq, dict) and faq.get("answer")]
+        self.faq_tokens: List[Set[str]] = []
+        self.faq_index: Dict[str, Set[int]] = defaultdict(set)
+        for i, faq in enumerate(self.faqs):
+            tokens = set(_tokens(faq.get("question", "")))
+            self.faq_tokens.append(tokens)
+            for token in tokens:
+                self.faq_index[token].add(i)
+
+        self.dishes = menu_items
+        self.dish_names = [normalize_message(item.get("name", "")) for item in menu_items]
+        self.dish_index: Dict[str, Set[int]] = defaultdict(set)
+        for i, name in enumerate(self.dish_names):
+            for token in name.split():
+                if token not in STOPWORDS:
+                    self.dish_index[token].add(i)
+
+    def match_faq(self, tokens: Set[str]) -> Optional[str]:
+        candidates = set()
+        for token in tokens:
+            candidates |= self.faq_index.get(token, set())
+
+        best_answer, best_score = None, 0.0
+        for i in candidates:
+            faq_tokens = self.faq_tokens[i]
+            score = len(tokens & faq_tokens) / len(tokens | faq_tokens)
+            if score > best_score:
+                best_answer, best_score = self.faqs[i]["answer"], score
+        return best_answer if best_score >= FAQ_MATCH_THRESHOLD else None
+
+    def match_dish(self, normalized: str, tokens: Set[str]) -> Optional[Dict[str, Any]]:
+        """Return the single dish whose full name appears in the message, if unambiguous."""
+        candidates = set()
+        for token in tokens:
+            candidates |= self.dish_index.get(token, set())
+
+        padded = f" {normalized} "
+        matches = [i for i in candidates if self.dish_names[i] and f" {self.dish_names[i]} " in padded]
+        if not matches:
+            return None
+        # Prefer the most specific name ("spicy carbonara" over "carbonara")
+        longest = max(len(self.dish_names[i]) for i in matches)
+        best = [i for i in matches if len(self.dish_names[i]) == longest]
+        return self.dishes[best[0]] if len(best) == 1 else None
+
+    def answer(self, message: str) -> Optional[str]:
+        normalized = normalize_message(message)
+        if not normalized or len(normalized.split()) > MAX_FACT_QUESTION_TOKENS:
+            return None
+        # Compound questions ("price and is it vegan?") need the LLM
+        if message.count("?") > 1 or " and " in f" {normalized} ":
+            return None
+
+        # Allergy questions are safety questions; never answer them locally
+        if _has_term(normalized, ALLERGEN_TERMS):
+            return None
+
+        tokens = set(_tokens(normalized))
+        if not tokens:
+            return None
+
+        faq_answer = self.match_faq(tokens)
+        if faq_answer:
+            _record("faq")
+            return faq_answer
+
+        intents = [
+            intent for intent, terms in (
+                ("price", PRICE_TERMS), ("ingredients", INGREDIENT_TERMS)
+            )
+            if _has_term(normalized, terms)
+        ]
+        if len(intents) != 1:
+            return None
+
+        dish = self.match_dish(normalized, tokens)
+        if dish is None:
+            return None
+
+        intent = intents[0]
+        name = dish.get("name")
+        if intent == "price" and not _is_placeholder(dish.get("price")):
+            _record("price")
+            return f"The {name} is {dish['price']}."
+        if intent == "ingredients" and not _is_placeholder(dish.get("ingredients")):
+            _record("ingredients")
+            return f"The {name} is made with {', '.join(dish['ingredients'])}."
+        return None
+
+
+def answer_from_facts(fact_index: Optional[FactIndex], message: str) -> Optional[str]:
+    """Answer a message locally, or return None so the caller falls back to OpenAI."""
+    if fact_index is None:
+        return None
+    answer = fact_index.answer(message)
+    if answer is None:
+        _record("fallback")
+    return answer
+
+
+def fact_engine_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        answered = sum(v for k, v in _stats.items() if k != "fallback")
+        total = answered + _stats["fallback"]
+        return {
+            **_stats,
+            "answered": answered,
+            "answer_rate": round(answered / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,285 @@
+"""
+Durable background ingestion of vector store upserts.
+Writes that change indexed content (restaurant registration, client
+preferences) record a VectorIngestionJob in the same transaction instead of
+embedding and upserting inside the HTTP request. A worker thread claims due
+jobs, coalesces repeated jobs for the same entity, indexes the entity's
+current database state (restaurants incrementally, see vector_indexer) and
+retries failures with exponential backoff. A claim is a lease: the worker
+renews claimed_at while it works through a batch, and jobs whose lease ran
+out (their process died) are handed to the next worker that polls.
+"""
+
+import os
+import random
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+from pinecone_utils import insert_many_client_preferences
+from services.vector_indexer import reindex_restaurant
+
+INGESTION_BATCH_SIZE = int(os.getenv("INGESTION_BATCH_SIZE", "50"))
+INGESTION_POLL_SECONDS = float(os.getenv("INGESTION_POLL_SECONDS", "5"))
+INGESTION_MAX_ATTEMPTS = int(os.getenv("INGESTION_MAX_ATTEMPTS", "8"))
+INGESTION_BACKOFF_BASE_SECONDS = float(os.getenv("INGESTION_BACKOFF_BASE_SECONDS", "2"))
+INGESTION_BACKOFF_MAX_SECONDS = float(os.getenv("INGESTION_BACKOFF_MAX_SECONDS", "600"))
+# A 'processing' job not renewed for this long belongs to a dead worker
+INGESTION_LEASE_SECONDS = float(os.getenv("INGESTION_LEASE_SECONDS", "300"))
+
+RESTAURANT = "restaurant"
+CLIENT = "client"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with full jitter after the given number of failed attempts."""
+    ceiling = min(INGESTION_BACKOFF_MAX_SECONDS, INGESTION_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+class IngestionWorker:
+    """
+    Background thread draining vector_ingestion_jobs.
+    Jobs carry no payload: the worker indexes whatever the entity looks like
+    when the job runs, so any number of updates queued for one entity are
+    served by a single upsert. Claiming is a conditional UPDATE, so several
+    app processes can run a worker against the same table.
+    """
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = INGESTION_BATCH_SIZE,
+                 poll_seconds: float = INGESTION_POLL_SECONDS, lease_seconds: float = INGESTION_LEASE_SECONDS):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.indexed = 0
+        self.retries = 0
+        self.gave_up = 0
+        self.recovered = 0
+        self.last_error: Optional[str] = None
+
+    # Producer side ---------------------------------------------------------
+
+    def enqueue(self, db: Session, entity_type: str, entity_id: Any) -> None:
+        """
+        Record a pending upsert in db's current transaction; the caller commits
+        it together with the data change and then calls wake().
+        """
+        entity_id = str(entity_id)
+        job = db.query(models.VectorIngestionJob).filter(
+            models.VectorIngestionJob.entity_type == entity_type,
+            models.VectorIngestionJob.entity_id == entity_id,
+            models.VectorIngestionJob.status == "pending",
+        ).first()
+        with self._lock:
+            self.enqueued += 1
+            if job is not None:
+                self.coalesced += 1
+        if job is not None:
+            # New content may fix whatever made earlier attempts fail
+            job.attempts = 0
+            job.next_attempt_at = _now()
+            return
+        db.add(models.VectorIngestionJob(
+            entity_type=entity_type,
+            entity_id=entity_id,
+            status="pending",
+            attempts=0,
+            next_attempt_at=_now(),
+        ))
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    # Worker side -----------------------------------------------------------
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="vector-ingestion", daemon=True)
+        self._thread.start()
+        print("✅ Vector ingestion worker started")
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _requeue_expired(self, db: Session) -> None:
+        # Jobs whose worker stopped renewing the lease (crashed process);
+        # jobs another live worker is processing keep a fresh claimed_at.
+        # Indexing is idempotent, so running one twice is harmless
+        cutoff = _now() - timedelta(seconds=self.lease_seconds)
+        recovered = db.query(models.VectorIngestionJob).filter(
+            models.VectorIngestionJob.status == "processing",
+            or_(models.VectorIngestionJob.claimed_at.is_(None), models.VectorIngestionJob.claimed_at < cutoff),
+        ).update({"status": "pending", "claimed_at": None}, synchronize_session=False)
+        db.commit()
+        if recovered:
+            with self._lock:
+                self.recovered += recovered
+            print(f"🔁 Requeued {recovered} vector ingestion jobs with an expired lease")
+
+    def _renew(self, db: Session, job_ids: List[Any]) -> None:
+        """Heartbeat: extend the lease on jobs this worker still holds."""
+        if not job_ids:
+            return
+        db.query(models.VectorIngestionJob).filter(
+            models.VectorIngestionJob.id.in_(job_ids),
+            models.VectorIngestionJob.status == "processing",
+        ).update({"claimed_at": _now()}, synchronize_session=False)
+        db.commit()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                claimed = self.run_once()
+            except Exception as e:
+                print(f"❌ Vector ingestion worker error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                # Queue drained: sleep until woken by a new job or the next poll
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _claim(self, db: Session) -> List[models.VectorIngestionJob]:
+        self._requeue_expired(db)
+        candidates = db.query(models.VectorIngestionJob.id).filter(
+            models.VectorIngestionJob.status == "pending",
+            models.VectorIngestionJob.next_attempt_at <= _now(),
+        ).order_by(models.VectorIngestionJob.created_at).limit(self.batch_size).all()
+
+        claimed_ids = []
+        for (job_id,) in candidates:
+            updated = db.query(models.VectorIngestionJob).filter(
+                models.VectorIngestionJob.id == job_id,
+                models.VectorIngestionJob.status == "pending",
+            ).update({"status": "processing", "claimed_at": _now()}, synchronize_session=False)
+            if updated:
+                claimed_ids.append(job_id)
+        db.commit()
+        if not claimed_ids:
+            return []
+        return db.query(models.VectorIngestionJob).filter(models.VectorIngestionJob.id.in_(claimed_ids)).all()
+
+    def run_once(self) -> int:
+        """Claim and process one batch of due jobs; returns how many were claimed."""
+        db = self.session_factory()
+        try:
+            jobs = self._claim(db)
+            if not jobs:
+                return 0
+
+            # Coalesce duplicates: one indexing call per entity
+            by_entity: "OrderedDict[tuple, List[models.VectorIngestionJob]]" = OrderedDict()
+            for job in jobs:
+                by_entity.setdefault((job.entity_type, job.entity_id), []).append(job)
+
+            restaurants = [entity_id for entity_type, entity_id in by_entity if entity_type == RESTAURANT]
+            clients = [entity_id for entity_type, entity_id in by_entity if entity_type == CLIENT]
+
+            # Renew the lease on the rest of the batch before each (slow) indexing call
+            remaining = {job.id: (job.entity_type, job.entity_id) for job in jobs}
+            for restaurant_id in restaurants:
+                self._renew(db, list(remaining))
+                self._process(db, by_entity[(RESTAURANT, restaurant_id)], self._index_restaurant, db, restaurant_id)
+                remaining = {job_id: entity for job_id, entity in remaining.items() if entity != (RESTAURANT, restaurant_id)}
+            if clients:
+                self._renew(db, list(remaining))
+                client_jobs = [job for client_id in clients for job in by_entity[(CLIENT, client_id)]]
+                self._process(db, client_jobs, self._index_clients, db, clients)
+
+            with self._lock:
+                self.batches += 1
+                self.coalesced += len(jobs) - len(by_entity)
+            return len(jobs)
+        finally:
+            db.close()
+
+    def _process(self, db: Session, jobs: List[models.VectorIngestionJob], index_fn, *args) -> None:
+        try:
+            index_fn(*args)
+        except Exception as e:
+            db.rollback()
+            self._fail(db, jobs, e)
+            return
+        for job in jobs:
+            db.delete(job)
+        db.commit()
+        with self._lock:
+            self.indexed += len(jobs)
+
+    def _fail(self, db: Session, jobs: List[models.VectorIngestionJob], error: Exception) -> None:
+        message = f"{type(error).__name__}: {error}"[:1000]
+        for job in jobs:
+            job.attempts = (job.attempts or 0) + 1
+            job.last_error = message
+            if job.attempts >= INGESTION_MAX_ATTEMPTS:
+                job.status = "failed"
+            else:
+                job.status = "pending"
+                job.claimed_at = None
+                job.next_attempt_at = _now() + timedelta(seconds=backoff_seconds(job.attempts))
+        db.commit()
+        gave_up = sum(1 for job in jobs if job.status == "failed")
+        with self._lock:
+            self.retries += len(jobs) - gave_up
+            self.gave_up += gave_up
+            self.last_error = message
+        print(f"⚠️ Vector ingestion failed for {len(jobs)} job(s), {gave_up} given up: {message}")
+
+    @staticmethod
+    def _index_restaurant(db: Session, restaurant_id: str) -> None:
+        restaurant = db.query(models.Restaurant).filter(models.Restaurant.restaurant_id == restaurant_id).first()
+        if restaurant is None:
+            # Deleted: drop its vectors
+            reindex_restaurant(db, restaurant_id, None)
+        elif restaurant.role == "owner":
+            # Staff accounts have nothing to index
+            reindex_restaurant(db, restaurant_id, restaurant.data or {})
+
+    @staticmethod
+    def _index_clients(db: Session, client_ids: List[str]) -> None:
+        clients = db.query(models.Client).filter(
+            models.Client.id.in_([uuid.UUID(client_id) for client_id in client_ids])
+        ).all()
+        insert_many_client_preferences({str(client.id): client.preferences for client in clients})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "batches": self.batches,
+                "indexed": self.indexed,
+                "retries": self.retries,
+                "gave_up": self.gave_up,
+                "recovered": self.recovered,
+                "last_error": self.last_error,
+            }
+
+
+# Global instance, started in main.py lifespan
+ingestion_worker = IngestionWorker()
@@ -0,0 +1,114 @@
+"""
+Local intent classifier for small-talk messages.
+Recognizes greetings, thanks, acknowledgements, emoji-only messages and the
+WhatsApp bridge's media placeholder with rules and a small lexicon, so these
+get a templated reply (or none) instead of an OpenAI call.
+"""
+
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+from services.answer_cache import normalize_message
+
+GREETING = "greeting"
+THANKS = "thanks"
+ACK = "ack"
+EMOJI = "emoji"
+MEDIA = "media"
+
+# Sent by whatsapp-service/server.js for images, voice notes, stickers, ...
+MEDIA_PLACEHOLDER = "media message or unsupported message type"
+
+MAX_SMALL_TALK_WORDS = 6  # longer messages are real questions more often than not
+
+GREETING_WORDS = {
+    "hi", "hii", "hiii", "hello", "helo", "hey", "heyy", "hola", "bonjour", "salut", "ciao",
+    "yo", "morning", "afternoon", "evening", "greetings", "howdy", "sup",
+}
+THANKS_WORDS = {
+    "thanks", "thank", "thx", "thanx", "ty", "tysm", "merci", "gracias", "grazie", "cheers",
+    "appreciate", "appreciated",
+}
+ACK_WORDS = {
+    "ok", "okay", "okk", "k", "kk", "alright", "sure", "cool", "great", "perfect", "nice",
+    "noted", "got", "fine", "good", "yes", "yep", "yeah", "np", "awesome", "understood",
+}
+# Words that may accompany small talk without turning it into a question
+FILLER_WORDS = {
+    "there", "you", "u", "so", "very", "much", "a", "lot", "all", "guys", "team", "again",
+    "it", "then", "and", "oh", "ah", "de", "beaucoup", "the", "for", "your", "help", "sir",
+    "madam", "everyone", "day", "night", "good",
+}
+
+DEFAULT_REPLIES = {
+    GREETING: "Hi! Welcome to {name}. How can I help you today?",
+    THANKS: "You're welcome! Let us know if there's anything else we can do for you.",
+    ACK: "",  # no reply
+    EMOJI: "",  # no reply
+    MEDIA: "Thanks for your message! I can only read text here - could you type your question?",
+}
+
+_stats_lock = threading.Lock()
+_stats = defaultdict(int)
+
+
+def _only(words, vocabulary) -> bool:
+    return any(w in vocabulary for w in words) and all(w in vocabulary or w in FILLER_WORDS for w in words)
+
+
+def classify(message: str) -> Optional[str]:
+    """Small-talk intent of a message, or None if it needs a real answer."""
+    raw = (message or "").strip()
+    if not raw:
+        return None
+    normalized = normalize_message(raw)
+    if normalized == MEDIA_PLACEHOLDER:
+        return MEDIA
+    if not normalized:
+        # Nothing but emoji / punctuation ("👍", "🙏🙏", ":)")
+        return EMOJI
+
+    words = normalized.split()
+    if len(words) > MAX_SMALL_TALK_WORDS or "?" in raw:
+        return None
+    if _only(words, THANKS_WORDS | ACK_WORDS) and any(w in THANKS_WORDS for w in words):
+        return THANKS
+    if _only(words, GREETING_WORDS):
+        return GREETING
+    if _only(words, ACK_WORDS):
+        return ACK
+    return None
+
+
+def reply_for(intent: str, data: Dict[str, Any]) -> str:
+    """
+    Templated reply for an intent; an empty string means no reply.
+    Restaurants can override templates in data["auto_replies"].
+    """
+    template = (data.get("auto_replies") or {}).get(intent, DEFAULT_REPLIES[intent])
+    return (template or "").replace("{name}", data.get("name") or "our restaurant")
+
+
+def classify_message(message: str, data: Dict[str, Any]) -> Optional[str]:
+    """
+    Reply for a small-talk message ("" for no reply), or None when the message
+    should go to the LLM. Counts the outcome for intent_stats().
+    """
+    intent = classify(message)
+    with _stats_lock:
+        _stats[intent or "llm"] += 1
+    if intent is None:
+        return None
+    return reply_for(intent, data)
+
+
+def intent_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        deflected = sum(v for k, v in _stats.items() if k != "llm")
+        total = deflected + _stats["llm"]
+        return {
+            **_stats,
+            "deflected": deflected,
+            "deflection_rate": round(deflected / total, 4) if total else 0.0,
+        }
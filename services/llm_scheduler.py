@@ -0,0 +1,205 @@
+"""
+Fair concurrency scheduler for OpenAI calls.
+Caps in-flight LLM calls globally and per restaurant, queues the rest with
+weighted fair ordering across restaurants, and sheds load when a request
+would wait too long, so one busy restaurant cannot starve the others or
+exhaust the OpenAI rate limit.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Deque, Dict, Optional
+
+from services.stats import summarize
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_PER_RESTAURANT = int(os.getenv("LLM_MAX_PER_RESTAURANT", "4"))
+LLM_MAX_QUEUE_WAIT_SECONDS = float(os.getenv("LLM_MAX_QUEUE_WAIT_SECONDS", "8"))
+LLM_MAX_QUEUE_DEPTH = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "200"))
+# JSON object of per-restaurant weights (default 1), e.g. '{"big_bistro": 2}'
+LLM_RESTAURANT_WEIGHTS = json.loads(os.getenv("LLM_RESTAURANT_WEIGHTS", "{}") or "{}")
+
+BUSY_MESSAGE = "Thanks for your message! We're a bit busy right now - we'll get back to you shortly."
+
+WAIT_SAMPLES = 1000
+
+
+class LoadShed(Exception):
+    """The request was not admitted (queue full or waited too long)."""
+
+
+class _Waiter:
+    def __init__(self, restaurant_id: str, tag: float, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.restaurant_id = restaurant_id
+        self.tag = tag
+        self.enqueued_at = time.perf_counter()
+        self.granted = False
+        self.loop = loop
+        self.event = threading.Event() if loop is None else None
+        self.future = loop.create_future() if loop is not None else None
+
+    def grant(self) -> None:
+        self.granted = True
+        if self.future is not None:
+            self.loop.call_soon_threadsafe(self._resolve)
+        else:
+            self.event.set()
+
+    def _resolve(self) -> None:
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class LLMScheduler:
+    """
+    Weighted fair queueing over restaurants.
+    Each waiter gets a virtual finish tag of max(virtual time, restaurant's
+    last tag) + 1/weight; free slots go to the lowest tag among restaurants
+    that are below their own in-flight cap. Works for threadpool callers
+    (slot) and event-loop callers (slot_async) at the same time.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_per_restaurant: int = LLM_MAX_PER_RESTAURANT,
+                 max_queue_wait: float = LLM_MAX_QUEUE_WAIT_SECONDS,
+                 max_queue_depth: int = LLM_MAX_QUEUE_DEPTH,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max_concurrency
+        self.max_per_restaurant = max_per_restaurant
+        self.max_queue_wait = max_queue_wait
+        self.max_queue_depth = max_queue_depth
+        self.weights = dict(LLM_RESTAURANT_WEIGHTS if weights is None else weights)
+
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[_Waiter]] = defaultdict(deque)
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._last_tag: Dict[str, float] = defaultdict(float)
+        self._virtual_time = 0.0
+        self._total_in_flight = 0
+        self._queued = 0
+        self._wait_ms: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self._counters = defaultdict(int)
+
+    def _weight(self, restaurant_id: str) -> float:
+        return max(float(self.weights.get(restaurant_id, 1)), 0.01)
+
+    def _enqueue(self, restaurant_id: str, loop=None) -> _Waiter:
+        with self._lock:
+            if self._queued >= self.max_queue_depth:
+                self._counters["shed_queue_full"] += 1
+                raise LoadShed("LLM queue is full")
+            start = max(self._virtual_time, self._last_tag[restaurant_id])
+            tag = start + 1.0 / self._weight(restaurant_id)
+            self._last_tag[restaurant_id] = tag
+            waiter = _Waiter(restaurant_id, tag, loop)
+            self._queues[restaurant_id].append(waiter)
+            self._queued += 1
+            self._dispatch()
+            return waiter
+
+    def _dispatch(self) -> None:
+        # Caller holds self._lock
+        while self._total_in_flight < self.max_concurrency:
+            best = None
+            for restaurant_id, queue in self._queues.items():
+                if queue and self._in_flight.get(restaurant_id, 0) < self.max_per_restaurant:
+                    if best is None or queue[0].tag < best.tag:
+                        best = queue[0]
+            if best is None:
+                return
+            self._queues[best.restaurant_id].popleft()
+            if not self._queues[best.restaurant_id]:
+                del self._queues[best.restaurant_id]
+            self._queued -= 1
+            self._in_flight[best.restaurant_id] += 1
+            self._total_in_flight += 1
+            self._virtual_time = max(self._virtual_time, best.tag - 1.0 / self._weight(best.restaurant_id))
+            self._wait_ms.append(round((time.perf_counter() - best.enqueued_at) * 1000, 1))
+            self._counters["granted"] += 1
+            best.grant()
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Drop a waiter that timed out; False if it was granted meanwhile."""
+        with self._lock:
+            if waiter.granted:
+                return False
+            queue = self._queues.get(waiter.restaurant_id)
+            if queue is not None:
+                queue.remove(waiter)
+                if not queue:
+                    del self._queues[waiter.restaurant_id]
+            self._queued -= 1
+            return True
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def release(self, restaurant_id: str) -> None:
+        with self._lock:
+            self._in_flight[restaurant_id] -= 1
+            if not self._in_flight[restaurant_id]:
+                del self._in_flight[restaurant_id]
+            self._total_in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, restaurant_id: str):
+        """Hold one LLM slot for the duration of the block; raises LoadShed."""
+        waiter = self._enqueue(restaurant_id)
+        if not waiter.event.wait(self.max_queue_wait) and self._abandon(waiter):
+            self._count("shed_wait_timeout")
+            raise LoadShed(f"Waited more than {self.max_queue_wait}s for an LLM slot")
+        try:
+            yield
+        finally:
+            self.release(restaurant_id)
+
+    @asynccontextmanager
+    async def slot_async(self, restaurant_id: str):
+        """Async counterpart of slot() that waits without blocking the event loop."""
+        waiter = self._enqueue(restaurant_id, asyncio.get_running_loop())
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.max_queue_wait)
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                self._count("shed_wait_timeout")
+                raise LoadShed(f"Waited more than {self.max_queue_wait}s for an LLM slot")
+        except asyncio.CancelledError:
+            if not self._abandon(waiter):
+                self.release(restaurant_id)
+            raise
+        try:
+            yield
+        finally:
+            self.release(restaurant_id)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            restaurants = set(self._queues) | set(self._in_flight)
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_per_restaurant": self.max_per_restaurant,
+                "max_queue_wait_seconds": self.max_queue_wait,
+                "in_flight": self._total_in_flight,
+                "queue_depth": self._queued,
+                "queue_wait_ms": summarize(self._wait_ms),
+                **self._counters,
+                "per_restaurant": {
+                    restaurant_id: {
+                        "in_flight": self._in_flight.get(restaurant_id, 0),
+                        "queued": len(self._queues.get(restaurant_id, ())),
+                        "weight": self._weight(restaurant_id),
+                    }
+                    for restaurant_id in sorted(restaurants)
+                },
+            }
+
+
+# Global instance for OpenAI chat completions
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,73 @@
+"""
+Canonical menu item shape.
+Menus are normalized once when a restaurant is written (and by
+backfill_menus.py for older rows), so readers such as chat_service can use
+the stored items as they are.
+"""
+
+from services.allergen_matcher import infer_allergens
+
+# Bump when the canonical menu item shape below changes; stored as data["menu_schema"]
+MENU_SCHEMA_VERSION = 1
+
+
+def _as_list(value) -> list:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    return [str(v) for v in value if v]
+
+
+def normalize_menu_item(item) -> dict:
+    """
+    Canonical stored shape of a menu item: exactly dish, name, price,
+    ingredients, description and allergens, with fallbacks applied and
+    allergens inferred when missing.
+    """
+    # Handle both dict and object types
+    if hasattr(item, 'dict'):
+        item = item.dict()
+    elif not isinstance(item, dict):
+        raise ValueError(f"Unexpected item type: {type(item)}")
+
+    name = item.get("name") or item.get("dish") or "Unknown Dish"
+    ingredients = _as_list(item.get("ingredients")) or ["Not specified"]
+    allergens = _as_list(item.get("allergens")) or infer_allergens(ingredients)
+    return {
+        "dish": item.get("dish") or name,
+        "name": name,
+        "price": str(item.get("price") or "Price not available"),
+        "ingredients": ingredients,
+        "description": item.get("description") or "No description provided",
+        "allergens": allergens,
+    }
+
+
+def apply_menu_fallbacks(menu_items: list) -> list:
+    """Apply fallbacks to menu items to ensure all required fields exist."""
+    fallback_items = []
+    for item in menu_items:
+        if not (hasattr(item, 'dict') or isinstance(item, dict)):
+            print(f"Warning: Unexpected item type: {type(item)}")
+            continue
+        try:
+            fallback_items.append(normalize_menu_item(item))
+        except Exception as e:
+            print(f"Error processing menu item {item}: {e}")
+            # Add a minimal fallback item to prevent complete failure
+            fallback_items.append({
+                "dish": "Menu Item (Error)",
+                "name": "Menu Item (Error)",
+                "price": "Unknown",
+                "ingredients": ["Not available"],
+                "description": "Unable to process item details",
+                "allergens": []
+            })
+
+    return fallback_items
+
+
+def is_normalized(data: dict) -> bool:
+    """True if the stored menu is already in the canonical shape."""
+    return data.get("menu_schema") == MENU_SCHEMA_VERSION
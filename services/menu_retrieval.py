@@ -0,0 +1,116 @@
+"""
+Relevance-filtered menu retrieval for chat prompts.
+Scores menu items against the customer message with BM25 so that only the
+most relevant dishes are sent in full, plus a compact index of every dish name.
+"""
+
+import math
+import os
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+from services.answer_cache import normalize_message
+from services.token_budget import estimate_tokens, truncate_to_tokens
+
+MENU_TOP_K = int(os.getenv("MENU_TOP_K", "8"))
+# Menus at or below this size are always sent in full
+MENU_FULL_THRESHOLD = int(os.getenv("MENU_FULL_THRESHOLD", "15"))
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+NAME_WEIGHT = 2  # dish-name terms count twice
+
+
+def _terms(text: str) -> List[str]:
+    terms = []
+    for token in normalize_message(text).split():
+        terms.append(token)
+        # Cheap plural folding so "burgers" matches "burger"
+        if len(token) > 3 and token.endswith("s"):
+            terms.append(token[:-1])
+    return terms
+
+
+def _item_terms(item: Dict[str, Any]) -> List[str]:
+    parts = [item.get("description") or ""]
+    parts.extend(item.get("ingredients") or [])
+    parts.extend(item.get("allergens") or [])
+    return _terms(item.get("name") or "") * NAME_WEIGHT + _terms(" ".join(str(p) for p in parts))
+
+
+class MenuRetriever:
+    """BM25 index over one version of a restaurant's menu, precomputed once."""
+
+    def __init__(self, menu_items: List[Dict[str, Any]], formatted_items: List[str]):
+        self.formatted_items = formatted_items
+        self.names = [item.get("name") or "Unknown Dish" for item in menu_items]
+        self.term_freqs = [Counter(_item_terms(item)) for item in menu_items]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+
+        doc_freq = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(self.term_freqs)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+        self.postings: Dict[str, List[int]] = {}
+        for i, tf in enumerate(self.term_freqs):
+            for term in tf:
+                self.postings.setdefault(term, []).append(i)
+
+    def score(self, message: str) -> Dict[int, float]:
+        """BM25 score for every item sharing at least one term with the message."""
+        scores: Dict[int, float] = {}
+        for term in set(_terms(message)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i in self.postings[term]:
+                tf = self.term_freqs[i][term]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / (self.avg_length or 1.0))
+                scores[i] = scores.get(i, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def top_k(self, message: str, k: int = MENU_TOP_K) -> List[int]:
+        scores = self.score(message)
+        ranked = sorted(scores, key=lambda i: (-scores[i], i))
+        return ranked[:k]
+
+    def render(self, message: str, k: int = MENU_TOP_K, allow_full: bool = True) -> str:
+        """Menu section for the prompt: full menu if small, otherwise top-k plus a name index."""
+        if not self.formatted_items:
+            return "No menu items available."
+        if allow_full and len(self.formatted_items) <= max(MENU_FULL_THRESHOLD, k):
+            return "\n\n".join(self.formatted_items)
+        k = min(k, len(self.formatted_items))
+
+        selected = self.top_k(message, k)
+        if not selected:
+            # Nothing matched (e.g. "what do you recommend?"): show the first k dishes
+            selected = list(range(k))
+
+        selected_set = set(selected)
+        other_names = [name for i, name in enumerate(self.names) if i not in selected_set]
+        section = "\n\n".join(self.formatted_items[i] for i in selected)
+        if other_names:
+            section += "\n\nOther dishes on the menu (ask for details): " + ", ".join(other_names)
+        return section
+
+    def render_within(self, message: str, max_tokens: int) -> Tuple[str, bool]:
+        """
+        Render the menu section within a token budget.
+        Shrinks top-k one item at a time before cutting text; returns
+        (section, truncated).
+        """
+        section = self.render(message)
+        if estimate_tokens(section) <= max_tokens:
+            return section, False
+
+        for k in range(min(MENU_TOP_K, len(self.formatted_items)), 0, -1):
+            section = self.render(message, k, allow_full=False)
+            if estimate_tokens(section) <= max_tokens:
+                return section, True
+        return truncate_to_tokens(section, max_tokens), True
@@ -0,0 +1,193 @@
+"""
+Structured menu search.
+Keeps a per-restaurant in-memory index of the menu (text terms, ingredients,
+allergens, parsed numeric prices) so menus can be filtered server-side
+instead of shipping the whole Restaurant.data blob to every consumer.
+Indexes are built alongside the chat prompt context (one per data version,
+see services/prompt_cache.py), so the search endpoint and the chat pipeline
+share them. When a menu changes, only items whose content changed are re-parsed.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from services.allergen_matcher import infer_allergens
+from services.answer_cache import normalize_message
+from services.menu_retrieval import _terms
+
+# How long the search endpoint serves a cached index without re-reading the
+# restaurant row. Writes in this process invalidate immediately; writes made
+# by other workers show up after at most this long.
+MENU_SEARCH_REVALIDATE_SECONDS = float(os.getenv("MENU_SEARCH_REVALIDATE_SECONDS", "30"))
+
+_PRICE_NUMBER = re.compile(r"\d+(?:[.,]\d{1,2})?")
+
+
+def parse_price(price: Any) -> Optional[float]:
+    """First number in a price string ("$12.50", "12,50 €"), or None."""
+    if isinstance(price, (int, float)):
+        return float(price)
+    match = _PRICE_NUMBER.search(str(price or ""))
+    return float(match.group().replace(",", ".")) if match else None
+
+
+def _item_hash(item: Dict[str, Any]) -> str:
+    payload = json.dumps(item, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _IndexedItem:
+    """Parsed, search-ready view of one menu item."""
+
+    def __init__(self, item: Dict[str, Any]):
+        self.item = item
+        self.name_terms = set(_terms(item.get("name") or ""))
+        self.text_terms = self.name_terms | set(_terms(item.get("description") or ""))
+        self.ingredient_terms = set(_terms(" ".join(str(i) for i in item.get("ingredients") or [])))
+        self.allergens = {str(a).strip().lower() for a in item.get("allergens") or []}
+        self.price = parse_price(item.get("price"))
+
+
+class MenuSearchIndex:
+    """Inverted indexes over one version of a restaurant's menu."""
+
+    def __init__(self, version: str, entries: List[Tuple[str, _IndexedItem]]):
+        self.version = version
+        self.entries = entries
+        self.text_index: Dict[str, Set[int]] = defaultdict(set)
+        self.ingredient_index: Dict[str, Set[int]] = defaultdict(set)
+        self.allergen_index: Dict[str, Set[int]] = defaultdict(set)
+        priced = []
+        for i, (_, entry) in enumerate(entries):
+            for term in entry.text_terms:
+                self.text_index[term].add(i)
+            for term in entry.ingredient_terms:
+                self.ingredient_index[term].add(i)
+            for allergen in entry.allergens:
+                self.allergen_index[allergen].add(i)
+            if entry.price is not None:
+                priced.append((entry.price, i))
+        priced.sort()
+        self.prices = [price for price, _ in priced]
+        self.price_positions = [i for _, i in priced]
+
+    @property
+    def item_hashes(self) -> Dict[str, _IndexedItem]:
+        return {item_hash: entry for item_hash, entry in self.entries}
+
+    def _all_terms(self, index: Dict[str, Set[int]], text: str) -> Optional[Set[int]]:
+        """Items matching every word of text, None if text has no words."""
+        result = None
+        for word in set(normalize_message(text).split()):
+            matches = index.get(word, set())
+            if len(word) > 3 and word.endswith("s"):
+                # "burgers" also matches "burger"
+                matches = matches | index.get(word[:-1], set())
+            result = matches if result is None else result & matches
+        return result
+
+    def search(self, q: Optional[str] = None, ingredient: Optional[str] = None,
+               exclude_allergens: Iterable[str] = (), min_price: Optional[float] = None,
+               max_price: Optional[float] = None, limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """Return (total matches, first `limit` matching items)."""
+        candidates: Optional[Set[int]] = None
+
+        for index, text in ((self.text_index, q), (self.ingredient_index, ingredient)):
+            if text:
+                matches = self._all_terms(index, text)
+                if matches is not None:
+                    candidates = matches if candidates is None else candidates & matches
+
+        if min_price is not None or max_price is not None:
+            lo = bisect.bisect_left(self.prices, min_price) if min_price is not None else 0
+            hi = bisect.bisect_right(self.prices, max_price) if max_price is not None else len(self.prices)
+            in_range = set(self.price_positions[lo:hi])
+            candidates = in_range if candidates is None else candidates & in_range
+
+        if candidates is None:
+            candidates = set(range(len(self.entries)))
+        for allergen in exclude_allergens:
+            allergen = allergen.strip().lower()
+            if allergen:
+                # "peanut" excludes items tagged "peanuts" too
+                for name in {allergen, *infer_allergens([allergen])}:
+                    candidates -= self.allergen_index.get(name, set())
+
+        # Dish-name matches first, then menu order
+        query_terms = set(_terms(q or ""))
+        ranked = sorted(candidates, key=lambda i: (-len(query_terms & self.entries[i][1].name_terms), i))
+        return len(ranked), [self.entries[i][1].item for i in ranked[:limit]]
+
+
+class MenuSearchRegistry:
+    """
+    Latest search index per restaurant, rebuilt incrementally on menu changes.
+    LRU-bounded like the prompt cache that holds the indexes in use.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._indexes: "OrderedDict[str, MenuSearchIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.items_parsed = 0
+        self.items_reused = 0
+
+    def get(self, restaurant_id: str, menu: List[Dict[str, Any]], version: str) -> MenuSearchIndex:
+        """
+        Index for a normalized menu at the given data version (the prompt
+        cache's), reusing the parsed items of the restaurant's previous index.
+        """
+        with self._lock:
+            current = self._indexes.get(restaurant_id)
+            if current is not None:
+                self._indexes.move_to_end(restaurant_id)
+        if current is not None and current.version == version:
+            return current
+
+        previous = current.item_hashes if current is not None else {}
+        entries = []
+        parsed = 0
+        for item in menu:
+            if not isinstance(item, dict):
+                continue
+            item_hash = _item_hash(item)
+            entry = previous.get(item_hash)
+            if entry is None:
+                entry = _IndexedItem(item)
+                parsed += 1
+            entries.append((item_hash, entry))
+
+        index = MenuSearchIndex(version, entries)
+        with self._lock:
+            self._indexes[restaurant_id] = index
+            self._indexes.move_to_end(restaurant_id)
+            while len(self._indexes) > self.max_entries:
+                self._indexes.popitem(last=False)
+            self.builds += 1
+            self.items_parsed += parsed
+            self.items_reused += len(entries) - parsed
+        return index
+
+    def invalidate(self, restaurant_id: str) -> None:
+        with self._lock:
+            self._indexes.pop(restaurant_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "restaurants": len(self._indexes),
+                "builds": self.builds,
+                "items_parsed": self.items_parsed,
+                "items_reused": self.items_reused,
+            }
+
+
+# Global instance
+menu_search = MenuSearchRegistry()
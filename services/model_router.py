@@ -0,0 +1,260 @@
+"""
+Model routing for chat answers.
+Sends short, simple messages to a fast model and dietary/complex questions to
+the strong model, enforces a per-request deadline, and hedges a slow strong
+call with a fast-model request (except for dietary/allergy questions).
+Per-tier latency percentiles are kept so the thresholds can be tuned against
+the latency SLO.
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Tuple
+
+from services.allergen_matcher import KNOWN_ALLERGENS, _stem
+from services.answer_cache import normalize_message
+from services.stats import summarize
+
+FAST = "fast"
+STRONG = "strong"
+
+CHAT_FAST_MODEL = os.getenv("CHAT_FAST_MODEL", "gpt-3.5-turbo")
+CHAT_STRONG_MODEL = os.getenv("CHAT_STRONG_MODEL", "gpt-4")
+# Whole-request deadline, and how long the strong model gets before a fast hedge is fired
+CHAT_DEADLINE_SECONDS = float(os.getenv("CHAT_DEADLINE_SECONDS", "15"))
+CHAT_HEDGE_AFTER_SECONDS = float(os.getenv("CHAT_HEDGE_AFTER_SECONDS", "6"))
+# Messages up to this many words without complex keywords go to the fast model
+CHAT_FAST_MAX_WORDS = int(os.getenv("CHAT_FAST_MAX_WORDS", "12"))
+
+LATENCY_SAMPLES = 1000
+
+# Every known allergen, singular or plural ("egg"/"eggs", "tree nut"/"tree nuts")
+_ALLERGEN_WORDS = "|".join(
+    re.escape(_stem(allergen)) + "s?" for allergen in sorted(KNOWN_ALLERGENS, key=len, reverse=True)
+)
+# Questions where a wrong answer can hurt someone always get the strong model,
+# and are never hedged to the fast one
+SAFETY_PATTERN = re.compile(
+    r"\b(" + _ALLERGEN_WORDS + r"|allerg\w*|gluten|celiac|coeliac|vegan|vegetarian|"
+    r"lactose|dairy|nuts?|halal|kosher|pregnan\w*|diabet\w*|intoleran\w*|"
+    r"ingredients?|contains?|safe)\b"
+)
+COMPLEX_PATTERN = re.compile(r"\b(recommend\w*|compare|difference|why)\b")
+
+
+def is_safety_question(message: str) -> bool:
+    """True for dietary/allergy questions, which only the strong model may answer."""
+    return bool(SAFETY_PATTERN.search(normalize_message(message)))
+
+
+def choose_tier(message: str) -> str:
+    """Pick the model tier for a customer message."""
+    normalized = normalize_message(message)
+    if SAFETY_PATTERN.search(normalized) or COMPLEX_PATTERN.search(normalized):
+        return STRONG
+    if len(normalized.split()) <= CHAT_FAST_MAX_WORDS:
+        return FAST
+    return STRONG
+
+
+class DeadlineExceeded(TimeoutError):
+    """No model answered within the request deadline."""
+
+
+class _TierStats:
+    def __init__(self):
+        self.latency_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.routed = 0
+        self.answered = 0
+        self.errors = 0
+
+
+class ModelRouter:
+    """
+    Routes chat completions to a model tier with a deadline and hedging.
+    `call(model, timeout)` performs the actual OpenAI request; the timeout is
+    the time left until the deadline, so abandoned requests end with it.
+    """
+
+    def __init__(self, fast_model: str = CHAT_FAST_MODEL, strong_model: str = CHAT_STRONG_MODEL,
+                 deadline_seconds: float = CHAT_DEADLINE_SECONDS,
+                 hedge_after_seconds: float = CHAT_HEDGE_AFTER_SECONDS):
+        self.models = {FAST: fast_model, STRONG: strong_model}
+        self.deadline_seconds = deadline_seconds
+        self.hedge_after_seconds = hedge_after_seconds
+        self._tiers: Dict[str, _TierStats] = {FAST: _TierStats(), STRONG: _TierStats()}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.deadline_exceeded = 0
+
+    def _record(self, tier: str, started_at: float, ok: bool) -> None:
+        with self._lock:
+            stats = self._tiers[tier]
+            if ok:
+                stats.latency_ms.append(round((time.perf_counter() - started_at) * 1000, 1))
+            else:
+                stats.errors += 1
+
+    def _won(self, tier: str, primary: str) -> None:
+        with self._lock:
+            self._tiers[tier].answered += 1
+            if tier != primary:
+                self.hedge_wins += 1
+
+    def _should_hedge(self, primary: str, started_at: float, failed: bool, safety: bool) -> bool:
+        if primary == FAST or safety:
+            return False
+        return failed or time.perf_counter() - started_at >= self.hedge_after_seconds
+
+    def route(self, message: str) -> Tuple[str, str]:
+        """(tier, model) for a message; counts it as routed to that tier."""
+        tier = choose_tier(message)
+        with self._lock:
+            self._tiers[tier].routed += 1
+        return tier, self.models[tier]
+
+    def record_stream(self, tier: str, started_at: float, ok: bool) -> None:
+        """Record a streamed completion (routed with route(), never hedged) in the tier stats."""
+        self._record(tier, started_at, ok)
+        if ok:
+            self._won(tier, tier)
+
+    def _timed_call(self, tier: str, call: Callable[[str, float], Any], deadline: float) -> Any:
+        started_at = time.perf_counter()
+        try:
+            result = call(self.models[tier], max(deadline - started_at, 0.1))
+        except Exception:
+            self._record(tier, started_at, ok=False)
+            raise
+        self._record(tier, started_at, ok=True)
+        return result
+
+    def complete(self, message: str, call: Callable[[str, float], Any]) -> Tuple[Any, str]:
+        """Blocking completion; returns (response, model that answered)."""
+        primary, _ = self.route(message)
+        safety = is_safety_question(message)
+        started_at = time.perf_counter()
+        deadline = started_at + self.deadline_seconds
+        pending = {self._executor.submit(self._timed_call, primary, call, deadline): primary}
+        hedged = False
+        error = None
+
+        while pending:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if not hedged and primary == STRONG and not safety:
+                timeout = min(timeout, max(started_at + self.hedge_after_seconds - now, 0))
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                tier = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                self._won(tier, primary)
+                return result, self.models[tier]
+
+            if not hedged and self._should_hedge(primary, started_at, error is not None, safety):
+                hedged = True
+                with self._lock:
+                    self.hedges += 1
+                print(f"⏱️ Hedging {self.models[primary]} with {self.models[FAST]}")
+                pending[self._executor.submit(self._timed_call, FAST, call, deadline)] = FAST
+
+        if not pending and error is not None:
+            raise error
+        with self._lock:
+            self.deadline_exceeded += 1
+        raise DeadlineExceeded(f"No model answered within {self.deadline_seconds}s")
+
+    async def complete_async(self, message: str,
+                             call: Callable[[str, float], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Async counterpart of complete(); the losing request is cancelled."""
+        primary, _ = self.route(message)
+        safety = is_safety_question(message)
+        started_at = time.perf_counter()
+        deadline = started_at + self.deadline_seconds
+
+        async def timed_call(tier: str) -> Any:
+            call_started = time.perf_counter()
+            try:
+                result = await call(self.models[tier], max(deadline - call_started, 0.1))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._record(tier, call_started, ok=False)
+                raise
+            self._record(tier, call_started, ok=True)
+            return result
+
+        pending = {asyncio.ensure_future(timed_call(primary)): primary}
+        hedged = False
+        error = None
+        try:
+            while pending:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                timeout = deadline - now
+                if not hedged and primary == STRONG and not safety:
+                    timeout = min(timeout, max(started_at + self.hedge_after_seconds - now, 0))
+
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tier = pending.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    self._won(tier, primary)
+                    return task.result(), self.models[tier]
+
+                if not hedged and self._should_hedge(primary, started_at, error is not None, safety):
+                    hedged = True
+                    with self._lock:
+                        self.hedges += 1
+                    print(f"⏱️ Hedging {self.models[primary]} with {self.models[FAST]}")
+                    pending[asyncio.ensure_future(timed_call(FAST))] = FAST
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if not pending and error is not None:
+            raise error
+        with self._lock:
+            self.deadline_exceeded += 1
+        raise DeadlineExceeded(f"No model answered within {self.deadline_seconds}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "deadline_seconds": self.deadline_seconds,
+                "hedge_after_seconds": self.hedge_after_seconds,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "deadline_exceeded": self.deadline_exceeded,
+                "tiers": {
+                    tier: {
+                        "model": self.models[tier],
+                        "routed": stats.routed,
+                        "answered": stats.answered,
+                        "errors": stats.errors,
+                        "latency_ms": summarize(stats.latency_ms),
+                    }
+                    for tier, stats in self._tiers.items()
+                },
+            }
+
+
+# Global instance for chat answers
+model_router = ModelRouter()
@@ -0,0 +1,141 @@
+"""
+Prompt-context cache for the chat pipeline.
+Compiles the restaurant-specific part of the OpenAI prompt once per version
+of Restaurant.data instead of re-building it on every chat message.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def compute_data_version(data: Optional[Dict[str, Any]]) -> str:
+    """Return a stable content hash for a Restaurant.data blob."""
+    payload = json.dumps(data or {}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class PromptContext:
+    """Compiled, prompt-ready view of one version of a restaurant's data."""
+
+    def __init__(self, restaurant_id: str, version: str, menu_items: List[Dict[str, Any]],
+                 restaurant_info: str, menu_text: str, fact_index: Any = None, retriever: Any = None,
+                 search_index: Any = None):
+        self.restaurant_id = restaurant_id
+        self.version = version
+        self.menu_items = menu_items
+        self.restaurant_info = restaurant_info
+        self.menu_text = menu_text
+        self.fact_index = fact_index  # services.fact_engine.FactIndex for this version
+        self.retriever = retriever  # services.menu_retrieval.MenuRetriever for this version
+        self.search_index = search_index  # services.menu_search.MenuSearchIndex for this version
+        self.validated_at = time.monotonic()  # last time version was checked against the data
+
+    @property
+    def prompt_block(self) -> str:
+        """Restaurant info and the full menu, as sent before relevance filtering."""
+        return f"{self.restaurant_info}\n\nMenu:\n{self.menu_text}"
+
+    def render_menu(self, message: str, max_tokens: Optional[int] = None) -> Tuple[str, bool]:
+        """
+        Menu section relevant to this customer message, optionally capped at
+        max_tokens. Returns (section, truncated).
+        """
+        if self.retriever is None:
+            return self.menu_text, False
+        if max_tokens is None:
+            return self.retriever.render(message), False
+        return self.retriever.render_within(message, max_tokens)
+
+
+class PromptContextCache:
+    """
+    Thread-safe LRU cache of PromptContext objects keyed by restaurant_id.
+    An entry is only served while its version matches the current data hash,
+    so a stale entry can never leak into a prompt even without invalidation.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, PromptContext]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.peek_hits = 0  # kept apart from hits, which measure chat prompt reuse
+        self.peek_misses = 0
+
+    def get_or_build(
+        self,
+        restaurant_id: str,
+        data: Optional[Dict[str, Any]],
+        builder: Callable[[str, Dict[str, Any], str], PromptContext],
+    ) -> PromptContext:
+        """Return the cached context for this data version, building it on a miss."""
+        version = compute_data_version(data)
+
+        with self._lock:
+            context = self._entries.get(restaurant_id)
+            if context is not None and context.version == version:
+                self._entries.move_to_end(restaurant_id)
+                context.validated_at = time.monotonic()
+                self.hits += 1
+                return context
+            self.misses += 1
+
+        # Build outside the lock so one large menu doesn't serialize every tenant
+        context = builder(restaurant_id, data or {}, version)
+
+        with self._lock:
+            self._entries[restaurant_id] = context
+            self._entries.move_to_end(restaurant_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return context
+
+    def peek(self, restaurant_id: str, max_age: float) -> Optional[PromptContext]:
+        """
+        Cached context whose version was checked against the restaurant's data
+        within the last max_age seconds, without hashing the data again.
+        Invalidation on writes still applies; None means: load the data and
+        call get_or_build.
+        """
+        with self._lock:
+            context = self._entries.get(restaurant_id)
+            if context is None or time.monotonic() - context.validated_at > max_age:
+                self.peek_misses += 1
+                return None
+            self._entries.move_to_end(restaurant_id)
+            self.peek_hits += 1
+            return context
+
+    def invalidate(self, restaurant_id: str) -> None:
+        """Drop the cached context for a restaurant (called on data writes)."""
+        with self._lock:
+            if self._entries.pop(restaurant_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "peek_hits": self.peek_hits,
+                "peek_misses": self.peek_misses,
+            }
+
+
+# Global instance
+prompt_cache = PromptContextCache()
@@ -0,0 +1,143 @@
+"""
+Retrieval-augmented prompts for the chat pipeline.
+When CHAT_RAG_ENABLED is set, the customer message is embedded and the
+vector store queried (pinecone_utils.query_pinecone) on a small thread pool,
+started before the conversation context is loaded from the database. The
+prompt is then built from the top-k retrieved restaurant chunks plus the
+client's preference vector instead of the keyword-filtered full menu.
+Retrieval latency and the time the request actually waited for it are
+tracked separately, so the overlap with the database load is visible.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pinecone_utils import query_pinecone
+from services.stats import summarize
+from services.token_budget import estimate_tokens, truncate_to_tokens
+
+CHAT_RAG_ENABLED = os.getenv("CHAT_RAG_ENABLED", "false").lower() in ("1", "true", "yes")
+CHAT_RAG_TOP_K = int(os.getenv("CHAT_RAG_TOP_K", "5"))
+# Longest a request waits for retrieval before falling back to the menu prompt
+CHAT_RAG_TIMEOUT_SECONDS = float(os.getenv("CHAT_RAG_TIMEOUT_SECONDS", "2"))
+CHAT_RAG_MAX_WORKERS = int(os.getenv("CHAT_RAG_MAX_WORKERS", "8"))
+
+LATENCY_SAMPLES = 1000
+
+
+class RetrievedContext:
+    """Retrieved chunk texts, split into restaurant content and client preferences."""
+
+    def __init__(self, matches: List[Any]):
+        self.restaurant_chunks: List[str] = []
+        self.client_preferences: List[str] = []
+        for match in matches:
+            metadata = (match.get("metadata") if isinstance(match, dict) else getattr(match, "metadata", None)) or {}
+            text = metadata.get("text")
+            if not text:
+                continue
+            if metadata.get("type") == "client_preferences":
+                self.client_preferences.append(text)
+            else:
+                self.restaurant_chunks.append(text)
+
+    def render(self, max_tokens: int) -> Tuple[str, bool]:
+        """Prompt section within max_tokens; returns (text, truncated)."""
+        sections = ["\n\n".join(self.restaurant_chunks)]
+        if self.client_preferences:
+            sections.append("Customer preferences:\n" + "\n".join(self.client_preferences))
+        text = "\n\n".join(sections)
+        if estimate_tokens(text) <= max_tokens:
+            return text, False
+        return truncate_to_tokens(text, max_tokens), True
+
+
+class PendingRetrieval:
+    """A retrieval running in the background for one chat request."""
+
+    def __init__(self, retriever: "RAGRetriever", future: "Future[RetrievedContext]"):
+        self._retriever = retriever
+        self._future = future
+        self._consumed = False
+
+    def result(self, timeout: float = CHAT_RAG_TIMEOUT_SECONDS) -> Optional[RetrievedContext]:
+        """Retrieved context, or None on error or timeout (callers fall back to the menu prompt)."""
+        if self._consumed:
+            return None
+        self._consumed = True
+        started = time.perf_counter()
+        try:
+            return self._future.result(timeout)
+        except FutureTimeout:
+            self._retriever._count("timeouts")
+            print(f"⏱️ Retrieval slower than {timeout}s - using the menu prompt")
+        except Exception as e:
+            self._retriever._count("errors")
+            print(f"⚠️ Retrieval failed - using the menu prompt: {e}")
+        finally:
+            self._retriever._record_wait(time.perf_counter() - started)
+        return None
+
+
+class RAGRetriever:
+    def __init__(self, enabled: bool = CHAT_RAG_ENABLED, top_k: int = CHAT_RAG_TOP_K,
+                 max_workers: int = CHAT_RAG_MAX_WORKERS):
+        self.enabled = enabled
+        self.top_k = top_k
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rag")
+        self._lock = threading.Lock()
+        self._retrieval_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._wait_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.started = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def start(self, restaurant_id: str, client_id: Any, message: str) -> Optional[PendingRetrieval]:
+        """Kick off retrieval for a customer message; None when RAG is disabled."""
+        if not self.enabled:
+            return None
+        self._count("started")
+        return PendingRetrieval(self, self._executor.submit(self._retrieve, restaurant_id, client_id, message))
+
+    def _retrieve(self, restaurant_id: str, client_id: Any, message: str) -> RetrievedContext:
+        started = time.perf_counter()
+        try:
+            results = query_pinecone(restaurant_id, client_id, message, top_k=self.top_k)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self._retrieval_ms.append(elapsed_ms)
+        matches = results.get("matches") if isinstance(results, dict) else getattr(results, "matches", None)
+        return RetrievedContext(matches or [])
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self._wait_ms.append(seconds * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            retrieval = summarize(round(ms, 2) for ms in self._retrieval_ms)
+            waited = summarize(round(ms, 2) for ms in self._wait_ms)
+            return {
+                "enabled": self.enabled,
+                "top_k": self.top_k,
+                "started": self.started,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                # Time spent retrieving vs. time requests actually blocked on it
+                "retrieval_ms": retrieval,
+                "critical_path_wait_ms": waited,
+            }
+
+
+# Global instance
+rag_retriever = RAGRetriever()
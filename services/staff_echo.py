@@ -0,0 +1,110 @@
+"""
+In-memory record of recent staff (restaurant) messages per conversation.
+Used by chat_service to detect a staff message echoed back as a client
+message without querying chat_messages on every client message.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Optional, Tuple
+
+# Client messages equal to a staff message this recent are treated as echoes
+STAFF_ECHO_WINDOW_SECONDS = 10
+# Ring buffer size per conversation and cap on tracked conversations
+STAFF_ECHO_BUFFER_SIZE = int(os.getenv("STAFF_ECHO_BUFFER_SIZE", "16"))
+STAFF_ECHO_MAX_CONVERSATIONS = int(os.getenv("STAFF_ECHO_MAX_CONVERSATIONS", "10000"))
+
+
+def _message_hash(message: str) -> bytes:
+    return hashlib.sha256(message.strip().encode("utf-8")).digest()
+
+
+class StaffEchoBuffer:
+    """
+    Bounded ring buffer of (timestamp, hash) of recent staff messages per
+    (restaurant_id, client_id), filled on the write paths.
+
+    Staff messages written before this process started are not in the buffer,
+    so for the first window after startup a miss is not authoritative and
+    callers fall back to the database (see needs_db_fallback()).
+    """
+
+    def __init__(self, window_seconds: float = STAFF_ECHO_WINDOW_SECONDS,
+                 buffer_size: int = STAFF_ECHO_BUFFER_SIZE,
+                 max_conversations: int = STAFF_ECHO_MAX_CONVERSATIONS):
+        self.window_seconds = window_seconds
+        self.buffer_size = buffer_size
+        self.max_conversations = max_conversations
+        self.started_at = time.monotonic()
+        self._buffers: "OrderedDict[Tuple[str, str], Deque[Tuple[float, bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.hits = 0
+        self.misses = 0
+        self.db_fallbacks = 0
+
+    def needs_db_fallback(self) -> bool:
+        """True until the process has been up for a full echo window."""
+        return time.monotonic() - self.started_at < self.window_seconds
+
+    def record(self, restaurant_id: str, client_id, message: str) -> None:
+        """Remember a staff message that was just written for this conversation."""
+        key = (restaurant_id, str(client_id))
+        now = time.monotonic()
+        with self._lock:
+            buffer = self._buffers.pop(key, None)
+            if buffer is None:
+                buffer = deque(maxlen=self.buffer_size)
+            buffer.append((now, _message_hash(message)))
+            self._buffers[key] = buffer  # most recently written last
+            self.recorded += 1
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        # Oldest-written conversations first; stop at the first one still in its window
+        while self._buffers:
+            key, buffer = next(iter(self._buffers.items()))
+            expired = now - buffer[-1][0] > self.window_seconds
+            if not expired and len(self._buffers) <= self.max_conversations:
+                break
+            del self._buffers[key]
+
+    def matches(self, restaurant_id: str, client_id, message: str) -> Optional[bool]:
+        """
+        True if message equals a staff message written within the window,
+        False if it does not, None if the buffer cannot tell yet (startup)
+        and the caller must check the database.
+        """
+        cutoff = time.monotonic() - self.window_seconds
+        digest = _message_hash(message)
+        with self._lock:
+            buffer = self._buffers.get((restaurant_id, str(client_id)))
+            found = buffer is not None and any(
+                ts >= cutoff and h == digest for ts, h in buffer
+            )
+            if found:
+                self.hits += 1
+                return True
+            if self.needs_db_fallback():
+                self.db_fallbacks += 1
+                return None
+            self.misses += 1
+            return False
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "conversations": len(self._buffers),
+                "recorded": self.recorded,
+                "echo_hits": self.hits,
+                "misses": self.misses,
+                "db_fallbacks": self.db_fallbacks,
+                "warming_up": self.needs_db_fallback(),
+            }
+
+
+# Global instance
+staff_echo = StaffEchoBuffer()
@@ -0,0 +1,137 @@
+"""
+Token budget accounting for chat prompts.
+Estimates prompt size before sending, enforces a per-restaurant prompt
+budget, and records actual prompt/completion usage reported by OpenAI.
+"""
+
+import json
+import os
+import threading
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional
+
+from services.stats import summarize
+
+try:
+    import tiktoken
+except ImportError:  # In requirements.txt; without it, fall back to a character-based estimate
+    tiktoken = None
+
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "3000"))
+# JSON object of per-restaurant overrides, e.g. '{"big_bistro": 4500}'
+CHAT_PROMPT_TOKEN_BUDGETS = json.loads(os.getenv("CHAT_PROMPT_TOKEN_BUDGETS", "{}") or "{}")
+CHAT_MAX_MESSAGE_TOKENS = int(os.getenv("CHAT_MAX_MESSAGE_TOKENS", "400"))
+# Longest restaurant story kept in the prompt (hours and contact come after it)
+CHAT_MAX_STORY_TOKENS = int(os.getenv("CHAT_MAX_STORY_TOKENS", "300"))
+# Part of the budget kept for the menu section whatever the restaurant info costs
+CHAT_MIN_MENU_TOKENS = int(os.getenv("CHAT_MIN_MENU_TOKENS", "600"))
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 8  # role/formatting tokens per chat message
+SAMPLES_PER_RESTAURANT = 1000
+
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        try:
+            _encoding = tiktoken.encoding_for_model("gpt-4")
+        except Exception:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of text, exact with tiktoken, approximate without it."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_messages_tokens(messages: list) -> int:
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens."""
+    if max_tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[:max_tokens]).rstrip() + " …"
+    return text[:max_tokens * CHARS_PER_TOKEN].rstrip() + " …"
+
+
+def get_prompt_budget(restaurant_id: str) -> int:
+    return int(CHAT_PROMPT_TOKEN_BUDGETS.get(restaurant_id, CHAT_PROMPT_TOKEN_BUDGET))
+
+
+class _RestaurantUsage:
+    def __init__(self):
+        self.prompt_tokens: Deque[int] = deque(maxlen=SAMPLES_PER_RESTAURANT)
+        self.completion_tokens: Deque[int] = deque(maxlen=SAMPLES_PER_RESTAURANT)
+        self.estimate_error: Deque[int] = deque(maxlen=SAMPLES_PER_RESTAURANT)
+        self.requests = 0
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+        self.truncated_messages = 0
+        self.truncated_menus = 0
+
+
+class TokenUsageTracker:
+    """Per-restaurant distribution of prompt and completion tokens."""
+
+    def __init__(self):
+        self._usage: Dict[str, _RestaurantUsage] = defaultdict(_RestaurantUsage)
+        self._lock = threading.Lock()
+
+    def record(self, restaurant_id: str, estimated_prompt_tokens: int, usage: Any = None,
+               truncated_message: bool = False, truncated_menu: bool = False) -> None:
+        """Record one LLM call; `usage` is the OpenAI usage object when available."""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+
+        with self._lock:
+            stats = self._usage[restaurant_id]
+            stats.requests += 1
+            stats.prompt_tokens.append(prompt_tokens or estimated_prompt_tokens)
+            stats.completion_tokens.append(completion_tokens)
+            if prompt_tokens:
+                stats.estimate_error.append(estimated_prompt_tokens - prompt_tokens)
+            stats.total_prompt_tokens += prompt_tokens or estimated_prompt_tokens
+            stats.total_completion_tokens += completion_tokens
+            stats.truncated_messages += int(truncated_message)
+            stats.truncated_menus += int(truncated_menu)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                restaurant_id: {
+                    "requests": usage.requests,
+                    "budget": get_prompt_budget(restaurant_id),
+                    "prompt_tokens": summarize(usage.prompt_tokens),
+                    "completion_tokens": summarize(usage.completion_tokens),
+                    "estimate_error": summarize(usage.estimate_error),
+                    "total_prompt_tokens": usage.total_prompt_tokens,
+                    "total_completion_tokens": usage.total_completion_tokens,
+                    "truncated_messages": usage.truncated_messages,
+                    "truncated_menus": usage.truncated_menus,
+                }
+                for restaurant_id, usage in self._usage.items()
+            }
+
+
+def tokenizer_name() -> Optional[str]:
+    encoding = _get_encoding()
+    return encoding.name if encoding is not None else None
+
+
+# Global instance
+token_usage = TokenUsageTracker()
@@ -0,0 +1,104 @@
+"""
+Incremental re-indexing of restaurant data in the vector store.
+Chunk ids are content hashes (see pinecone_utils.restaurant_chunks), so the
+ids recorded in restaurant_index_state after the last indexing run tell
+exactly which chunks are new, gone or unchanged after an update. Only new
+chunks are embedded and upserted, and only removed ones are deleted.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+from pinecone_utils import (
+    delete_restaurant_vectors,
+    delete_vectors,
+    insert_restaurant_data,
+    restaurant_chunks,
+    restaurant_namespace,
+    upsert_chunks,
+)
+
+Chunk = Tuple[str, str, Dict[str, Any]]
+
+
+class ReindexPlan:
+    """Chunks to upsert and vector ids to delete to bring the index up to date."""
+
+    def __init__(self, chunks: List[Chunk], indexed_ids: Optional[List[str]]):
+        self.chunk_ids = [chunk_id for chunk_id, _, _ in chunks]
+        # No recorded state: the index may hold anything (legacy vectors,
+        # a failed earlier run), so rebuild the restaurant from scratch
+        self.full = indexed_ids is None
+        indexed = set(indexed_ids or [])
+        current = set(self.chunk_ids)
+        self.to_upsert = chunks if self.full else [chunk for chunk in chunks if chunk[0] not in indexed]
+        self.to_delete = [] if self.full else sorted(indexed - current)
+        self.unchanged = 0 if self.full else len(current & indexed)
+
+    @property
+    def changed(self) -> bool:
+        return self.full or bool(self.to_upsert or self.to_delete)
+
+    def counts(self) -> Dict[str, Any]:
+        return {
+            "upserted": len(self.to_upsert),
+            "deleted": len(self.to_delete),
+            "unchanged": self.unchanged,
+            "full_rebuild": self.full,
+        }
+
+
+def _indexed_ids(db: Session, restaurant_id: str) -> Optional[List[str]]:
+    state = db.query(models.RestaurantIndexState).filter(
+        models.RestaurantIndexState.restaurant_id == restaurant_id
+    ).first()
+    return None if state is None else list(state.chunk_ids or [])
+
+
+def plan_reindex(db: Session, restaurant_id: str, data: Dict[str, Any]) -> ReindexPlan:
+    """Diff the restaurant's data against its last indexed state (no embedding, no network)."""
+    return ReindexPlan(restaurant_chunks(restaurant_id, data or {}), _indexed_ids(db, restaurant_id))
+
+
+def reindex_restaurant(db: Session, restaurant_id: str, data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Bring the vector store in line with data (None: the restaurant is gone)
+    and record the new state in db's transaction; the caller commits.
+    """
+    state = db.query(models.RestaurantIndexState).filter(
+        models.RestaurantIndexState.restaurant_id == restaurant_id
+    ).first()
+
+    namespace = restaurant_namespace(restaurant_id)
+
+    if data is None:
+        # Without recorded state there is nothing to diff against (never
+        # indexed per chunk, or the state row is gone), so drop the whole
+        # namespace and any legacy vectors either way
+        deleted = len(state.chunk_ids or []) if state is not None else 0
+        delete_restaurant_vectors(restaurant_id)
+        if state is not None:
+            db.delete(state)
+        print(f"🗑️ Deleted vectors of restaurant {restaurant_id}")
+        return {"upserted": 0, "deleted": deleted, "unchanged": 0, "full_rebuild": False}
+
+    chunks = restaurant_chunks(restaurant_id, data)
+    plan = ReindexPlan(chunks, None if state is None else list(state.chunk_ids or []))
+    if plan.full:
+        insert_restaurant_data(restaurant_id, data)
+    else:
+        if plan.to_upsert:
+            upsert_chunks(plan.to_upsert, namespace=namespace)
+        if plan.to_delete:
+            delete_vectors(plan.to_delete, namespace=namespace)
+
+    if state is None:
+        db.add(models.RestaurantIndexState(restaurant_id=restaurant_id, chunk_ids=plan.chunk_ids))
+    else:
+        state.chunk_ids = plan.chunk_ids
+
+    counts = plan.counts()
+    print(f"🔄 Reindexed restaurant {restaurant_id}: {counts}")
+    return counts
@@ -0,0 +1,53 @@
+import pytest
+
+from services.allergen_matcher import infer_allergens
+from services.menu_normalizer import apply_menu_fallbacks
+from services.menu_search import MenuSearchRegistry
+
+
+@pytest.mark.parametrize("ingredient, expected", [
+    ("buttermilk", ["milk"]),
+    ("whole milk", ["milk"]),
+    ("soybean oil", ["soy"]),
+    ("soy sauce", ["soy"]),
+    ("peanut", ["peanuts"]),
+    ("peanuts", ["peanuts"]),
+    ("peanut butter", ["peanuts"]),
+    ("eggs", ["egg"]),
+    ("wholewheat flour", ["wheat"]),
+    ("catfish", ["fish"]),
+    ("shellfish stock", ["shellfish"]),
+    ("tree  nut mix", ["tree nuts"]),
+])
+def test_infers_allergen_inside_words(ingredient, expected):
+    assert infer_allergens([ingredient]) == expected
+
+
+@pytest.mark.parametrize("ingredient", ["buckwheat", "buckwheat noodles", "eggplant", "veggie broth", "parmigiano reggiano"])
+def test_known_false_positives_are_ignored(ingredient):
+    assert infer_allergens([ingredient]) == []
+
+
+def test_false_positive_does_not_hide_real_allergen():
+    assert infer_allergens(["buckwheat", "wheat flour"]) == ["wheat"]
+    assert infer_allergens(["eggplant", "egg yolk"]) == ["egg"]
+
+
+def test_ingredients_do_not_join_across_items():
+    assert infer_allergens(["tree", "nuts"]) == []
+
+
+def test_menu_search_excludes_inferred_allergens():
+    registry = MenuSearchRegistry()
+    index = registry.get("r1", apply_menu_fallbacks([
+        {"name": "Buttermilk Pancakes", "ingredients": ["buttermilk", "flour"], "price": "9"},
+        {"name": "Tofu Stir Fry", "ingredients": ["tofu", "soybean oil"], "price": "12"},
+        {"name": "Buckwheat Crepe", "ingredients": ["buckwheat", "eggplant"], "price": "11"},
+    ]), "v1")
+
+    total, items = index.search(exclude_allergens=["milk", "soy"])
+    assert total == 1
+    assert items[0]["name"] == "Buckwheat Crepe"
+
+    _, items = index.search(exclude_allergens=["wheat", "egg"])
+    assert "Buckwheat Crepe" in [item["name"] for item in items]
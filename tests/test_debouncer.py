@@ -0,0 +1,91 @@
+import asyncio
+
+from services.debouncer import MessageDebouncer
+
+
+def test_burst_is_flushed_once_with_every_message():
+    debouncer = MessageDebouncer(window_seconds=0.05, max_wait_seconds=1)
+    flushed = []
+
+    async def flush(messages):
+        flushed.append(list(messages))
+
+    async def main():
+        for message in ["hi", "do you have", "gluten free pasta?"]:
+            debouncer.submit(("r1", "c1"), message, flush)
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.15)
+
+    asyncio.run(main())
+    assert flushed == [["hi", "do you have", "gluten free pasta?"]]
+    assert debouncer.stats()["merged_messages"] == 2
+    assert debouncer.stats()["pending_conversations"] == 0
+
+
+def test_conversations_are_debounced_separately():
+    debouncer = MessageDebouncer(window_seconds=0.05, max_wait_seconds=1)
+    flushed = []
+
+    async def flush(messages):
+        flushed.append(list(messages))
+
+    async def main():
+        debouncer.submit(("r1", "c1"), "a", flush)
+        debouncer.submit(("r1", "c2"), "b", flush)
+        await asyncio.sleep(0.15)
+
+    asyncio.run(main())
+    assert sorted(flushed) == [["a"], ["b"]]
+
+
+def test_max_wait_bounds_a_long_burst():
+    debouncer = MessageDebouncer(window_seconds=0.05, max_wait_seconds=0.12)
+    flushed = []
+
+    async def flush(messages):
+        flushed.append(list(messages))
+
+    async def main():
+        # Never quiet for a whole window, so only max_wait ends the first burst
+        for i in range(10):
+            debouncer.submit("k", str(i), flush)
+            await asyncio.sleep(0.03)
+        await debouncer.flush_all()
+
+    asyncio.run(main())
+    assert len(flushed) >= 2
+    assert [m for burst in flushed for m in burst] == [str(i) for i in range(10)]
+
+
+def test_messages_during_a_flush_start_the_next_burst_in_order():
+    debouncer = MessageDebouncer(window_seconds=0.02, max_wait_seconds=1)
+    flushed = []
+
+    async def slow_flush(messages):
+        await asyncio.sleep(0.1)
+        flushed.append(list(messages))
+
+    async def main():
+        debouncer.submit("k", "first", slow_flush)
+        await asyncio.sleep(0.05)  # first burst is flushing now
+        debouncer.submit("k", "second", slow_flush)
+        await debouncer.flush_all()
+
+    asyncio.run(main())
+    assert flushed == [["first"], ["second"]]
+
+
+def test_flush_all_flushes_pending_bursts_immediately():
+    debouncer = MessageDebouncer(window_seconds=10, max_wait_seconds=10)
+    flushed = []
+
+    async def flush(messages):
+        flushed.append(list(messages))
+
+    async def main():
+        debouncer.submit("k", "a", flush)
+        debouncer.submit("k", "b", flush)
+        await asyncio.wait_for(debouncer.flush_all(), 1)
+
+    asyncio.run(main())
+    assert flushed == [["a", "b"]]
@@ -0,0 +1,21 @@
+from services.fact_engine import FactIndex
+from services.menu_normalizer import apply_menu_fallbacks
+
+MENU = apply_menu_fallbacks([
+    {"name": "Fish Pie", "ingredients": ["cod", "buttermilk", "potatoes"], "price": "$16"},
+])
+
+
+def test_allergy_questions_are_left_to_the_llm():
+    index = FactIndex({"faq": []}, MENU)
+
+    # The inferred list ("milk") misses the cod; it must not be stated as complete
+    assert index.answer("What are the allergens in the fish pie?") is None
+    assert index.answer("Fish pie allergy info") is None
+
+
+def test_price_and_ingredient_lookups_are_answered_locally():
+    index = FactIndex({"faq": []}, MENU)
+
+    assert index.answer("How much is the fish pie?") == "The Fish Pie is $16."
+    assert index.answer("What ingredients are in the fish pie?") == "The Fish Pie is made with cod, buttermilk, potatoes."
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from services.ingestion_queue import RESTAURANT, IngestionWorker, _now
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def make_worker(session_factory, indexed, lease_seconds=60):
+    worker = IngestionWorker(session_factory=session_factory, lease_seconds=lease_seconds)
+    worker._index_restaurant = lambda db, restaurant_id: indexed.append(restaurant_id)
+    return worker
+
+
+def add_job(session_factory, entity_id, status="pending", claimed_at=None):
+    db = session_factory()
+    db.add(models.VectorIngestionJob(entity_type=RESTAURANT, entity_id=entity_id, status=status, attempts=0,
+                                     next_attempt_at=_now(), claimed_at=claimed_at))
+    db.commit()
+    db.close()
+
+
+def job_statuses(session_factory):
+    db = session_factory()
+    try:
+        return {job.entity_id: job.status for job in db.query(models.VectorIngestionJob)}
+    finally:
+        db.close()
+
+
+def test_live_workers_jobs_are_not_stolen(session_factory):
+    add_job(session_factory, "busy", status="processing", claimed_at=_now())
+    add_job(session_factory, "due")
+    indexed = []
+
+    assert make_worker(session_factory, indexed).run_once() == 1
+    assert indexed == ["due"]
+    assert job_statuses(session_factory) == {"busy": "processing"}
+
+
+def test_expired_lease_is_requeued(session_factory):
+    add_job(session_factory, "crashed", status="processing", claimed_at=_now() - timedelta(seconds=120))
+    add_job(session_factory, "legacy", status="processing")  # claimed before leases existed
+    indexed = []
+    worker = make_worker(session_factory, indexed, lease_seconds=60)
+
+    assert worker.run_once() == 2
+    assert sorted(indexed) == ["crashed", "legacy"]
+    assert job_statuses(session_factory) == {}
+    assert worker.stats()["recovered"] == 2
+
+
+def test_lease_is_renewed_while_a_batch_is_processed(session_factory):
+    for restaurant_id in ("a", "b"):
+        add_job(session_factory, restaurant_id)
+    worker = IngestionWorker(session_factory=session_factory, lease_seconds=60)
+
+    def lease_of(entity_id):
+        other = session_factory()
+        try:
+            job = other.query(models.VectorIngestionJob).filter_by(entity_id=entity_id).one()
+            return job.status, job.claimed_at
+        finally:
+            other.close()
+
+    other = {"a": "b", "b": "a"}
+    claimed = {}
+    claim = worker._claim
+
+    def claim_and_record(db):
+        jobs = claim(db)
+        claimed.update({entity_id: lease_of(entity_id)[1] for entity_id in other})
+        return jobs
+
+    seen = []
+    # While the first restaurant is indexed, the other one (still waiting in
+    # this batch) must look alive to other workers
+    worker._claim = claim_and_record
+    worker._index_restaurant = lambda db, restaurant_id: seen.append((other[restaurant_id], lease_of(other[restaurant_id])))
+    worker.run_once()
+
+    waiting, (status, claimed_at) = seen[0]
+    assert status == "processing"
+    assert claimed_at > claimed[waiting]
@@ -0,0 +1,172 @@
+import asyncio
+import threading
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from services.llm_scheduler import LLMScheduler, LoadShed
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_per_restaurant_cap_does_not_block_other_restaurants():
+    scheduler = LLMScheduler(max_concurrency=10, max_per_restaurant=2, max_queue_wait=0.1)
+    with ExitStack() as held:
+        held.enter_context(scheduler.slot("a"))
+        held.enter_context(scheduler.slot("a"))
+
+        with pytest.raises(LoadShed):
+            with scheduler.slot("a"):
+                pass
+
+        # Another restaurant is admitted straight away
+        with scheduler.slot("b"):
+            assert scheduler.stats()["per_restaurant"]["a"]["in_flight"] == 2
+
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["shed_wait_timeout"] == 1
+
+
+def test_queue_full_is_shed_immediately():
+    scheduler = LLMScheduler(max_concurrency=1, max_per_restaurant=1, max_queue_wait=5, max_queue_depth=1)
+    queued = threading.Thread(target=lambda: scheduler.slot("b").__enter__())
+    with scheduler.slot("a"):
+        queued.start()
+        wait_until(lambda: scheduler.stats()["queue_depth"] == 1)
+        started = time.monotonic()
+        with pytest.raises(LoadShed):
+            with scheduler.slot("c"):
+                pass
+        assert time.monotonic() - started < 1
+    queued.join(5)
+    assert scheduler.stats()["shed_queue_full"] == 1
+
+
+def test_busy_restaurant_does_not_starve_others():
+    scheduler = LLMScheduler(max_concurrency=1, max_per_restaurant=1, max_queue_wait=5)
+    order = []
+
+    def worker(restaurant_id):
+        with scheduler.slot(restaurant_id):
+            order.append(restaurant_id)
+
+    threads = []
+    with scheduler.slot("warmup"):
+        # Restaurant a queues four requests before b queues two
+        for i, restaurant_id in enumerate(["a", "a", "a", "a", "b", "b"]):
+            thread = threading.Thread(target=worker, args=(restaurant_id,))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda: scheduler.stats()["queue_depth"] == i + 1)
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["a", "b", "a", "b", "a", "a"]
+
+
+def test_weights_give_a_restaurant_a_larger_share():
+    scheduler = LLMScheduler(max_concurrency=1, max_per_restaurant=1, max_queue_wait=5, weights={"b": 2})
+    order = []
+
+    def worker(restaurant_id):
+        with scheduler.slot(restaurant_id):
+            order.append(restaurant_id)
+
+    threads = []
+    with scheduler.slot("warmup"):
+        for i, restaurant_id in enumerate(["a", "a", "a", "b", "b", "b", "b"]):
+            thread = threading.Thread(target=worker, args=(restaurant_id,))
+            thread.start()
+            threads.append(thread)
+            wait_until(lambda: scheduler.stats()["queue_depth"] == i + 1)
+    for thread in threads:
+        thread.join(5)
+
+    assert order[:3].count("b") == 2
+
+
+class _GrantOnAbandon(LLMScheduler):
+    """Frees the held slot right before the timed-out waiter abandons, so the grant wins the race."""
+
+    def __init__(self, holder_restaurant, **kwargs):
+        super().__init__(**kwargs)
+        self.holder_restaurant = holder_restaurant
+
+    def _abandon(self, waiter):
+        self.release(self.holder_restaurant)
+        return super()._abandon(waiter)
+
+
+def test_timeout_racing_a_grant_keeps_the_slot():
+    scheduler = _GrantOnAbandon("a", max_concurrency=1, max_per_restaurant=1, max_queue_wait=0.05)
+    scheduler._enqueue("a")  # holds the only slot until _abandon releases it
+
+    with scheduler.slot("b"):
+        assert scheduler.stats()["in_flight"] == 1
+
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+    assert "shed_wait_timeout" not in stats
+
+
+def test_async_timeout_racing_a_grant_keeps_the_slot():
+    scheduler = _GrantOnAbandon("a", max_concurrency=1, max_per_restaurant=1, max_queue_wait=0.05)
+    scheduler._enqueue("a")
+
+    async def ask():
+        async with scheduler.slot_async("b"):
+            return scheduler.stats()["in_flight"]
+
+    assert asyncio.run(ask()) == 1
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_async_timeout_sheds_and_leaves_queue_clean():
+    scheduler = LLMScheduler(max_concurrency=1, max_per_restaurant=1, max_queue_wait=0.05)
+
+    async def ask():
+        async with scheduler.slot_async("a"):
+            with pytest.raises(LoadShed):
+                async with scheduler.slot_async("b"):
+                    pass
+
+    asyncio.run(ask())
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["shed_wait_timeout"] == 1
+
+
+def test_cancelled_async_waiter_leaves_the_queue():
+    scheduler = LLMScheduler(max_concurrency=1, max_per_restaurant=1, max_queue_wait=5)
+
+    async def waiter():
+        async with scheduler.slot_async("b"):
+            pass
+
+    async def main():
+        async with scheduler.slot_async("a"):
+            task = asyncio.ensure_future(waiter())
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["queue_depth"] == 1
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            assert scheduler.stats()["queue_depth"] == 0
+        # The freed slot is not handed to the cancelled waiter
+        async with scheduler.slot_async("c"):
+            pass
+
+    asyncio.run(main())
+    assert scheduler.stats()["in_flight"] == 0
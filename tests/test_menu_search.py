@@ -0,0 +1,50 @@
+from services.chat_service import build_prompt_context
+from services.menu_search import MenuSearchRegistry
+from services.prompt_cache import PromptContextCache, compute_data_version
+
+MENU = [
+    {"name": "Satay Skewers", "ingredients": ["chicken", "peanut sauce"], "price": "12"},
+    {"name": "Green Salad", "ingredients": ["lettuce", "olive oil"], "price": "8"},
+    {"name": "Cheese Board", "ingredients": ["cheese", "crackers"], "price": "15"},
+]
+
+
+def test_index_rebuild_reuses_unchanged_items():
+    registry = MenuSearchRegistry()
+    first = registry.get("r1", MENU, "v1")
+    assert registry.get("r1", MENU, "v1") is first
+
+    registry.get("r1", MENU + [{"name": "Soup", "ingredients": ["leek"], "price": "6"}], "v2")
+    assert registry.stats()["items_parsed"] == 4
+    assert registry.stats()["items_reused"] == 3
+
+
+def test_peek_serves_context_until_revalidation_is_due():
+    cache = PromptContextCache()
+    data = {"name": "Bistro", "menu": MENU}
+    context = cache.get_or_build("r1", data, build_prompt_context)
+
+    assert context.version == compute_data_version(data)
+    assert cache.peek("r1", max_age=60) is context
+    assert cache.peek("r1", max_age=0) is None
+    assert cache.peek("other", max_age=60) is None
+    # Searches do not count towards the chat prompt hit rate
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["peek_hits"] == 1
+    assert cache.stats()["peek_misses"] == 2
+
+    cache.invalidate("r1")
+    assert cache.peek("r1", max_age=60) is None
+
+
+
+def test_registry_evicts_least_recently_used_restaurants():
+    registry = MenuSearchRegistry(max_entries=2)
+    registry.get("r1", MENU, "v1")
+    registry.get("r2", MENU, "v1")
+    registry.get("r1", MENU, "v1")
+    registry.get("r3", MENU, "v1")
+    assert registry.stats()["restaurants"] == 2
+
+    registry.get("r2", MENU, "v1")
+    assert registry.stats()["builds"] == 4
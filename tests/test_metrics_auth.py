@@ -0,0 +1,28 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import auth
+from routes import metrics
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(metrics.router)
+    return TestClient(app)
+
+
+def test_metrics_disabled_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", None)
+    assert client.get("/metrics/chat", headers={"X-Metrics-Token": "anything"}).status_code == 404
+
+
+def test_metrics_require_the_token(client, monkeypatch):
+    monkeypatch.setattr(auth, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics/chat").status_code == 401
+    assert client.get("/metrics/chat", headers={"X-Metrics-Token": "wrong"}).status_code == 401
+
+    response = client.get("/metrics/chat", headers={"X-Metrics-Token": "s3cret"})
+    assert response.status_code == 200
+    assert "tokens" in response.json()
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+
+from services.model_router import FAST, STRONG, ModelRouter, choose_tier, is_safety_question
+
+
+def slow_strong_call(models):
+    def call(model, timeout):
+        models.append(model)
+        time.sleep(0.2 if model == "strong-model" else 0.01)
+        return model
+    return call
+
+
+def make_router():
+    return ModelRouter(fast_model="fast-model", strong_model="strong-model",
+                       deadline_seconds=2, hedge_after_seconds=0.05)
+
+
+def test_tiers():
+    assert choose_tier("what time do you open?") == FAST
+    assert choose_tier("is the pad thai safe with a peanut allergy?") == STRONG
+    assert choose_tier("what would you recommend?") == STRONG
+
+
+@pytest.mark.parametrize("message", [
+    "is there milk in the tiramisu?",
+    "anything without eggs?",
+    "does the soup have fish",
+    "Is the bread made with wheat?",
+    "any mustard in the dressing?",
+    "are there tree nuts in the cake?",
+    "does the wok use soy sauce?",
+])
+def test_known_allergens_are_safety_questions(message):
+    assert choose_tier(message) == STRONG
+    assert is_safety_question(message)
+
+
+def test_allergen_words_match_whole_words_only():
+    assert choose_tier("do you have eggplant?") == FAST
+
+
+def test_slow_strong_call_is_hedged():
+    router = make_router()
+    models = []
+    response, model = router.complete("what would you recommend?", slow_strong_call(models))
+    assert model == "fast-model"
+    assert router.stats()["hedges"] == 1
+
+
+def test_safety_question_is_never_hedged():
+    router = make_router()
+    models = []
+    response, model = router.complete("does the curry contain peanuts?", slow_strong_call(models))
+    assert model == "strong-model"
+    assert models == ["strong-model"]
+    assert router.stats()["hedges"] == 0
+
+
+def test_safety_question_is_never_hedged_async():
+    router = make_router()
+    models = []
+
+    async def call(model, timeout):
+        models.append(model)
+        await asyncio.sleep(0.2 if model == "strong-model" else 0.01)
+        return model
+
+    response, model = asyncio.run(router.complete_async("is it gluten free?", call))
+    assert model == "strong-model"
+    assert models == ["strong-model"]
+
+
+def test_streamed_completions_are_recorded():
+    router = make_router()
+    tier, _ = router.route("hi there")
+    router.record_stream(tier, time.perf_counter(), ok=True)
+    router.record_stream(tier, time.perf_counter(), ok=False)
+    stats = router.stats()["tiers"][tier]
+    assert stats["routed"] == 1
+    assert stats["answered"] == 1
+    assert stats["errors"] == 1
+    assert stats["latency_ms"]["count"] == 1
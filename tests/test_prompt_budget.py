@@ -0,0 +1,60 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+from schemas.chat import ChatRequest
+from services import chat_service
+from services.chat_service import prepare_chat
+from services.menu_normalizer import apply_menu_fallbacks
+from services.token_budget import get_prompt_budget
+
+MENU = apply_menu_fallbacks([
+    {"name": f"Dish {i}", "ingredients": ["rice", "tomato"], "description": "House special", "price": "10"}
+    for i in range(20)
+])
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def add_restaurant(db, restaurant_id, opening_hours):
+    db.add(models.Restaurant(restaurant_id=restaurant_id, password="x", data={
+        "name": "Storyteller",
+        "restaurant_story": " ".join(["Once upon a time our family cooked rice."] * 400),
+        "opening_hours": opening_hours,
+        "menu": MENU,
+    }))
+    db.commit()
+
+
+def test_long_story_does_not_crowd_out_the_menu(db):
+    add_restaurant(db, "storyteller", "Mon-Sun 9-22")
+    prepared = prepare_chat(ChatRequest(restaurant_id="storyteller", client_id=uuid.uuid4(),
+                                        message="What dishes do you have?"), db)
+
+    prompt = prepared.messages[1]["content"]
+    assert "Dish 0" in prompt
+    assert "Mon-Sun 9-22" in prompt
+    assert prepared.estimated_prompt_tokens <= get_prompt_budget("storyteller")
+
+
+def test_restaurant_info_is_cut_to_keep_the_minimum_menu_budget(db, monkeypatch):
+    monkeypatch.setattr(chat_service, "get_prompt_budget", lambda restaurant_id: 1000)
+    add_restaurant(db, "tight", " ".join(["Open late on holidays."] * 200))
+    prepared = prepare_chat(ChatRequest(restaurant_id="tight", client_id=uuid.uuid4(),
+                                        message="What dishes do you have?"), db)
+
+    prompt = prepared.messages[1]["content"]
+    assert "Dish 0" in prompt
+    assert prepared.truncated_menu
+    assert prepared.estimated_prompt_tokens <= 1000
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def fn():
+        calls.append(1)
+        release.wait(2)
+        return "answer"
+
+    threads = [threading.Thread(target=lambda: results.append(flights.do("k", fn))) for _ in range(3)]
+    threads[0].start()
+    wait_until(lambda: flights.stats()["in_flight"] == 1)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flights.stats()["coalesced"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(calls) == 1
+    assert sorted(results) == [("answer", False), ("answer", True), ("answer", True)]
+
+
+def test_leader_exception_reaches_followers():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(2)
+        raise ValueError("openai down")
+
+    def call():
+        try:
+            flights.do("k", fn)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    wait_until(lambda: flights.stats()["in_flight"] == 1)
+    for thread in threads[1:]:
+        thread.start()
+    wait_until(lambda: flights.stats()["coalesced"] == 2)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert len(errors) == 3
+    # The failed call is forgotten: the next caller runs fn again
+    assert flights.do("k", lambda: "retry") == ("retry", False)
+
+
+def test_async_leader_exception_reaches_followers():
+    flights = SingleFlight()
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("openai down")
+
+    async def main():
+        results = await asyncio.gather(*(flights.do_async("k", fn) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert await flights.do_async("k", lambda: asyncio.sleep(0, "retry")) == ("retry", False)
+
+    asyncio.run(main())
+    assert len(calls) == 1
+
+
+def test_cancelled_async_follower_does_not_cancel_the_call():
+    flights = SingleFlight()
+
+    async def fn():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do_async("k", fn))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do_async("k", fn))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        assert await leader == ("answer", False)
+
+    asyncio.run(main())
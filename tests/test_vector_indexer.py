@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models
+import pinecone_utils
+from services.vector_indexer import reindex_restaurant
+from vector_store import LocalVectorStore
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = LocalVectorStore(path=None)
+    monkeypatch.setattr(pinecone_utils, "_vector_index", store)
+    return store
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+def vector(restaurant_id):
+    return np.random.default_rng(0).standard_normal(8).tolist(), {"restaurant_id": restaurant_id}
+
+
+def test_delete_without_index_state_drops_namespace_and_legacy_vectors(store, db):
+    values, metadata = vector("r1")
+    store.upsert([("chunk", values, metadata)], namespace=pinecone_utils.restaurant_namespace("r1"))
+    store.upsert([("restaurant_r1", values, metadata)])
+    store.upsert([("other", values, {"restaurant_id": "r2"})], namespace=pinecone_utils.restaurant_namespace("r2"))
+
+    reindex_restaurant(db, "r1", None)
+
+    assert store.stats()["vectors"] == 1
+    assert "other" in store.fetch(["other"], namespace=pinecone_utils.restaurant_namespace("r2"))["vectors"]
+
+
+def test_delete_with_index_state_removes_the_state(store, db):
+    values, metadata = vector("r1")
+    store.upsert([("chunk", values, metadata)], namespace=pinecone_utils.restaurant_namespace("r1"))
+    db.add(models.RestaurantIndexState(restaurant_id="r1", chunk_ids=["chunk"]))
+    db.commit()
+
+    counts = reindex_restaurant(db, "r1", None)
+    db.commit()
+
+    assert counts["deleted"] == 1
+    assert store.stats()["vectors"] == 0
+    assert db.query(models.RestaurantIndexState).count() == 0
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from vector_store import LocalVectorStore, VectorStore
+
+
+def vectors(rng, n, prefix="v", restaurant_id="r1"):
+    return [(f"{prefix}{i}", rng.standard_normal(8).tolist(), {"restaurant_id": restaurant_id}) for i in range(n)]
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        VectorStore()
+
+
+def test_writes_are_batched_until_flush(tmp_path):
+    rng = np.random.default_rng(0)
+    store = LocalVectorStore(path=str(tmp_path), flush_seconds=60)
+    for batch in range(5):
+        store.upsert(vectors(rng, 3, prefix=f"b{batch}_"), namespace="restaurant-r1")
+    store.delete(ids=["b0_0"], namespace="restaurant-r1")
+    assert store.stats()["saves"] == 0
+    assert store.stats()["unsaved_partitions"] == 1
+
+    store.flush()
+    assert store.stats()["saves"] == 1
+    assert store.stats()["unsaved_partitions"] == 0
+
+    reloaded = LocalVectorStore(path=str(tmp_path))
+    assert reloaded.stats()["vectors"] == 14
+    assert "b0_0" not in reloaded.fetch(["b0_0", "b1_0"], namespace="restaurant-r1")["vectors"]
+
+
+def test_timer_flushes_in_the_background(tmp_path):
+    rng = np.random.default_rng(0)
+    store = LocalVectorStore(path=str(tmp_path), flush_seconds=0.01)
+    store.upsert(vectors(rng, 3), namespace="restaurant-r1")
+    store._flush_timer.join(2)
+    assert store.stats()["saves"] == 1
+    assert LocalVectorStore(path=str(tmp_path)).stats()["vectors"] == 3
+
+
+def test_emptied_partition_is_removed_from_disk(tmp_path):
+    rng = np.random.default_rng(0)
+    store = LocalVectorStore(path=str(tmp_path), flush_seconds=0)
+    store.upsert(vectors(rng, 2), namespace="restaurant-r1")
+    assert len(list(tmp_path.iterdir())) == 2
+    store.delete(delete_all=True, namespace="restaurant-r1")
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.fixture
+def ivf_store(monkeypatch):
+    import vector_store
+    monkeypatch.setattr(vector_store, "LOCAL_VECTOR_IVF_THRESHOLD", 50)
+    store = LocalVectorStore(path=None)
+    store.upsert(vectors(np.random.default_rng(0), 200), namespace="restaurant-r1")
+    store.build_indexes()
+    assert store.stats()["ivf_builds"] == 1
+    return store
+
+
+def test_small_write_joins_ivf_lists_without_rebuild(ivf_store):
+    new_vector = np.random.default_rng(1).standard_normal(8).tolist()
+    ivf_store.upsert([("new", new_vector, {"restaurant_id": "r1"})], namespace="restaurant-r1")
+
+    matches = ivf_store.query(new_vector, top_k=1, namespace="restaurant-r1")["matches"]
+    assert matches[0]["id"] == "new"
+    assert ivf_store.stats()["ivf_builds"] == 1
+    assert ivf_store.stats()["ivf_builds_running"] == 0
+
+
+def test_deletes_keep_ivf_lists_aligned(ivf_store):
+    ivf_store.delete(ids=[f"v{i}" for i in range(0, 10)], namespace="restaurant-r1")
+    partition = ivf_store._partitions[("restaurant-r1", "r1")]
+    rows = np.sort(np.concatenate(partition.lists))
+    assert rows.tolist() == list(range(190))
+
+    kept = ivf_store.fetch(["v42"], namespace="restaurant-r1")["vectors"]["v42"]["values"]
+    assert ivf_store.query(kept, top_k=1, namespace="restaurant-r1")["matches"][0]["id"] == "v42"
+
+
+def test_drift_rebuilds_in_the_background(ivf_store):
+    ivf_store.upsert(vectors(np.random.default_rng(2), 40, prefix="w"), namespace="restaurant-r1")
+    ivf_store.build_indexes()
+    assert ivf_store.stats()["ivf_builds"] == 2
+    assert ivf_store._partitions[("restaurant-r1", "r1")].drift == 0
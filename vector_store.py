@@ -0,0 +1,583 @@
+# vector_store.py
+
+"""
+Vector store backends for pinecone_utils.
+Both backends expose the subset of the Pinecone Index API that the app uses
+(upsert / query / delete / fetch / list), so pinecone_utils works unchanged on top
+of either:
+
+- PineconeVectorStore: the remote Pinecone index.
+- LocalVectorStore: in-process NumPy index, partitioned by namespace and
+  metadata restaurant_id, persisted to disk and loaded at startup. Small
+  partitions are searched brute force; large ones through an IVF
+  (k-means inverted file) approximate index. New rows join their nearest
+  centroid's list at once; k-means is re-run in a background thread, outside
+  the store lock, once enough rows changed. Writes are persisted in the
+  background, at most once per partition every LOCAL_VECTOR_STORE_FLUSH_SECONDS.
+
+Select with VECTOR_STORE_BACKEND=pinecone|local.
+"""
+
+import atexit
+import json
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "pinecone")
+LOCAL_VECTOR_STORE_PATH = os.getenv("LOCAL_VECTOR_STORE_PATH", "vector_store")
+# Partitions with at least this many vectors are searched through IVF
+LOCAL_VECTOR_IVF_THRESHOLD = int(os.getenv("LOCAL_VECTOR_IVF_THRESHOLD", "5000"))
+LOCAL_VECTOR_IVF_NPROBE = int(os.getenv("LOCAL_VECTOR_IVF_NPROBE", "8"))
+# Share of a partition's rows changed since the last k-means run that triggers a rebuild
+LOCAL_VECTOR_IVF_REBUILD_FRACTION = float(os.getenv("LOCAL_VECTOR_IVF_REBUILD_FRACTION", "0.1"))
+# Writes are batched to disk this long after the first unsaved change; 0 saves on every write
+LOCAL_VECTOR_STORE_FLUSH_SECONDS = float(os.getenv("LOCAL_VECTOR_STORE_FLUSH_SECONDS", "2"))
+
+SHARED_PARTITION = "_shared"  # vectors without a restaurant_id (e.g. client preferences)
+KMEANS_ITERATIONS = 10
+
+
+class VectorStore(ABC):
+    """Minimal Pinecone-Index-compatible interface."""
+
+    @abstractmethod
+    def upsert(self, vectors: List[Any], namespace: str = "") -> None:
+        ...
+
+    @abstractmethod
+    def query(self, vector: List[float], top_k: int = 10, filter: Optional[dict] = None,
+              include_metadata: bool = False, namespace: str = "") -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def delete(self, ids: Optional[List[str]] = None, filter: Optional[dict] = None,
+               namespace: str = "", delete_all: bool = False) -> None:
+        ...
+
+    @abstractmethod
+    def fetch(self, ids: List[str], namespace: str = "") -> Dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def list(self, prefix: str = "", namespace: str = "") -> Iterator[List[str]]:
+        """Pages of vector ids starting with prefix."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+    def flush(self) -> None:
+        """Persist buffered writes (no-op for backends that write through)."""
+
+
+class PineconeVectorStore(VectorStore):
+    """Thin pass-through to a Pinecone Index."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def upsert(self, vectors, namespace=""):
+        return self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def query(self, vector, top_k=10, filter=None, include_metadata=False, namespace=""):
+        return self.index.query(vector=vector, top_k=top_k, filter=filter,
+                                include_metadata=include_metadata, namespace=namespace)
+
+    def delete(self, ids=None, filter=None, namespace="", delete_all=False):
+        if delete_all:
+            return self.index.delete(delete_all=True, namespace=namespace)
+        if filter is not None:
+            return self.index.delete(filter=filter, namespace=namespace)
+        return self.index.delete(ids=ids, namespace=namespace)
+
+    def fetch(self, ids, namespace=""):
+        return self.index.fetch(ids=ids, namespace=namespace)
+
+    def list(self, prefix="", namespace=""):
+        return self.index.list(prefix=prefix or None, namespace=namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "pinecone"}
+
+
+def _normalize_vector(vector: Any) -> Tuple[str, List[float], Dict[str, Any]]:
+    """Accept Pinecone's (id, values[, metadata]) tuples and dicts."""
+    if isinstance(vector, dict):
+        return vector["id"], vector["values"], vector.get("metadata") or {}
+    return vector[0], vector[1], (vector[2] if len(vector) > 2 else {}) or {}
+
+
+def matches_filter(metadata: Dict[str, Any], flt: Optional[dict]) -> bool:
+    """Evaluate the Pinecone metadata filter operators the app uses."""
+    if not flt:
+        return True
+    for key, condition in flt.items():
+        if key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, expected in condition.items():
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+                if op == "$in" and value not in expected:
+                    return False
+                if op == "$nin" and value in expected:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+def _filter_restaurants(flt: Optional[dict]) -> Optional[set]:
+    """restaurant_ids a filter is restricted to, or None if unrestricted."""
+    if not flt:
+        return None
+    if "$or" in flt:
+        parts = [_filter_restaurants(sub) for sub in flt["$or"]]
+        if any(part is None for part in parts):
+            return None
+        return set().union(*parts) | {SHARED_PARTITION}
+    condition = flt.get("restaurant_id")
+    if condition is None:
+        # Client vectors carry no restaurant_id, so they all live in the shared partition
+        return {SHARED_PARTITION} if "client_id" in flt else None
+    if isinstance(condition, dict):
+        if "$eq" in condition:
+            return {condition["$eq"]}
+        if "$in" in condition:
+            return set(condition["$in"])
+        return None
+    return {condition}
+
+
+def _kmeans(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means over L2-normalized rows: (centroids, row assignment)."""
+    n = len(vectors)
+    nlist = max(1, int(np.sqrt(n)))
+    rng = np.random.default_rng(0)
+    centroids = vectors[rng.choice(n, nlist, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = vectors[assignment == c]
+            if len(members):
+                centroid = members.mean(axis=0)
+                centroids[c] = centroid / (np.linalg.norm(centroid) or 1.0)
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+class _Partition:
+    """
+    Vectors of one (namespace, restaurant) with an optional IVF index.
+    Writes keep the index usable (new rows join their nearest list, deletes
+    remap positions) and count as drift; LocalVectorStore re-runs k-means
+    in the background once drift passes LOCAL_VECTOR_IVF_REBUILD_FRACTION.
+    """
+
+    def __init__(self, dim: int = 0):
+        self.ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.metadata: List[Dict[str, Any]] = []
+        # Rows live in a buffer with spare capacity, so appends are amortized O(1)
+        self._buffer = np.zeros((0, dim), dtype=np.float32)
+        self._size = 0
+        self.centroids: Optional[np.ndarray] = None
+        self.lists: List[np.ndarray] = []
+        self.drift = 0  # rows added, overwritten or deleted since the last k-means run
+        self.layout = 0  # bumped whenever deletes shift row positions
+        self.building = False
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._buffer[:self._size]
+
+    @vectors.setter
+    def vectors(self, value: np.ndarray) -> None:
+        self._buffer = value
+        self._size = len(value)
+
+    def _append(self, rows: np.ndarray) -> None:
+        needed = self._size + len(rows)
+        if needed > len(self._buffer):
+            buffer = np.zeros((max(needed, 2 * len(self._buffer)), rows.shape[1]), dtype=np.float32)
+            buffer[:self._size] = self.vectors
+            self._buffer = buffer
+        self._buffer[self._size:needed] = rows
+        self._size = needed
+
+    def upsert(self, ids: List[str], values: np.ndarray, metadata: List[Dict[str, Any]]) -> None:
+        if self.vectors.shape[1] != values.shape[1] and len(self.ids) == 0:
+            self.vectors = np.zeros((0, values.shape[1]), dtype=np.float32)
+        new_rows = []
+        for vector_id, row, md in zip(ids, values, metadata):
+            position = self.positions.get(vector_id)
+            if position is None:
+                self.positions[vector_id] = len(self.ids)
+                self.ids.append(vector_id)
+                self.metadata.append(md)
+                new_rows.append(row)
+            elif position >= len(self.vectors):
+                # Duplicate id within the same batch: last write wins
+                new_rows[position - len(self.vectors)] = row
+                self.metadata[position] = md
+            else:
+                # Stays in its old list until the next rebuild
+                self.vectors[position] = row
+                self.metadata[position] = md
+        self.drift += len(ids)
+        if new_rows:
+            start = len(self.vectors)
+            self._append(np.asarray(new_rows, dtype=np.float32))
+            self._assign(start)
+
+    def _assign(self, start: int) -> None:
+        """Add rows from start on to their nearest centroid's list."""
+        if self.centroids is None or start >= len(self.vectors):
+            return
+        assignment = np.argmax(self.vectors[start:] @ self.centroids.T, axis=1)
+        for c in np.unique(assignment):
+            self.lists[c] = np.concatenate([self.lists[c], start + np.flatnonzero(assignment == c)])
+
+    def delete(self, keep: np.ndarray) -> None:
+        self.ids = [vector_id for vector_id, k in zip(self.ids, keep) if k]
+        self.metadata = [md for md, k in zip(self.metadata, keep) if k]
+        self.vectors = self.vectors[keep]
+        self.positions = {vector_id: i for i, vector_id in enumerate(self.ids)}
+        if self.centroids is not None:
+            new_positions = np.cumsum(keep) - 1
+            self.lists = [new_positions[rows[keep[rows]]] for rows in self.lists]
+        self.drift += int(len(keep) - keep.sum())
+        self.layout += 1
+
+    def needs_ivf_build(self) -> bool:
+        if self.building or len(self.ids) < LOCAL_VECTOR_IVF_THRESHOLD:
+            return False
+        return self.centroids is None or self.drift > LOCAL_VECTOR_IVF_REBUILD_FRACTION * len(self.ids)
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """Row positions to score, or None for all rows (brute force)."""
+        if len(self.ids) < LOCAL_VECTOR_IVF_THRESHOLD or self.centroids is None:
+            return None
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        return np.concatenate([self.lists[c] for c in nearest])
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index with cosine similarity (vectors are stored
+    L2-normalized), partitioned by namespace and metadata restaurant_id.
+    Each partition is persisted as <path>/<partition>.npz + .json; changed
+    partitions are written by a background timer (and at exit), so a burst
+    of writes to one partition costs one save instead of one per write.
+    """
+
+    def __init__(self, path: Optional[str] = LOCAL_VECTOR_STORE_PATH,
+                 nprobe: int = LOCAL_VECTOR_IVF_NPROBE,
+                 flush_seconds: float = LOCAL_VECTOR_STORE_FLUSH_SECONDS):
+        self.path = path or None
+        self.nprobe = nprobe
+        self.flush_seconds = flush_seconds
+        self._partitions: Dict[Tuple[str, str], _Partition] = {}
+        self._lock = threading.RLock()
+        # Serializes disk writes, which run outside self._lock
+        self._save_lock = threading.Lock()
+        self._unsaved: set = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        self.saves = 0
+        self._ivf_threads: Dict[Tuple[str, str], threading.Thread] = {}
+        self.ivf_builds = 0
+        if self.path:
+            self._load()
+            atexit.register(self.flush)
+
+    # Persistence -----------------------------------------------------------
+
+    @staticmethod
+    def _file_stem(key: Tuple[str, str]) -> str:
+        safe = lambda part: re.sub(r"[^A-Za-z0-9_.-]", "_", part) or "_"
+        return f"{safe(key[0])}__{safe(key[1])}"
+
+    def _load(self) -> None:
+        if not os.path.isdir(self.path):
+            return
+        loaded = 0
+        for filename in os.listdir(self.path):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(self.path, filename)) as f:
+                meta = json.load(f)
+            arrays = np.load(os.path.join(self.path, filename[:-5] + ".npz"))
+            if len(arrays["vectors"]) != len(meta["ids"]):
+                # Interrupted between the two renames in _save: drop it rather than misalign ids and vectors
+                print(f"⚠️ Skipping inconsistent vector partition {filename[:-5]}")
+                continue
+            partition = _Partition()
+            partition.ids = meta["ids"]
+            partition.metadata = meta["metadata"]
+            partition.positions = {vector_id: i for i, vector_id in enumerate(partition.ids)}
+            partition.vectors = arrays["vectors"]
+            self._partitions[(meta["namespace"], meta["partition"])] = partition
+            loaded += len(partition.ids)
+        print(f"✅ Loaded {loaded} vectors in {len(self._partitions)} partitions from {self.path}")
+
+    def _mark_unsaved(self, keys: Iterable[Tuple[str, str]]) -> None:
+        # Caller holds self._lock
+        if not self.path:
+            return
+        self._unsaved.update(keys)
+        if self.flush_seconds > 0 and self._flush_timer is None and self._unsaved:
+            self._flush_timer = threading.Timer(self.flush_seconds, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write every partition changed since the last flush to disk."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                keys, self._unsaved = self._unsaved, set()
+                # Snapshot under the lock, write outside it so queries are not blocked on disk
+                snapshots = []
+                for key in keys:
+                    partition = self._partitions.get(key)
+                    if partition is None or not partition.ids:
+                        snapshots.append((key, None, None, None))
+                    else:
+                        snapshots.append((key, partition.vectors.copy(), list(partition.ids), list(partition.metadata)))
+            if snapshots:
+                os.makedirs(self.path, exist_ok=True)
+            for key, vectors, ids, metadata in snapshots:
+                try:
+                    self._save(key, vectors, ids, metadata)
+                except Exception as e:
+                    print(f"⚠️ Could not save vector partition {key}: {e}")
+                    with self._lock:
+                        self._unsaved.add(key)
+
+    def _save(self, key: Tuple[str, str], vectors: Optional[np.ndarray],
+              ids: Optional[List[str]], metadata: Optional[List[Dict[str, Any]]]) -> None:
+        stem = os.path.join(self.path, self._file_stem(key))
+        if vectors is None:
+            for ext in (".json", ".npz"):
+                if os.path.exists(stem + ext):
+                    os.remove(stem + ext)
+            return
+        # Write to temporary files and rename, so a crash never leaves a half-written partition
+        with open(stem + ".npz.tmp", "wb") as f:
+            np.savez(f, vectors=vectors)
+        with open(stem + ".json.tmp", "w") as f:
+            json.dump({"namespace": key[0], "partition": key[1], "ids": ids, "metadata": metadata}, f)
+        os.replace(stem + ".npz.tmp", stem + ".npz")
+        os.replace(stem + ".json.tmp", stem + ".json")
+        self.saves += 1
+
+    # IVF maintenance -------------------------------------------------------
+
+    def _schedule_ivf_builds(self, keys: Iterable[Tuple[str, str]]) -> None:
+        # Caller holds self._lock
+        for key in set(keys):
+            partition = self._partitions.get(key)
+            if partition is not None and partition.needs_ivf_build():
+                partition.building = True
+                thread = threading.Thread(target=self._build_ivf, args=(key, partition), daemon=True)
+                self._ivf_threads[key] = thread
+                thread.start()
+
+    def _build_ivf(self, key: Tuple[str, str], partition: _Partition) -> None:
+        """Run k-means on a snapshot outside the lock, then install it if rows were not shifted meanwhile."""
+        try:
+            with self._lock:
+                vectors = partition.vectors.copy()
+                layout, drift = partition.layout, partition.drift
+            centroids, assignment = _kmeans(vectors)
+            with self._lock:
+                if self._partitions.get(key) is not partition or partition.layout != layout:
+                    # Deletes moved rows; the next write or query schedules a fresh build
+                    return
+                partition.centroids = centroids
+                partition.lists = [np.flatnonzero(assignment == c) for c in range(len(centroids))]
+                # Rows appended while k-means ran
+                partition._assign(len(vectors))
+                partition.drift -= drift
+                self.ivf_builds += 1
+        except Exception as e:
+            print(f"⚠️ IVF build failed for vector partition {key}: {e}")
+        finally:
+            with self._lock:
+                partition.building = False
+                if self._ivf_threads.get(key) is threading.current_thread():
+                    del self._ivf_threads[key]
+
+    def build_indexes(self) -> None:
+        """Bring every IVF index up to date and wait for it (benchmarks, tests)."""
+        with self._lock:
+            self._schedule_ivf_builds(list(self._partitions))
+            threads = list(self._ivf_threads.values())
+        for thread in threads:
+            thread.join()
+
+    # Index API -------------------------------------------------------------
+
+    @staticmethod
+    def _partition_name(metadata: Dict[str, Any]) -> str:
+        return str(metadata.get("restaurant_id") or SHARED_PARTITION)
+
+    def upsert(self, vectors, namespace=""):
+        grouped: Dict[Tuple[str, str], List[Tuple[str, List[float], Dict[str, Any]]]] = {}
+        for vector in vectors:
+            vector_id, values, metadata = _normalize_vector(vector)
+            grouped.setdefault((namespace, self._partition_name(metadata)), []).append((vector_id, values, metadata))
+
+        with self._lock:
+            touched = list(grouped)
+            for key, rows in grouped.items():
+                # An id moving to another partition must not stay in the old one
+                touched += self._delete_ids([vector_id for vector_id, _, _ in rows], namespace, skip=key)
+                values = np.asarray([values for _, values, _ in rows], dtype=np.float32)
+                values /= np.maximum(np.linalg.norm(values, axis=1, keepdims=True), 1e-12)
+                partition = self._partitions.setdefault(key, _Partition(values.shape[1]))
+                partition.upsert([vector_id for vector_id, _, _ in rows], values, [md for _, _, md in rows])
+            self._drop_empty(touched)
+            self._mark_unsaved(touched)
+            self._schedule_ivf_builds(touched)
+        if self.flush_seconds <= 0:
+            self.flush()
+        return {"upserted_count": len(vectors)}
+
+    def _drop_empty(self, keys: Iterable[Tuple[str, str]]) -> None:
+        for key in set(keys):
+            partition = self._partitions.get(key)
+            if partition is not None and not partition.ids:
+                del self._partitions[key]
+
+    def _delete_ids(self, ids: List[str], namespace: str, skip: Optional[Tuple[str, str]] = None) -> List[Tuple[str, str]]:
+        touched = []
+        wanted = set(ids)
+        for key, partition in self._partitions.items():
+            if key[0] != namespace or key == skip or not wanted.intersection(partition.positions):
+                continue
+            partition.delete(np.array([vector_id not in wanted for vector_id in partition.ids], dtype=bool))
+            touched.append(key)
+        return touched
+
+    def delete(self, ids=None, filter=None, namespace="", delete_all=False):
+        with self._lock:
+            if delete_all:
+                touched = [key for key in self._partitions if key[0] == namespace]
+                for key in touched:
+                    del self._partitions[key]
+            elif filter is not None:
+                restaurants = _filter_restaurants(filter)
+                touched = []
+                for key, partition in self._partitions.items():
+                    if key[0] != namespace or (restaurants is not None and key[1] not in restaurants):
+                        continue
+                    keep = np.array([not matches_filter(md, filter) for md in partition.metadata], dtype=bool)
+                    if not keep.all():
+                        partition.delete(keep)
+                        touched.append(key)
+            else:
+                touched = self._delete_ids(ids or [], namespace)
+            self._drop_empty(touched)
+            self._mark_unsaved(touched)
+            self._schedule_ivf_builds(touched)
+        if self.flush_seconds <= 0:
+            self.flush()
+
+    def fetch(self, ids, namespace=""):
+        with self._lock:
+            found = {}
+            for key, partition in self._partitions.items():
+                if key[0] != namespace:
+                    continue
+                for vector_id in ids:
+                    position = partition.positions.get(vector_id)
+                    if position is not None:
+                        found[vector_id] = {
+                            "id": vector_id,
+                            "values": partition.vectors[position].tolist(),
+                            "metadata": partition.metadata[position],
+                        }
+            return {"vectors": found, "namespace": namespace}
+
+    def list(self, prefix="", namespace="", page_size=100):
+        with self._lock:
+            ids = sorted(
+                vector_id
+                for key, partition in self._partitions.items() if key[0] == namespace
+                for vector_id in partition.ids if vector_id.startswith(prefix)
+            )
+        for start in range(0, len(ids), page_size):
+            yield ids[start:start + page_size]
+
+    def query(self, vector, top_k=10, filter=None, include_metadata=False, namespace=""):
+        query = np.asarray(vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        restaurants = _filter_restaurants(filter)
+
+        scored: List[Tuple[float, str, Dict[str, Any]]] = []
+        with self._lock:
+            for key, partition in self._partitions.items():
+                if key[0] != namespace or not partition.ids:
+                    continue
+                if restaurants is not None and key[1] not in restaurants:
+                    continue
+                # Partitions loaded from disk get their first index here
+                self._schedule_ivf_builds([key])
+                rows = partition.candidates(query, self.nprobe)
+                vectors = partition.vectors if rows is None else partition.vectors[rows]
+                scores = vectors @ query
+                # Over-fetch so metadata filtering still leaves top_k results
+                k = min(len(scores), top_k * 4 if filter else top_k)
+                best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+                for i in best:
+                    position = int(i) if rows is None else int(rows[i])
+                    metadata = partition.metadata[position]
+                    if matches_filter(metadata, filter):
+                        scored.append((float(scores[i]), partition.ids[position], metadata))
+
+        scored.sort(key=lambda match: -match[0])
+        return {
+            "matches": [
+                {"id": vector_id, "score": score, **({"metadata": metadata} if include_metadata else {})}
+                for score, vector_id, metadata in scored[:top_k]
+            ],
+            "namespace": namespace,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "local",
+                "path": self.path,
+                "namespaces": len({key[0] for key in self._partitions}),
+                "partitions": len(self._partitions),
+                "vectors": sum(len(p.ids) for p in self._partitions.values()),
+                "ivf_partitions": sum(1 for p in self._partitions.values() if len(p.ids) >= LOCAL_VECTOR_IVF_THRESHOLD),
+                "ivf_builds": self.ivf_builds,
+                "ivf_builds_running": len(self._ivf_threads),
+                "unsaved_partitions": len(self._unsaved),
+                "saves": self.saves,
+            }
+
+
+def create_vector_store(pinecone_index_factory=None) -> VectorStore:
+    """Build the configured backend; the Pinecone index is only created for that backend."""
+    if VECTOR_STORE_BACKEND == "local":
+        return LocalVectorStore()
+    return PineconeVectorStore(pinecone_index_factory())